@@ -0,0 +1,74 @@
+"""
+Compares checking a large corpus of values with trycast_many() in the
+calling thread and in thread, process, and interpreter pools.
+Interpreter pools are only available in Python 3.14+.
+
+Usage:
+    $ python -m benchmarks.batch_executors_benchmarks
+"""
+
+import concurrent.futures
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from benchmarks.data.http_request_parsing_example import _ProxiedHttpRequestEnvelope
+from trycast import trycast_many
+
+_CORPUS = [
+    {
+        "request": {
+            "url": f"https://example.com/api/posts/{i}",
+            "method": "GET",
+            "headers": {"Accept": "application/json"},
+            "content": {
+                "type": {"family": "application/json", "value": "application/json"},
+                "text": '{"offset": 0, "limit": 20}',
+            },
+        }
+    }
+    for i in range(50_000)
+]  # type: List[object]
+
+_WORKER_COUNT = os.cpu_count() or 1
+
+
+def _executor_factories() -> "List[Tuple[str, Callable[[], Optional[Executor]]]]":
+    factories = [
+        ("calling thread", lambda: None),
+        ("thread pool", lambda: ThreadPoolExecutor(_WORKER_COUNT)),
+        ("process pool", lambda: ProcessPoolExecutor(_WORKER_COUNT)),
+    ]  # type: List[Tuple[str, Callable[[], Optional[Executor]]]]
+    InterpreterPoolExecutor = getattr(
+        concurrent.futures, "InterpreterPoolExecutor", None
+    )
+    if InterpreterPoolExecutor is not None:
+        factories.append(
+            ("interpreter pool", lambda: InterpreterPoolExecutor(_WORKER_COUNT))
+        )
+    return factories
+
+
+def run() -> None:
+    trycast_many(_ProxiedHttpRequestEnvelope, _CORPUS)
+
+
+def main() -> None:
+    for label, executor_factory in _executor_factories():
+        executor = executor_factory()
+        try:
+            # Warm up workers and their caches
+            trycast_many(_ProxiedHttpRequestEnvelope, _CORPUS, executor=executor)
+
+            start = time.perf_counter()
+            trycast_many(_ProxiedHttpRequestEnvelope, _CORPUS, executor=executor)
+            duration = time.perf_counter() - start
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        print(f"{label:16} {duration * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
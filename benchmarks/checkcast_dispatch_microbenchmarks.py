@@ -0,0 +1,81 @@
+"""
+Measures the cost of checking a value against one type form
+of each kind that trycast recognizes, excluding the fixed cost of
+resolving the type given to the public API functions.
+
+Usage:
+    $ python -m benchmarks.checkcast_dispatch_microbenchmarks
+"""
+
+import timeit
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Mapping,
+    NewType,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    Union,
+)
+
+from trycast import _checkcast_inner, _TrycastOptions
+
+
+class _UserClass:
+    pass
+
+
+class _Point(TypedDict):
+    x: int
+    y: int
+
+
+_UserId = NewType("_UserId", int)
+
+_OPTIONS = _TrycastOptions(strict=False, eval=True, funcname="isassignable")
+
+# (label, type form, value)
+CASES = [
+    ("int", int, 1),
+    ("str", str, "a"),
+    ("user class", _UserClass, _UserClass()),
+    ("None", type(None), None),
+    ("Any", Any, 1),
+    ("List[int] (empty)", List[int], []),
+    ("list[int] (empty)", list[int], []),
+    ("Tuple[int, str]", Tuple[int, str], (1, "a")),
+    ("Sequence[int] (empty)", Sequence[int], ()),
+    ("Dict[str, int] (empty)", Dict[str, int], {}),
+    ("Mapping[str, int] (empty)", Mapping[str, int], {}),
+    ("Optional[str]", Optional[str], "a"),
+    ("Union[int, str]", Union[int, str], "a"),
+    ("Literal['a']", Literal["a"], "a"),
+    ("Callable", Callable, len),
+    ("TypedDict", _Point, {"x": 1, "y": 2}),
+    ("NewType", _UserId, 1),
+]  # type: List[Tuple[str, object, object]]
+
+
+def run() -> None:
+    for _, tp, value in CASES:
+        _checkcast_inner(tp, value, _OPTIONS)
+
+
+def main() -> None:
+    for label, tp, value in CASES:
+        timer = timeit.Timer(
+            "f(tp, value, options)",
+            globals=dict(f=_checkcast_inner, tp=tp, value=value, options=_OPTIONS),
+        )
+        (number, _) = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=number)) / number
+        print(f"{label:28} {best * 1e9:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from typing import List, Literal
+from typing import TypedDict as RichTypedDict
+from typing import Union
+
+
+class _EventHeader(RichTypedDict):
+    id: str
+    timestamp: float
+
+
+# A tagged union of many message types, each tagged by a distinct "type"
+_EVENT_TYPES = [
+    RichTypedDict(  # type: ignore[misc]  # mypy
+        f"_Event{i}",
+        {
+            "type": Literal[f"event_{i}"],  # type: ignore[misc]  # mypy
+            "header": _EventHeader,
+            "tags": List[str],
+        },
+    )
+    for i in range(64)
+]
+_Event = Union[tuple(_EVENT_TYPES)]  # type: ignore[valid-type]  # mypy
+
+_LAST_EVENT = {
+    "type": "event_63",
+    "header": {"id": "8f0c", "timestamp": 1700000000.0},
+    "tags": ["billing", "retry"],
+}
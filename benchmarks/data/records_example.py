@@ -0,0 +1,16 @@
+from typing import List, Optional
+from typing import TypedDict as RichTypedDict
+
+
+# A decoded row of an exported dataset
+class _Record(RichTypedDict):
+    id: int
+    name: str
+    tags: List[str]
+    parent_id: Optional[int]
+
+
+_RECORDS = [
+    {"id": i, "name": f"record {i}", "tags": ["a", "b"], "parent_id": i // 2 or None}
+    for i in range(1000)
+]  # type: List[object]
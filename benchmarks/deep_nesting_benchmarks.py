@@ -0,0 +1,53 @@
+"""
+Measures the cost of checking values nested more deeply than the
+recursion limit allows a recursive check to go, such as a thread of
+replies to replies that is thousands of levels deep.
+
+Usage:
+    $ python -m benchmarks.deep_nesting_benchmarks
+"""
+
+import timeit
+from typing import List, TypedDict
+
+from trycast import compile, isassignable
+
+
+class Comment(TypedDict):
+    text: str
+    replies: List["Comment"]
+
+
+def _thread(depth: int) -> Comment:
+    comment = Comment(text="first!", replies=[])
+    for _ in range(depth):
+        comment = Comment(text="reply", replies=[comment])
+    return comment
+
+
+_THREAD = _thread(5_000)
+
+
+def run() -> None:
+    isassignable(_THREAD, Comment)
+
+
+def main() -> None:
+    for depth in [100, 5_000, 100_000]:
+        value = _thread(depth)
+        for kind, f in [
+            ("isassignable", lambda value: isassignable(value, Comment)),
+            ("compiled", compile(Comment).isassignable),
+            ("codegen", compile(Comment, codegen=True).isassignable),
+        ]:
+            timer = timeit.Timer("f(value)", globals=dict(f=f, value=value))
+            (number, _) = timer.autorange()
+            best = min(timer.repeat(repeat=3, number=number)) / number
+            print(
+                f"Thread ({depth:7} levels) {kind:12} "
+                f"{best * 1e6 / depth:8.2f} us/level"
+            )
+
+
+if __name__ == "__main__":
+    main()
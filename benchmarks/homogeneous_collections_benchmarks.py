@@ -0,0 +1,79 @@
+"""
+Measures the cost of checking large collections whose elements, keys,
+and values are all builtin scalars, such as lists of IDs and maps of
+HTTP headers.
+
+Usage:
+    $ python -m benchmarks.homogeneous_collections_benchmarks
+"""
+
+import timeit
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from trycast import compile, isassignable
+
+_IDS = list(range(10_000))
+
+_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Cookie": "session=0123456789abcdef",
+    "Host": "example.com",
+    "Pragma": "no-cache",
+    "Referer": "https://example.com/",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-User": "?1",
+    "Upgrade-Insecure-Requests": "1",
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)",
+    "X-Forwarded-For": "203.0.113.7",
+    "X-Request-Id": "4f1c2a7e-8d3b-4c6e-9a1f-2b3c4d5e6f70",
+}
+
+_TAGS = frozenset(f"tag{i}" for i in range(1000))
+
+_SCORES = tuple(float(i) / 7 for i in range(10_000))
+
+# (label, type form, value)
+CASES = [
+    ("List[int] (10,000 IDs)", List[int], _IDS),
+    ("Dict[str, str] (17 headers)", Dict[str, str], _HEADERS),
+    ("FrozenSet[str] (1,000 tags)", FrozenSet[str], _TAGS),
+    ("Set[str] (1,000 tags)", Set[str], set(_TAGS)),
+    ("Tuple[float, ...] (10,000)", Tuple[float, ...], _SCORES),
+]  # type: List[Tuple[str, object, object]]
+
+
+def run() -> None:
+    for _, tp, value in CASES:
+        isassignable(value, tp)
+
+
+def main() -> None:
+    for label, tp, value in CASES:
+        validator = compile(tp)
+        for kind, timer in [
+            (
+                "isassignable",
+                timeit.Timer(
+                    "f(value, tp)", globals=dict(f=isassignable, tp=tp, value=value)
+                ),
+            ),
+            (
+                "compiled",
+                timeit.Timer(
+                    "f(value)", globals=dict(f=validator.isassignable, value=value)
+                ),
+            ),
+        ]:
+            (number, _) = timer.autorange()
+            best = min(timer.repeat(repeat=5, number=number)) / number
+            print(f"{label:30} {kind:12} {best * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
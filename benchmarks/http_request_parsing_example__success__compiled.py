@@ -0,0 +1,24 @@
+import trycast
+from benchmarks.data.http_request_parsing_example import _ProxiedHttpRequestEnvelope
+
+_validator = trycast.compile(_ProxiedHttpRequestEnvelope)
+
+
+def run() -> None:
+    _validator.trycast(
+        {
+            "request": {
+                "url": "https://example.com/api/posts",
+                "method": "GET",
+                "headers": {},
+                "content": {
+                    "type": {"family": "application/json", "value": "application/json"},
+                    "text": '{"offset": 0, "limit": 20}',
+                },
+            }
+        },
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,62 @@
+"""
+Measures the cost of checking an arbitrary JSON blob against the usual
+recursive JSON type alias, such as the "extra" field of an API request.
+
+Requires Python 3.12+, for the type statement.
+
+Usage:
+    $ python -m benchmarks.json_alias_benchmarks
+"""
+
+import json
+import timeit
+
+from trycast import compile, isassignable
+
+# NOTE: Defined with exec() so that this module still compiles
+#       on versions of Python without the type statement
+_namespace = {}  # type: dict
+exec(
+    "type JSON = None | bool | int | float | str | list[JSON] | dict[str, JSON]",
+    _namespace,
+)
+JSON = _namespace["JSON"]
+
+_EXTRA = json.loads(
+    json.dumps(
+        {
+            "items": [
+                {
+                    "id": i,
+                    "name": f"item {i}",
+                    "tags": ["a", "b"],
+                    "score": i / 3,
+                    "in_stock": i % 2 == 0,
+                    "meta": {"parent_id": None},
+                }
+                for i in range(200)
+            ],
+            "cursor": "MjAw",
+        }
+    )
+)
+
+
+def run() -> None:
+    isassignable(_EXTRA, JSON)
+
+
+def main() -> None:
+    for kind, f in [
+        ("isassignable", lambda value: isassignable(value, JSON)),
+        ("compiled", compile(JSON).isassignable),
+        ("codegen", compile(JSON, codegen=True).isassignable),
+    ]:
+        timer = timeit.Timer("f(value)", globals=dict(f=f, value=_EXTRA))
+        (number, _) = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=number)) / number
+        print(f"JSON (200 items) {kind:12} {best * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures how the throughput of trycast() scales with the number of threads
+calling it at once, which exercises trycast's internal caches from many
+threads. Throughput only scales beyond one thread on a free-threaded build
+of Python (such as python3.13t) running on a machine with several cores.
+
+Usage:
+    $ python -m benchmarks.multithreaded_throughput_benchmarks
+"""
+
+import threading
+import time
+
+from trycast import trycast
+
+_TYPE = "benchmarks.data.http_request_parsing_example._ProxiedHttpRequestEnvelope"
+
+_VALUE = {
+    "request": {
+        "url": "https://example.com/api/posts",
+        "method": "GET",
+        "headers": {},
+        "content": {
+            "type": {"family": "application/json", "value": "application/json"},
+            "text": '{"offset": 0, "limit": 20}',
+        },
+    }
+}
+
+_CALLS_PER_THREAD = 20_000
+
+_THREAD_COUNTS = [1, 2, 4, 8]
+
+
+def run() -> None:
+    trycast(_TYPE, _VALUE)
+
+
+def _run_many() -> None:
+    for _ in range(_CALLS_PER_THREAD):
+        trycast(_TYPE, _VALUE)
+
+
+def main() -> None:
+    run()  # warm caches
+    for thread_count in _THREAD_COUNTS:
+        threads = [threading.Thread(target=_run_many) for _ in range(thread_count)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duration = time.perf_counter() - start
+        calls_per_second = (thread_count * _CALLS_PER_THREAD) / duration
+        print(f"{thread_count:2} threads {calls_per_second:12,.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
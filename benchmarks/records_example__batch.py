@@ -0,0 +1,10 @@
+from benchmarks.data.records_example import _RECORDS, _Record
+from trycast import trycast_many
+
+
+def run() -> None:
+    trycast_many(_Record, _RECORDS)
+
+
+if __name__ == "__main__":
+    run()
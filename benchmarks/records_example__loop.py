@@ -0,0 +1,10 @@
+from benchmarks.data.records_example import _RECORDS, _Record
+from trycast import trycast
+
+
+def run() -> None:
+    [trycast(_Record, r) for r in _RECORDS]
+
+
+if __name__ == "__main__":
+    run()
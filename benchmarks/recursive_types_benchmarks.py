@@ -0,0 +1,65 @@
+"""
+Measures the cost of compiling and checking values against a recursive
+TypedDict, both for a wide tree and for a long chain of nodes.
+
+Usage:
+    $ python -m benchmarks.recursive_types_benchmarks
+"""
+
+import timeit
+from typing import List, TypedDict
+
+from trycast import compile
+
+
+class Node(TypedDict):
+    id: int
+    children: List["Node"]
+
+
+def _tree(depth: int, width: int) -> Node:
+    if depth == 0:
+        return Node(id=0, children=[])
+    return Node(id=depth, children=[_tree(depth - 1, width) for _ in range(width)])
+
+
+def _chain(length: int) -> Node:
+    node = Node(id=0, children=[])
+    for i in range(length):
+        node = Node(id=i, children=[node])
+    return node
+
+
+_TREE = _tree(4, 10)  # 11,111 nodes
+_CHAIN = _chain(300)
+
+
+def run() -> None:
+    compile(Node).isassignable(_TREE)
+
+
+def main() -> None:
+    for name, value in [("tree (11,111 nodes)", _TREE), ("chain (300 nodes)", _CHAIN)]:
+        for codegen in [False, True]:
+            kind = "codegen" if codegen else "compiled"
+            for when, stmt in [
+                ("first check", "compile(Node, codegen=codegen).isassignable(value)"),
+                ("later checks", "validator.isassignable(value)"),
+            ]:
+                timer = timeit.Timer(
+                    stmt,
+                    globals=dict(
+                        compile=compile,
+                        Node=Node,
+                        codegen=codegen,
+                        value=value,
+                        validator=compile(Node, codegen=codegen),
+                    ),
+                )
+                (number, _) = timer.autorange()
+                best = min(timer.repeat(repeat=5, number=number)) / number
+                print(f"{name:20} {kind:9} {when:13} {best * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measures the cost of checking values against a recursive TypedDict
+when the values contain the same objects many times or contain themselves,
+such as a chain of diamonds or an object graph loaded from an ORM,
+and when they share nothing, such as a tree parsed from JSON.
+
+Usage:
+    $ python -m benchmarks.shared_values_benchmarks
+"""
+
+import timeit
+from typing import List, TypedDict
+
+from trycast import compile, isassignable
+
+
+class Node(TypedDict):
+    id: int
+    children: List["Node"]
+
+
+class Graph(TypedDict):
+    # Refers to Node, which also refers to itself, so Node's plan is shared
+    root: Node
+
+
+class Author(TypedDict):
+    name: str
+    posts: List["Post"]
+
+
+class Post(TypedDict):
+    title: str
+    author: Author
+    replies: List["Post"]
+
+
+def _diamonds(depth: int) -> Node:
+    node = Node(id=0, children=[])
+    for i in range(depth):
+        node = Node(id=i, children=[node, node])
+    return node
+
+
+def _tree(depth: int) -> Node:
+    if depth == 0:
+        return Node(id=0, children=[])
+    return Node(id=depth, children=[_tree(depth - 1), _tree(depth - 1)])
+
+
+def _authors(author_count: int, post_count: int) -> List[Author]:
+    authors = [Author(name=f"author{i}", posts=[]) for i in range(author_count)]
+    posts = []  # type: List[Post]
+    for i in range(author_count * post_count):
+        author = authors[i % author_count]
+        post = Post(title=f"post{i}", author=author, replies=posts[-3:])
+        author["posts"].append(post)
+        posts.append(post)
+    return authors
+
+
+_DIAMONDS = Graph(root=_diamonds(16))  # 17 nodes, 2**16 paths
+_TREE = _tree(12)  # 8,191 distinct nodes
+_AUTHORS = Author(name="root", posts=[])
+_AUTHORS["posts"] = [
+    Post(title=f"pinned{i}", author=A, replies=A["posts"])
+    for (i, A) in enumerate(_authors(100, 10))
+]  # 1,100 distinct posts, each referring back to its author
+
+
+def run() -> None:
+    compile(Graph).isassignable(_DIAMONDS)
+
+
+def main() -> None:
+    for name, tp, value in [
+        ("diamonds (17 nodes)", Graph, _DIAMONDS),
+        ("authors (1,101 nodes)", Author, _AUTHORS),
+        ("tree (8,191 nodes)", Node, _TREE),
+    ]:
+        for kind, stmt in [
+            ("isassignable", "isassignable(value, tp)"),
+            ("compiled", "validator.isassignable(value)"),
+            ("codegen", "codegen_validator.isassignable(value)"),
+        ]:
+            timer = timeit.Timer(
+                stmt,
+                globals=dict(
+                    isassignable=isassignable,
+                    tp=tp,
+                    value=value,
+                    validator=compile(tp),
+                    codegen_validator=compile(tp, codegen=True),
+                ),
+            )
+            (number, _) = timer.autorange()
+            best = min(timer.repeat(repeat=5, number=number)) / number
+            print(f"{name:22} {kind:13} {best * 1e6:12.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+from benchmarks.data.event_bus_example import _LAST_EVENT, _Event
+from trycast import trycast
+
+
+def run() -> None:
+    trycast(_Event, _LAST_EVENT)
+
+
+if __name__ == "__main__":
+    run()
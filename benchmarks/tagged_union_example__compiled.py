@@ -0,0 +1,12 @@
+import trycast
+from benchmarks.data.event_bus_example import _LAST_EVENT, _Event
+
+_validator = trycast.compile(_Event)
+
+
+def run() -> None:
+    _validator.trycast(_LAST_EVENT)
+
+
+if __name__ == "__main__":
+    run()
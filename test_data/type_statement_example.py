@@ -4,3 +4,10 @@
 type FancyTuple[T1, T2] = tuple[T1, T2]  # type: ignore[valid-type, name-defined]  # mypy
 fancy_tuple1: FancyTuple[int, float] = (1, 2.0)  # type: ignore[valid-type]  # mypy
 fancy_tuple2: FancyTuple = ("hello", "world")  # type: ignore[valid-type]  # mypy
+
+type JSON = None | bool | int | float | str | list[JSON] | dict[str, JSON]  # type: ignore[valid-type, name-defined]  # mypy
+type IntTree = None | int | list[IntTree] | dict[str, IntTree]  # type: ignore[valid-type, name-defined]  # mypy
+
+type Nested = list[Nested]  # type: ignore[valid-type, name-defined]  # mypy
+type NestedForest = list[Nested]  # type: ignore[valid-type, name-defined]  # mypy
+type Loop = Loop  # type: ignore[valid-type, name-defined]  # mypy
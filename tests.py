@@ -1,14 +1,28 @@
 # flake8: noqa
+import array
+import asyncio
+import copy
 import functools
+import gc
+import itertools
 import os
+import pickle
 import platform
 import re
 import subprocess
 import sys
+import threading
 import typing
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping as CMapping
+from collections.abc import Sequence as CSequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import contextmanager
+from enum import Enum
 from importlib.abc import MetaPathFinder
 from textwrap import dedent
+from types import MappingProxyType
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -43,11 +57,21 @@ from trycast import (
     UnresolvableTypeError,
     UnresolvedForwardRefError,
     ValidationError,
+    Validator,
 )
 from trycast import __all__ as trycast_all
-from trycast import checkcast, isassignable, trycast
+from trycast import acheckcast, atrycast, checkcast, clear_caches
+from trycast import compile as trycast_compile
+from trycast import eval_type_str, isassignable, partition
+from trycast import run_in_executor as trycast_run_in_executor
+from trycast import trycast, trycast_many
 
 # Never
+try:
+    import numpy  # type: ignore[import-not-found]
+except ImportError:
+    numpy = None
+
 if sys.version_info >= (3, 11):
     from typing import Never
 
@@ -86,9 +110,13 @@ class TestTryCastModule(TestCase):
     ) -> None:
         self.assertEqual(
             {
+                "acheckcast",
+                "atrycast",
                 "checkcast",
                 "isassignable",
+                "partition",
                 "trycast",
+                "trycast_many",
             },
             set(trycast_all),
         )
@@ -108,6 +136,20 @@ class _CellClass(Generic[_T]):
         self.value = value
 
 
+# For test_classes_with_metaclasses
+class _CellSequence(CSequence):
+    def __getitem__(self, index):  # type: ignore[no-untyped-def, override]
+        raise IndexError()
+
+    def __len__(self) -> int:
+        return 0
+
+
+# For test_classes_with_metaclasses
+class _Color(Enum):
+    RED = 1
+
+
 # For test_uniontype
 class _Movie(RichTypedDict):
     name: str
@@ -119,6 +161,40 @@ class _Movie_NativeTypedDict(NativeTypedDict):
     year: int
 
 
+# For test_tagged_union
+class _Circle(RichTypedDict):
+    type: Literal["circle"]
+    radius: float
+
+
+# For test_tagged_union
+class _Rect(RichTypedDict):
+    type: Literal["rect", "square"]
+    width: float
+    height: float
+
+
+# For test_tagged_union
+class _OneTagged(RichTypedDict):
+    tag: Literal[1]
+    one: str
+
+
+# For test_tagged_union
+class _TrueTagged(RichTypedDict):
+    tag: Literal[True]
+    true: str
+
+
+# For test_tagged_union
+class _ItemsCountingDict(dict):
+    items_call_count = 0
+
+    def items(self):  # type: ignore[no-untyped-def, override]
+        self.items_call_count += 1
+        return super().items()
+
+
 # For test_typeddict_single_inheritance
 class _BookBasedMovie(_Movie):
     based_on: str
@@ -195,6 +271,16 @@ class _TypeWithOneArgConstructor:
 _R = TypeVar("_R")
 
 
+# For test_union_does_not_hash_value_without_literal_members
+class _HashFails:
+    def __init__(self) -> None:
+        self.hash_count = 0
+
+    def __hash__(self) -> int:
+        self.hash_count += 1
+        raise RuntimeError("cannot hash")
+
+
 # For test_callable_p_r
 def _count_arguments(func: Callable[[int], _R]) -> Callable[..., _R]:
     @functools.wraps(func)
@@ -878,6 +964,153 @@ class TestTryCast(TestCase):
         self.assertTryCastFailure(MutableSequence[int], object())
         self.assertTryCastFailure(MutableSequence[str], "foo")
 
+    def test_sequence_t_of_str_bytes_range_and_buffers(self) -> None:
+        # Elements of these sequences are known from their type, typecode,
+        # or format, without iterating over them
+        self.assertTryCastSuccess(Sequence[str], "x" * 100_000)
+        self.assertTryCastSuccess(Sequence[int], b"\x00" * 100_000)
+        self.assertTryCastSuccess(Sequence[float], b"\x00")
+        self.assertTryCastSuccess(Sequence[complex], b"\x00")
+        self.assertTryCastSuccess(MutableSequence[int], bytearray(b"\x00"))
+        self.assertTryCastSuccess(Sequence[int], range(100_000))
+        self.assertTryCastSuccess(MutableSequence[int], array.array("q", [1, 2]))
+        self.assertTryCastSuccess(MutableSequence[float], array.array("d", [1.5]))
+        self.assertTryCastSuccess(MutableSequence[float], array.array("i", [1]))
+        self.assertTryCastSuccess(MutableSequence[str], array.array("u", "ab"))
+        self.assertTryCastSuccess(Sequence[int], memoryview(b"\x00"))
+        self.assertTryCastSuccess(Sequence[float], memoryview(array.array("f", [1])))
+        self.assertTryCastSuccess(Sequence[bool], memoryview(b"\x01").cast("?"))
+        self.assertTryCastSuccess(Sequence[bytes], memoryview(b"ab").cast("c"))
+        self.assertTryCastSuccess(Sequence[object], b"\x00")
+
+        # Elements of the wrong type
+        self.assertTryCastFailure(Sequence[int], "foo")
+        self.assertTryCastFailure(Sequence[str], b"foo")
+        self.assertTryCastFailure(Sequence[bool], b"\x01")
+        self.assertTryCastFailure(Sequence[bytes], b"foo")
+        self.assertTryCastFailure(Sequence[str], range(1))
+        self.assertTryCastFailure(MutableSequence[int], array.array("d", [1.5]))
+        self.assertTryCastFailure(MutableSequence[int], array.array("u", "ab"))
+        self.assertTryCastFailure(Sequence[int], memoryview(array.array("d", [1])))
+
+        # Empty sequences of the wrong element type are still sequences
+        self.assertTryCastSuccess(MutableSequence[int], array.array("d"))
+
+        # Wrong kind of sequence
+        self.assertTryCastFailure(List[int], b"\x00")
+        self.assertTryCastFailure(MutableSequence[int], b"\x00")
+        self.assertTryCastFailure(MutableSequence[int], range(1))
+
+    def test_large_collections_of_scalars(self) -> None:
+        # Elements of large collections are checked in bulk
+        ints = list(range(100))  # type: List[object]
+        self.assertTryCastSuccess(List[int], ints)
+        self.assertTryCastSuccess(List[float], ints)
+        self.assertTryCastSuccess(List[object], ints)
+        self.assertTryCastSuccess(List[int], [True] * 100)
+        self.assertTryCastSuccess(List[None], [None] * 100)
+        self.assertTryCastSuccess(Set[str], {str(i) for i in range(100)})
+        self.assertTryCastSuccess(FrozenSet[int], frozenset(range(100)))
+        self.assertTryCastSuccess(Tuple[float, ...], (1.5,) * 100)
+        self.assertTryCastSuccess(Sequence[int], tuple(range(100)))
+        self.assertTryCastSuccess(Dict[str, str], {str(i): "" for i in range(100)})
+        self.assertTryCastSuccess(Dict[str, float], {str(i): i for i in range(100)})
+        self.assertTryCastSuccess(Mapping[int, bool], dict.fromkeys(range(100), True))
+
+        self.assertTryCastFailure(List[bool], ints)
+        self.assertTryCastFailure(List[str], ints)
+        self.assertTryCastFailure(List[int], ints + ["100"])
+        self.assertTryCastFailure(List[int], ints + [1.5])
+        self.assertTryCastFailure(Set[str], {str(i) for i in range(100)} | {1})
+        self.assertTryCastFailure(Tuple[int, ...], (1,) * 100 + (None,))
+        self.assertTryCastFailure(
+            Dict[str, str], {str(i): "" for i in range(100)} | {1: ""}
+        )
+        self.assertTryCastFailure(
+            Dict[str, str], {str(i): "" for i in range(100)} | {"": 1}
+        )
+
+        # Elements that merely claim to be instances are still accepted
+        class _FakeInt:
+            @property  # type: ignore[misc]
+            def __class__(self) -> type:  # type: ignore[override]
+                return int
+
+        self.assertTryCastSuccess(List[int], ints + [_FakeInt()])
+
+    def test_collection_abc_registered_after_first_check(self) -> None:
+        class Row:
+            def __getitem__(self, key: object) -> int:
+                raise IndexError()
+
+            def __len__(self) -> int:
+                return 0
+
+            def __iter__(self) -> Iterator[object]:
+                return iter([])
+
+            def items(self) -> List[Tuple[str, int]]:
+                return []
+
+            def get(self, key: str, default: object = None) -> object:
+                return default
+
+        for codegen in [None, False, True]:
+            with self.subTest(codegen=codegen):
+                # Register a fresh class in each subtest
+                ThisRow = type("Row", (Row,), {})  # type: type
+                value = ThisRow()
+
+                def check(tp: object) -> object:
+                    if codegen is None:
+                        return trycast(tp, value)
+                    else:
+                        return trycast_compile(tp, codegen=codegen).trycast(value)
+
+                self.assertIs(None, check(Sequence[int]))
+                self.assertIs(None, check(Mapping[str, int]))
+                self.assertIs(None, check(_MaybeMovie))
+
+                CSequence.register(ThisRow)  # type: ignore[attr-defined]
+                self.assertIs(value, check(Sequence[int]))
+
+                CMapping.register(ThisRow)  # type: ignore[attr-defined]
+                self.assertIs(value, check(Mapping[str, int]))
+                self.assertIs(value, check(_MaybeMovie))
+
+    def test_sequence_t_of_numpy_array(self) -> None:
+        if numpy is None:
+            self.skipTest("numpy is not installed")
+
+        # ndarrays are checked like array.tolist()
+        self.assertTryCastSuccess(Sequence[float], numpy.zeros(100_000))
+        self.assertTryCastSuccess(Sequence[float], numpy.zeros(1, dtype=numpy.float32))
+        self.assertTryCastSuccess(Sequence[float], numpy.zeros(1, dtype=numpy.int8))
+        self.assertTryCastSuccess(Sequence[int], numpy.zeros(1, dtype=numpy.uint64))
+        self.assertTryCastSuccess(Sequence[bool], numpy.zeros(1, dtype=bool))
+        self.assertTryCastSuccess(Sequence[str], numpy.array(["a", "b"]))
+        self.assertTryCastSuccess(Sequence[Sequence[float]], numpy.zeros((2, 3)))
+        self.assertTryCastSuccess(Sequence[Literal[0, 1]], numpy.array([0, 1, 1]))
+        self.assertTryCastSuccess(Sequence[Optional[float]], numpy.zeros(2))
+        self.assertTryCastSuccess(Sequence[object], numpy.array([1, "x"], dtype=object))
+        self.assertTryCastSuccess(Sequence, numpy.zeros(2))
+        self.assertTryCastSuccess(Sequence[int], numpy.zeros(0, dtype=numpy.float64))
+
+        self.assertTryCastFailure(Sequence[int], numpy.zeros(1))
+        self.assertTryCastFailure(Sequence[bool], numpy.zeros(1, dtype=numpy.int64))
+        self.assertTryCastFailure(Sequence[Sequence[int]], numpy.array([[1], [1.5]]))
+        self.assertTryCastFailure(Sequence[Literal[0, 1]], numpy.array([0, 1, 2]))
+        self.assertTryCastFailure(Sequence[Literal[0, 1]], numpy.array([0.0]))
+        self.assertTryCastFailure(Sequence[int], numpy.array([1, "x"], dtype=object))
+
+        # 0-dimensional arrays are not sequences
+        self.assertTryCastFailure(Sequence[float], numpy.zeros(()))
+        self.assertTryCastFailure(Sequence, numpy.zeros(()))
+
+        # ndarrays are not lists or mutable sequences
+        self.assertTryCastFailure(List[float], numpy.zeros(1))
+        self.assertTryCastFailure(MutableSequence[float], numpy.zeros(1))
+
     if sys.version_info >= (3, 9):
 
         def test_dict_k_v(self) -> None:
@@ -946,6 +1179,15 @@ class TestTryCast(TestCase):
             lambda: trycast(_CellClass[int], cell),
         )
 
+    def test_classes_with_metaclasses(self) -> None:
+        # ABCMeta
+        self.assertTryCastSuccess(_CellSequence, _CellSequence())
+        self.assertTryCastFailure(_CellSequence, [1])
+
+        # EnumMeta
+        self.assertTryCastSuccess(_Color, _Color.RED)
+        self.assertTryCastFailure(_Color, "red")
+
     # === TypedDicts ===
 
     def test_typeddict(self) -> None:
@@ -1465,6 +1707,83 @@ class TestTryCast(TestCase):
             self.assertTryCastSuccess(_Movie | None, None)  # type: ignore[operator]
             self.assertTryCastFailure(_Movie | None, {})  # type: ignore[operator]
 
+    def test_tagged_union(self) -> None:
+        # Union of TypedDicts tagged by a Literal key
+        Shape = Union[_Circle, _Rect]
+        self.assertTryCastSuccess(Shape, {"type": "circle", "radius": 1.0})
+        self.assertTryCastSuccess(Shape, {"type": "rect", "width": 1, "height": 2})
+        self.assertTryCastSuccess(Shape, {"type": "square", "width": 1, "height": 1})
+
+        # non-Shape
+        self.assertTryCastFailure(Shape, {"type": "circle", "width": 1, "height": 1})
+        self.assertTryCastFailure(Shape, {"type": "triangle", "radius": 1.0})
+        self.assertTryCastFailure(Shape, {"type": ["circle"], "radius": 1.0})
+        self.assertTryCastFailure(Shape, {"radius": 1.0})
+        self.assertTryCastFailure(Shape, None)
+
+        # Tagged union with an untagged member
+        self.assertTryCastNoneSuccess(Optional[Shape])
+        self.assertTryCastSuccess(Optional[Shape], {"type": "circle", "radius": 1.0})
+        self.assertTryCastFailure(Optional[Shape], {"type": "circle"})
+
+        # Tags which are equal but of different types are still distinguished
+        self.assertTryCastSuccess(
+            Union[_OneTagged, _TrueTagged], {"tag": True, "true": "yes"}
+        )
+        self.assertTryCastSuccess(
+            Union[_OneTagged, _TrueTagged], {"tag": 1, "one": "yes"}
+        )
+
+        # Only the member selected by the tag is checked
+        value = _ItemsCountingDict(type="rect", width=1, height=2)
+        self.assertTryCastSuccess(Shape, value)
+        self.assertEqual(1, value.items_call_count)
+
+    def test_union_with_members_of_many_shapes(self) -> None:
+        Member = Union[
+            None, float, Literal["all"], List[int], Sequence[str], _Circle, Set[int]
+        ]
+        self.assertTryCastNoneSuccess(Member)
+        self.assertTryCastSuccess(Member, 1)
+        self.assertTryCastSuccess(Member, True)
+        self.assertTryCastSuccess(Member, 1.5)
+        self.assertTryCastSuccess(Member, "all")
+        self.assertTryCastSuccess(Member, [1, 2])
+        self.assertTryCastSuccess(Member, ["a", "b"])
+        self.assertTryCastSuccess(Member, ("a", "b"))
+        self.assertTryCastSuccess(Member, "words")  # a Sequence[str]
+        self.assertTryCastSuccess(Member, {"type": "circle", "radius": 1.0})
+        self.assertTryCastSuccess(Member, {1, 2})
+
+        # non-Member
+        self.assertTryCastFailure(Member, 1j)
+        self.assertTryCastFailure(Member, [1, "a"])
+        self.assertTryCastFailure(Member, {"type": "rect"})
+        self.assertTryCastFailure(Member, {"a"})
+        self.assertTryCastFailure(Member, object())
+
+        # Values that merely claim to be instances of a member are still accepted
+        class _FakeInt:
+            @property  # type: ignore[misc]
+            def __class__(self) -> type:  # type: ignore[override]
+                return int
+
+        self.assertTryCastFailure(Union[str, List[int]], _FakeInt())
+        self.assertTryCastSuccess(Union[str, int], _FakeInt())
+
+        # Classes registered as a Sequence after first being checked
+        # are still accepted
+        class Row:
+            def __getitem__(self, key: object) -> int:
+                raise IndexError()
+
+            def __len__(self) -> int:
+                return 0
+
+        self.assertTryCastFailure(Union[int, Sequence[int]], Row())
+        CSequence.register(Row)  # type: ignore[attr-defined]
+        self.assertTryCastSuccess(Union[int, Sequence[int]], Row())
+
     # === Literals ===
 
     def test_literal(self) -> None:
@@ -1486,6 +1805,44 @@ class TestTryCast(TestCase):
         self.assertTryCastFailure(Literal["circle"], {1})
         self.assertTryCastFailure(Literal["circle"], object())
 
+    def test_literal_requires_same_type_as_value(self) -> None:
+        # Literal, distinguishing bool from int from float (PEP 586)
+        self.assertTryCastFailure(Literal[1], True)
+        self.assertTryCastFailure(Literal[1], 1.0)
+        self.assertTryCastFailure(Literal[True], 1)
+        self.assertTryCastFailure(Literal[0], False)
+        self.assertTryCastSuccess(Literal[1, True], True)
+        self.assertTryCastSuccess(Literal[1, True], 1)
+
+    def test_literal_with_many_values(self) -> None:
+        Code = Literal[tuple([f"C{i}" for i in range(500)])]  # type: ignore[misc, valid-type]  # mypy
+        self.assertTryCastSuccess(Code, "C0")
+        self.assertTryCastSuccess(Code, "C499")
+        self.assertTryCastFailure(Code, "C500")
+        self.assertTryCastFailure(Code, ["C0"])
+
+    def test_literals_in_union(self) -> None:
+        # Union[Literal[...], ...]
+        FlagOrCount = Union[Literal["all"], int, Literal["none", True]]
+        self.assertTryCastSuccess(FlagOrCount, "all")
+        self.assertTryCastSuccess(FlagOrCount, "none")
+        self.assertTryCastSuccess(FlagOrCount, True)
+        self.assertTryCastSuccess(FlagOrCount, 5)
+
+        # non-Union[Literal[...], ...]
+        self.assertTryCastFailure(FlagOrCount, "some")
+        self.assertTryCastFailure(FlagOrCount, [])
+
+    def test_union_does_not_hash_value_without_literal_members(self) -> None:
+        value = _HashFails()
+        self.assertTryCastSuccess(Union[int, _HashFails], value)
+        self.assertTryCastFailure(Union[int, str], value)
+        self.assertEqual(0, value.hash_count)
+
+        # Union[Literal[...], ...] with a value whose __hash__ fails
+        self.assertTryCastSuccess(Union[Literal[1], _HashFails], value)
+        self.assertTryCastFailure(Literal[1, "one"], value)
+
     # === Callables ===
 
     def test_callable(self) -> None:
@@ -1823,6 +2180,42 @@ class TestTryCast(TestCase):
                 (1, "boom"),
             )
 
+        def test_json_alias_defined_by_type_statement(self) -> None:
+            from test_data.type_statement_example import JSON, IntTree
+
+            # JSON
+            self.assertTryCastNoneSuccess(JSON)
+            self.assertTryCastSuccess(JSON, 1.5)
+            self.assertTryCastSuccess(JSON, [])
+            self.assertTryCastSuccess(
+                JSON,
+                {"a": [1, 2.5, True, None, "b", {"c": []}], "d": {"e": {}}},
+            )
+            nested = []  # type: List[object]
+            for i in range(100):
+                nested = [i, {"x": nested}]
+            self.assertTryCastSuccess(JSON, nested)
+
+            # JSON, with instances of subclasses of JSON types
+            class Color(str, Enum):
+                RED = "red"
+
+            self.assertTryCastSuccess(JSON, {"a": Color.RED})
+            self.assertTryCastSuccess(JSON, OrderedDict(a=[OrderedDict(b=1)]))
+
+            # non-JSON
+            self.assertTryCastFailure(JSON, 1j)
+            self.assertTryCastFailure(JSON, (1, 2))
+            self.assertTryCastFailure(JSON, {"a": [1, 2, object()]})
+            self.assertTryCastFailure(JSON, {"a": {1: "b"}})
+            self.assertTryCastFailure(JSON, OrderedDict(a=[OrderedDict(b=1j)]))
+            self.assertTryCastFailure(JSON, [nested, 1j])
+
+            # A JSON alias with fewer kinds of scalars
+            self.assertTryCastSuccess(IntTree, {"a": [1, True, None]})
+            self.assertTryCastFailure(IntTree, {"a": [1, 2.5]})
+            self.assertTryCastFailure(IntTree, {"a": ["b"]})
+
     # === Stringified References ===
 
     def test_stringified_reference(self) -> None:
@@ -2042,6 +2435,94 @@ class TestTryCast(TestCase):
 
     # (TODO: Add test related to NewTypes)
 
+    # === sample=N mode ===
+
+    def test_sample_checks_first_and_last_elements_of_large_collections(
+        self,
+    ) -> None:
+        cases = [
+            (List[int], lambda xs: xs),
+            (Sequence[int], tuple),
+            (Dict[int, int], lambda xs: {i: x for (i, x) in enumerate(xs)}),
+            (Mapping[str, int], lambda xs: {str(i): x for (i, x) in enumerate(xs)}),
+        ]  # type: List[Tuple[object, Callable[[List[object]], object]]]
+        for tp, make_value in cases:
+            with self.subTest(tp=tp):
+                xs = list(range(1000))  # type: List[object]
+                self.assertIsNot(None, trycast(tp, make_value(xs), sample=10))
+
+                for i in [0, 999]:
+                    bad_xs = list(xs)
+                    bad_xs[i] = "bad"
+                    self.assertIs(None, trycast(tp, make_value(bad_xs), sample=10))
+
+    def test_sample_checks_only_a_sample_of_large_collections(self) -> None:
+        xs = [1.0] * 1000  # type: List[object]
+        xs[500] = "bad"
+        self.assertIs(xs, trycast(List[float], xs, sample=10, seed=0))
+        self.assertIs(None, trycast(List[float], xs))
+
+        # Collections no larger than the sample are checked exhaustively
+        self.assertIs(None, trycast(List[float], xs, sample=1000))
+
+        # Nested collections are sampled too
+        self.assertIs(None, trycast(List[List[float]], [xs], sample=1000))
+        ys = [[1.0, "bad", 1.0]]  # type: List[List[object]]
+        self.assertIs(ys, trycast(List[List[float]], ys, sample=2))
+
+    def test_sample_with_same_seed_checks_same_elements(self) -> None:
+        xs = [1] * 1000  # type: List[object]
+        for i in range(1, 999, 3):
+            xs[i] = "bad"
+        results = {
+            seed: trycast(List[int], xs, _FAILURE, sample=5, seed=seed)
+            for seed in range(20)
+        }
+        # Different seeds check different elements...
+        self.assertIn(xs, results.values())
+        self.assertIn(_FAILURE, results.values())
+        # ...but the same seed always checks the same elements
+        for seed, result in results.items():
+            with self.subTest(seed=seed):
+                self.assertIs(
+                    result, trycast(List[int], xs, _FAILURE, sample=5, seed=seed)
+                )
+
+    def test_sample_must_be_at_least_2(self) -> None:
+        for sample in [0, 1, 2.5]:
+            with self.subTest(sample=sample):
+                self.assertRaisesRegex(
+                    ValueError,
+                    "sample must be None or an int of at least 2",
+                    lambda: trycast(List[int], [], sample=sample),  # type: ignore[call-overload]
+                )
+
+    # === Rejection ===
+
+    def test_rejecting_value_creates_no_validation_errors(self) -> None:
+        created = []  # type: List[ValidationError]
+        original_init = ValidationError.__init__
+
+        def init(self: ValidationError, *args: Any, **kwargs: Any) -> None:
+            created.append(self)
+            original_init(self, *args, **kwargs)
+
+        ValidationError.__init__ = init  # type: ignore[method-assign]  # mypy
+        try:
+            self.assertTryCastFailure(List[int], [1, "2"])
+            self.assertTryCastFailure(Dict[str, int], {"a": "1"})
+            self.assertTryCastFailure(Tuple[int, str], (1, 2))
+            self.assertTryCastFailure(Union[int, str, Literal[None]], [])
+            self.assertTryCastFailure(Callable[[Any], Any], lambda: None)
+            self.assertTryCastFailure(_Movie, {"name": "Blade Runner"})
+            self.assertTryCastFailure(
+                Optional[Union[_Circle, _Rect]], {"type": "rect", "radius": 1}
+            )
+            self.assertFalse(isassignable({"name": 1982}, _Movie))
+        finally:
+            ValidationError.__init__ = original_init  # type: ignore[method-assign]  # mypy
+        self.assertEqual([], created)
+
     # === Misuse: Nice Error Messages ===
 
     def test_tuple_of_types(self) -> None:
@@ -2517,6 +2998,50 @@ class TestCheckCast(TestCase):
             lambda: checkcast(Dict[int, str], {1: "foo", 2: 900, 3: "foo", 4: 901}),
         )
 
+    def test_large_collection_of_scalars(self) -> None:
+        # Same errors as for small collections,
+        # even though elements are first checked in bulk
+        ints = [0] * 20  # type: List[object]
+        ints[7] = "7"
+        self.assertRaisesEqual(
+            ValidationError,
+            dedent(
+                f"""\
+                Expected list[int] but found {ints!r}
+                  At index 7: Expected int but found '7'
+                """.rstrip()
+            ),
+            lambda: checkcast(List[int], ints),
+        )
+
+        headers = {f"h{i}": "" for i in range(20)}  # type: Dict[str, object]
+        headers["h7"] = 7
+        self.assertRaisesEqual(
+            ValidationError,
+            dedent(
+                f"""\
+                Expected dict[str, str] but found {headers!r}
+                  At key 'h7': Expected str but found 7
+                """.rstrip()
+            ),
+            lambda: checkcast(Dict[str, str], headers),
+        )
+
+    def test_sequence_t_of_numpy_array(self) -> None:
+        if numpy is None:
+            self.skipTest("numpy is not installed")
+        value = numpy.array([0, 1, 2])
+        self.assertRaisesEqual(
+            ValidationError,
+            dedent(
+                """\
+                Expected Sequence[Literal[0, 1]] but found array([0, 1, 2])
+                  At index 2: Expected Literal[0, 1] but found 2
+                """.rstrip()
+            ),
+            lambda: checkcast(Sequence[Literal[0, 1]], value),
+        )
+
     # === TypedDicts ===
 
     def test_typeddict(self) -> None:
@@ -2693,6 +3218,69 @@ class TestCheckCast(TestCase):
             )
             checkcast(int | str, "words")
 
+    if sys.version_info >= (3, 12):
+
+        def test_json_alias_defined_by_type_statement(self) -> None:
+            from test_data.type_statement_example import IntTree
+
+            self.assertRaisesEqual(
+                ValidationError,
+                dedent(
+                    """\
+                    Expected NoneType | int | list[IntTree] | dict[str, IntTree] but found [1, 2.5]
+                      Expected NoneType but found [1, 2.5]
+                      Expected int but found [1, 2.5]
+                      Expected list[IntTree] but found [1, 2.5]
+                        At index 1: Expected NoneType | int | list[IntTree] | dict[str, IntTree] but found 2.5
+                          Expected NoneType but found 2.5
+                          Expected int but found 2.5
+                          Expected list[IntTree] but found 2.5
+                          Expected dict[str, IntTree] but found 2.5
+                      Expected dict[str, IntTree] but found [1, 2.5]
+                    """.rstrip()
+                ),
+                lambda: checkcast(IntTree, [1, 2.5]),
+            )
+            checkcast(IntTree, {"a": [1, None]})
+
+    def test_tagged_union(self) -> None:
+        # NOTE: Causes are reported for all members, not only the tagged one
+        self.assertRaisesEqual(
+            ValidationError,
+            dedent(
+                """\
+                Expected Union[_Circle, _Rect] but found {'type': 'rect', 'width': 1}
+                  Expected _Circle but found {'type': 'rect', 'width': 1}
+                    At key 'type': Expected Literal['circle'] but found 'rect'
+                  Expected _Rect but found {'type': 'rect', 'width': 1}
+                    Required key 'height' is missing
+                """.rstrip()
+            ),
+            lambda: checkcast(Union[_Circle, _Rect], {"type": "rect", "width": 1}),
+        )
+        checkcast(Union[_Circle, _Rect], {"type": "circle", "radius": 1})
+
+    def test_union_with_members_of_many_shapes(self) -> None:
+        # NOTE: Causes are reported for all members, even those which
+        #       could never match the type of the value
+        self.assertRaisesEqual(
+            ValidationError,
+            self._typing_error_messages(
+                dedent(
+                    """\
+                    Expected Union[NoneType, list[int], _Circle, int] but found 'x'
+                      Expected NoneType but found 'x'
+                      Expected list[int] but found 'x'
+                      Expected _Circle but found 'x'
+                      Expected int but found 'x'
+                    """.rstrip()
+                )
+            ),
+            lambda: checkcast(Union[None, List[int], _Circle, int], "x"),
+        )
+        checkcast(Union[None, List[int], _Circle, int], None)
+        checkcast(Union[None, List[int], _Circle, int], [1])
+
     # === Literals ===
 
     def test_literal(self) -> None:
@@ -2854,6 +3442,50 @@ class TestCheckCast(TestCase):
             ),
         )
 
+    # === sample=N mode ===
+
+    def test_sample_reports_seed_of_sample(self) -> None:
+        xs = [1, 2, 3, 4, "bad"]  # type: List[object]
+        self.assertRaisesEqual(
+            ValidationError,
+            dedent(
+                """\
+                Expected list[int] but found [1, 2, 3, 4, 'bad']
+                  At index 4: Expected int but found 'bad'
+                  Checked a sample of 3 of 5 elements, chosen with seed=7
+                """.rstrip()
+            ),
+            lambda: checkcast(List[int], xs, sample=3, seed=7),
+        )
+
+        d = {"a": 1, "b": 2, "c": 3, "d": "bad"}  # type: Dict[str, object]
+        self.assertRaisesEqual(
+            ValidationError,
+            dedent(
+                """\
+                Expected dict[str, int] but found {'a': 1, 'b': 2, 'c': 3, 'd': 'bad'}
+                  At key 'd': Expected int but found 'bad'
+                  Checked a sample of 2 of 4 items, chosen with seed=7
+                """.rstrip()
+            ),
+            lambda: checkcast(Dict[str, int], d, sample=2, seed=7),
+        )
+
+    def test_sample_without_seed_reports_random_seed(self) -> None:
+        xs = [1] * 10  # type: List[object]
+        xs[0] = "bad"
+        try:
+            checkcast(List[int], xs, sample=2)
+        except ValidationError as e:
+            seed = int(str(e).rsplit("seed=", 1)[1])
+        else:
+            self.fail("Expected ValidationError")
+
+        # Same seed reproduces same error
+        with self.assertRaises(ValidationError) as cm:
+            checkcast(List[int], xs, sample=2, seed=seed)
+        self.assertIn(f"seed={seed}", str(cm.exception))
+
     # === Misc ===
 
     def test_checkcast_returns_value_of_correct_type(self) -> None:
@@ -2943,6 +3575,47 @@ class TestValidationError(TestCase):
     def test_validation_error_is_value_error(self) -> None:
         self.assertTrue(issubclass(ValidationError, ValueError))
 
+    def test_validation_error_can_be_pickled(self) -> None:
+        with self.assertRaises(ValidationError) as cm:
+            checkcast(List[_Movie], [{"name": "Alien"}, {}])
+        e = cm.exception
+        unpickled_e = pickle.loads(pickle.dumps(e))
+        self.assertIsInstance(unpickled_e, ValidationError)
+        self.assertEqual(str(e), str(unpickled_e))
+
+    def test_validation_error_keeps_type_value_and_causes_when_pickled(
+        self,
+    ) -> None:
+        with self.assertRaises(ValidationError) as cm:
+            checkcast(List[int], [1, "two"])
+        e = cm.exception
+        unpickled_e = pickle.loads(pickle.dumps(e))
+        self.assertEqual(str(e), str(unpickled_e))
+        self.assertEqual(List[int], unpickled_e._tp)
+        self.assertEqual([1, "two"], unpickled_e._value)
+        self.assertEqual(
+            [str(c) for c in e._causes], [str(c) for c in unpickled_e._causes]
+        )
+
+    def test_validation_error_keeps_type_value_and_causes_when_copied(
+        self,
+    ) -> None:
+        class LocalMovie(RichTypedDict):
+            name: str
+
+        with self.assertRaises(ValidationError) as cm:
+            checkcast(List[LocalMovie], [{"name": "Alien"}, {}])
+        e = cm.exception
+        for copied_e in [copy.copy(e), copy.deepcopy(e)]:
+            self.assertIsInstance(copied_e, ValidationError)
+            self.assertEqual(str(e), str(copied_e))
+            self.assertIs(e._tp, copied_e._tp)
+            self.assertEqual(e._value, copied_e._value)
+            self.assertEqual(len(e._causes), len(copied_e._causes))
+            self.assertEqual(
+                [str(c) for c in e._causes], [str(c) for c in copied_e._causes]
+            )
+
 
 # ------------------------------------------------------------------------------
 # API: TestIsAssignable
@@ -3004,6 +3677,1072 @@ class TestIsAssignable(TestCase):
     #    raise ValueError("expected this code to be unreachable")
 
 
+# ------------------------------------------------------------------------------
+# API: TestCompile
+
+
+# For test_codegen_supports_recursive_typeddict
+class _TreeNode(RichTypedDict):
+    value: int
+    children: List["_TreeNode"]
+
+
+# For test_typeddict_annotations_are_resolved_when_first_checked
+class _Comment(RichTypedDict):
+    text: str
+    author: "_CommentAuthor"
+
+
+class TestCompile(TestCase):
+    """
+    Tests whether Validators created by compile() behave the same as
+    the trycast(), checkcast(), and isassignable() functions.
+    """
+
+    def test_validator_accepts_and_rejects_same_values_as_trycast(self) -> None:
+        cases = [
+            (int, [1, True, 1.5, "1"]),
+            (float, [1, 1.5, True, 1j, "1.5"]),
+            (complex, [1, 1.5, 1j, "1j"]),
+            (str, ["words", 1, None]),
+            (None, [None, 0]),
+            (List[int], [[], [1, 2], [1, "2"], (1, 2), None]),
+            (List[_T], [[], [1, "2"], None]),  # type: ignore[valid-type]
+            (Set[str], [set(), {"a"}, {1}, ["a"]]),
+            (FrozenSet[str], [frozenset(), frozenset({"a"}), {"a"}]),
+            (Tuple[int, ...], [(), (1, 2), (1, "2"), [1]]),
+            (Tuple[int, str], [(1, "a"), (1, 2), (1,), (1, "a", None)]),
+            (Sequence[int], [[1], (1,), "1", {1}]),
+            (MutableSequence[int], [[1], (1,)]),
+            (
+                Sequence[int],
+                [b"1", range(2), array.array("i"), array.array("d", [1.5]), "1"],
+            ),
+            (Sequence[float], [b"1", array.array("d"), memoryview(b"1"), "1"]),
+            (Sequence[str], ["abc", b"abc", array.array("u", "a")]),
+            (List[int], [list(range(20)), list(range(20)) + ["20"]]),
+            (Set[str], [set("abcdefghijklmnopqrstuvwxyz"), set(range(20))]),
+            (
+                Dict[str, str],
+                [
+                    dict.fromkeys("abcdefghijklmnopqrstuvwxyz", ""),
+                    cast(object, dict.fromkeys("abcdefghijklmnopqrstuvwxyz", 1)),
+                ],
+            ),
+            *(
+                [
+                    (
+                        Sequence[Sequence[float]],
+                        [numpy.zeros((2, 2)), numpy.array([["x"]]), numpy.zeros(2)],
+                    ),
+                    (
+                        Sequence[Literal[0, 1]],
+                        [numpy.array([0, 1]), numpy.array([2]), numpy.array([0.0])],
+                    ),
+                    (Sequence, [numpy.zeros(1), numpy.zeros(())]),
+                ]
+                if numpy is not None
+                else []
+            ),
+            (Dict[str, int], [{}, {"a": 1}, {"a": "1"}, {1: 1}, []]),
+            (List[Any], [[], [1, "a"], (1,)]),
+            (Sequence[Any], [[1], (1, "a"), {1}]),
+            (Set[Any], [{1, "a"}, [1]]),
+            (Tuple[Any, ...], [(), (1, "a"), [1]]),
+            (MutableSequence[Any], [[1], (1,)]),
+            (Sequence[Sequence[Any]], [[[1], ("a",)], [1]]),
+            (Union[int, List[Any]], [1, [1, "a"], "a"]),
+            (Dict[Any, Any], [{1: "a"}, []]),
+            (Dict[Any, int], [{"a": 1}, {"a": "1"}]),
+            (Dict[str, Any], [{"a": 1}, {1: "a"}]),
+            (Mapping[str, int], [{"a": 1}, {"a": "1"}]),
+            (MutableMapping[str, int], [{"a": 1}, {"a": "1"}]),
+            (Optional[str], [None, "a", 1]),
+            (Union[int, str], [1, "a", None]),
+            (Literal["circle", 1], ["circle", 1, "square", 2, True]),
+            (Literal[True], [True, 1, False]),
+            (
+                Union[Literal["all"], int, Literal["none", True]],
+                ["all", "none", True, False, 5, "some", []],
+            ),
+            (Callable, [len, 1]),
+            (Callable[[Any], Any], [len, lambda: None, 1]),
+            (Any, [1, None]),
+            (NoReturn, [1, None]),
+            (_Movie, [{"name": "Blade Runner", "year": 1982}, {"name": "?"}, []]),
+            (_XYZ, [{"x": 1, "y": "y", "z": True}, {"x": 1, "y": "y", "z": "z"}]),
+            (
+                Optional[Union[_Circle, _Rect]],
+                [
+                    None,
+                    {"type": "circle", "radius": 1},
+                    {"type": "square", "width": 1, "height": 1},
+                    {"type": "circle", "width": 1, "height": 1},
+                    {"type": "triangle"},
+                    {"type": ["circle"]},
+                    {},
+                    1,
+                ],
+            ),
+            (
+                Union[_OneTagged, _TrueTagged],
+                [{"tag": True, "true": "y"}, {"tag": 1, "one": "y"}, {"tag": 1}],
+            ),
+        ]  # type: List[Tuple[object, List[object]]]
+        for codegen in [False, True]:
+            for tp, values in cases:
+                validator = trycast_compile(tp, codegen=codegen)
+                for value in values:
+                    with self.subTest(tp=tp, value=value, codegen=codegen):
+                        self.assertIs(trycast(tp, value), validator.trycast(value))
+                        self.assertIs(
+                            isassignable(value, tp), validator.isassignable(value)
+                        )
+
+    def test_validator_raises_same_validation_errors_as_checkcast(self) -> None:
+        cases = [
+            (Optional[str], 1),
+            (Dict[str, int], {"a": 1, 2: 2}),
+            (Dict[str, int], {"a": 1, "b": "2"}),
+            (List[Tuple[int, str]], [(1, "a"), (1, 2)]),
+            (Union[_Circle, _Rect], {"type": "rect", "width": 1}),
+            (Union[Literal["all"], str, Literal["none"]], 1),
+            (Union[None, List[int], _Circle, int], "x"),
+            (Union[None, List[int], _Circle, int], [1, "x"]),
+            (
+                _ProxiedHttpRequestEnvelope,
+                {
+                    "request": {
+                        "url": "https://example.com/api/posts",
+                        "method": "GET",
+                        "headers": {},
+                        "content": {
+                            "type": {"value": "application/json"},
+                            "text": '{"offset": 0, "limit": 20}',
+                        },
+                    }
+                },
+            ),
+        ]  # type: List[Tuple[object, object]]
+        for codegen in [False, True]:
+            for tp, value in cases:
+                with self.subTest(tp=tp, codegen=codegen):
+                    with self.assertRaises(ValidationError) as expected:
+                        checkcast(tp, value)
+                    with self.assertRaises(ValidationError) as actual:
+                        trycast_compile(tp, codegen=codegen).checkcast(value)
+                    self.assertEqual(str(expected.exception), str(actual.exception))
+
+    def test_validator_returns_value_or_failure(self) -> None:
+        validator = trycast_compile(List[int])
+        self.assertIsInstance(validator, Validator)
+        value = [1, 2]
+        self.assertIs(value, validator.trycast(value))
+        self.assertIs(value, validator.checkcast(value))
+        self.assertIs(None, validator.trycast(["1"]))
+        self.assertIs(_FAILURE, validator.trycast(["1"], _FAILURE))
+
+    def test_can_compile_stringified_reference(self) -> None:
+        validator = trycast_compile("test_data.forwardrefs_example.Shape")
+        self.assertTrue(
+            validator.isassignable(
+                dict(type="circle", center=dict(x=50, y=50), radius=25)
+            )
+        )
+        self.assertRaisesRegex(
+            UnresolvableTypeError,
+            "compile\\(\\) was called with eval=False",
+            lambda: trycast_compile("typing.List[int]", eval=False),  # type: ignore[call-overload]
+        )
+
+    def test_unsupported_types_are_reported_when_compiled(self) -> None:
+        _T = TypeVar("_T")
+        self.assertRaisesRegex(
+            TypeNotSupportedError,
+            "compile cannot reliably determine whether value matches a TypeVar",
+            lambda: trycast_compile(Union[int, Tuple[_T, _T]]),  # type: ignore[reportGeneralTypeIssues]  # pyright
+        )
+        self.assertRaisesRegex(
+            TypeNotSupportedError,
+            "compile cannot reliably determine whether value is a NewType",
+            lambda: trycast_compile(List[_Url]),
+        )
+        self.assertIs(
+            "http://example.com",
+            trycast_compile(_Url, strict=False).trycast("http://example.com"),
+        )
+        self.assertRaisesRegex(
+            UnresolvedForwardRefError,
+            "contains a string-based forward reference",
+            lambda: trycast_compile(test_data.forwardrefs_example.Shape),
+        )
+
+    def test_codegen_exposes_generated_source(self) -> None:
+        self.assertIs(None, trycast_compile(_Movie).source)
+
+        validator = trycast_compile(_Movie, codegen=True)
+        source = validator.source
+        assert source is not None
+        self.assertIn("'name'", source)
+        self.assertIn("'year'", source)
+
+    def test_codegen_supports_recursive_typeddict(self) -> None:
+        validator = trycast_compile(_TreeNode, codegen=True)
+        leaf = {"value": 2, "children": []}
+        self.assertTrue(validator.isassignable({"value": 1, "children": [leaf]}))
+        self.assertFalse(
+            validator.isassignable({"value": 1, "children": [{"value": 2}]})
+        )
+
+    def test_codegen_supports_deeply_nested_types(self) -> None:
+        tp = int  # type: object
+        value = 1  # type: object
+        for _ in range(50):
+            tp = List[tp]  # type: ignore[valid-type]
+            value = [value]
+        validator = trycast_compile(tp, codegen=True)
+        self.assertTrue(validator.isassignable(value))
+        self.assertFalse(validator.isassignable([value]))
+
+    def test_executor_checks_large_collections_in_chunks(self) -> None:
+        big_list = [{"name": "Blade Runner", "year": 1982}] * 100_000
+        big_dict = {str(i): i for i in range(50_000)}
+        with _CountingExecutor(ThreadPoolExecutor(2)) as executor:
+            for codegen in [False, True]:
+                with self.subTest(codegen=codegen):
+                    list_validator = trycast_compile(
+                        List[_Movie], codegen=codegen, executor=executor
+                    )
+                    self.assertIs(big_list, list_validator.trycast(big_list))
+                    self.assertFalse(list_validator.isassignable(tuple(big_list)))
+
+                    dict_validator = trycast_compile(
+                        Dict[str, int], codegen=codegen, executor=executor
+                    )
+                    self.assertIs(big_dict, dict_validator.checkcast(big_dict))
+            self.assertGreater(executor.submit_count, 0)
+
+            # Small values are checked in the calling thread
+            executor.submit_count = 0
+            self.assertTrue(
+                trycast_compile(List[int], executor=executor).isassignable([1, 2])
+            )
+            self.assertEqual(0, executor.submit_count)
+
+    def test_executor_reports_same_validation_error_as_checkcast(self) -> None:
+        bad_list = list(range(100_000))  # type: List[object]
+        bad_list[99_000] = "two"
+        bad_list[70_000] = "one"
+        bad_key_dict = {i: i for i in range(50_000)}  # type: Dict[object, object]
+        bad_key_dict["one"] = 1
+        bad_value_dict = {i: i for i in range(50_000)}  # type: Dict[object, object]
+        bad_value_dict[45_000] = "one"
+        cases = [
+            (List[int], bad_list),
+            (Sequence[int], tuple(bad_list)),
+            (Dict[int, int], bad_key_dict),
+            (Mapping[int, int], bad_value_dict),
+        ]  # type: List[Tuple[object, object]]
+        for executor_type in [ThreadPoolExecutor, ProcessPoolExecutor]:
+            with executor_type(2) as executor:
+                for tp, value in cases:
+                    with self.subTest(executor=executor_type.__name__, tp=tp):
+                        validator = trycast_compile(tp, executor=executor)
+                        self.assertIs(None, validator.trycast(value))
+                        with self.assertRaises(ValidationError) as expected:
+                            checkcast(tp, value)
+                        with self.assertRaises(ValidationError) as actual:
+                            validator.checkcast(value)
+                        self.assertEqual(str(expected.exception), str(actual.exception))
+
+    def test_executor_with_process_workers_cannot_check_locally_defined_type(
+        self,
+    ) -> None:
+        class LocalMovie(RichTypedDict):
+            name: str
+
+        big_list = [{"name": "Alien"}] * 100_000
+        with ThreadPoolExecutor(2) as thread_executor:
+            validator = trycast_compile(List[LocalMovie], executor=thread_executor)
+            self.assertIs(big_list, validator.trycast(big_list))
+        with ProcessPoolExecutor(1) as process_executor:
+            validator = trycast_compile(List[LocalMovie], executor=process_executor)
+            self.assertRaisesRegex(
+                TypeError,
+                "cannot send type .*LocalMovie.* to a worker "
+                "in another process because it cannot be pickled",
+                lambda: validator.trycast(big_list),
+            )
+
+    def test_typeddict_annotations_are_resolved_when_first_checked(self) -> None:
+        validator = trycast_compile(_Comment)  # refers to _CommentAuthor, defined later
+        self.assertTrue(
+            validator.isassignable({"text": "Hi", "author": {"name": "Alice"}})
+        )
+        self.assertFalse(validator.isassignable({"text": "Hi", "author": {}}))
+
+    if sys.version_info >= (3, 12):
+
+        def test_json_alias_is_checked_the_same_as_by_trycast(self) -> None:
+            from test_data.type_statement_example import JSON, IntTree
+
+            values = [
+                None,
+                {"a": [1, 2.5, True, None, "b", {"c": []}]},
+                OrderedDict(a=[1]),
+                {"a": [1, {"b": 1j}]},
+                {"a": {1: "b"}},
+                [1, 2.5],
+            ]  # type: List[object]
+            for codegen in [False, True]:
+                for tp in [JSON, IntTree]:
+                    validator = trycast_compile(tp, codegen=codegen)
+                    for value in values:
+                        with self.subTest(tp=tp, value=value, codegen=codegen):
+                            self.assertIs(trycast(tp, value), validator.trycast(value))
+                            try:
+                                checkcast(tp, value)
+                            except ValidationError as expected:
+                                with self.assertRaises(ValidationError) as actual:
+                                    validator.checkcast(value)
+                                self.assertEqual(str(expected), str(actual.exception))
+
+    def test_recursive_typeddict_refers_back_to_its_own_plan(self) -> None:
+        validator = trycast_compile(_TreeNode)
+        self.assertTrue(
+            validator.isassignable(
+                {
+                    "value": 1,
+                    "children": [
+                        {"value": i, "children": [{"value": j, "children": []}]}
+                        for i in range(100)
+                        for j in range(50)
+                    ],
+                }
+            )
+        )
+        plan = validator._plan
+        self.assertIs(plan, plan._resolved_field_plans()["children"]._element_plan)  # type: ignore[attr-defined]
+
+    if sys.version_info >= (3, 12):
+
+        def test_recursive_alias_refers_back_to_its_own_plan(self) -> None:
+            from test_data.type_statement_example import Nested
+
+            for codegen in [False, True]:
+                with self.subTest(codegen=codegen):
+                    validator = trycast_compile(Nested, codegen=codegen)
+                    self.assertTrue(validator.isassignable([[], [[], [[]]]]))
+                    self.assertFalse(validator.isassignable([[], [[1]]]))
+                    plan = validator._plan
+                    self.assertIs(plan, plan._resolved_plan()._element_plan)  # type: ignore[attr-defined]
+
+        def test_alias_defined_only_in_terms_of_itself_is_not_supported(
+            self,
+        ) -> None:
+            from test_data.type_statement_example import Loop
+
+            with self.assertRaises(TypeNotSupportedError):
+                trycast(Loop, 1)
+            with self.assertRaises(TypeNotSupportedError):
+                trycast_compile(Loop).trycast(1)
+            with self.assertRaises(TypeNotSupportedError):
+                trycast_compile(Loop, codegen=True)
+
+    def test_typeddict_is_checked_the_same_with_any_order_of_keys(self) -> None:
+        values = []  # type: List[object]
+        for keys in itertools.permutations(["type", "width", "height", "extra"]):
+            values.append({k: "rect" if k == "type" else 1 for k in keys})
+            values.append({k: "rect" if k == "type" else 1 for k in keys[1:]})
+            values.append({k: "rect" if k == "type" else "1" for k in keys[1:]})
+        # More orders of keys than a validator remembers
+        for i in range(200):
+            values.append({f"extra{i}": i, "type": "rect", "width": 1, "height": 2})
+        values.append(MappingProxyType({"type": "rect", "width": 1, "height": 2}))
+        values.append(MappingProxyType({"type": "rect", "width": "1"}))
+        for codegen in [False, True]:
+            validator = trycast_compile(_Rect, codegen=codegen)
+            for value in values:
+                with self.subTest(value=value, codegen=codegen):
+                    self.assertIs(trycast(_Rect, value), validator.trycast(value))
+                    self.assertIs(
+                        isassignable(value, _Rect), validator.isassignable(value)
+                    )
+                    try:
+                        checkcast(_Rect, value)
+                    except ValidationError as expected:
+                        with self.assertRaises(ValidationError) as actual:
+                            validator.checkcast(value)
+                        self.assertEqual(str(expected), str(actual.exception))
+
+
+# For test_typeddict_annotations_are_resolved_when_first_checked
+class _CommentAuthor(RichTypedDict):
+    name: str
+
+
+# For test_executor_checks_large_collections_in_chunks
+class _CountingExecutor(Executor):
+    def __init__(self, base: Executor) -> None:
+        self._base = base
+        self.submit_count = 0
+
+    def submit(self, fn, /, *args, **kwargs):  # type: ignore[no-untyped-def, override]
+        self.submit_count += 1
+        return self._base.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._base.shutdown(wait, cancel_futures=cancel_futures)
+
+
+# ------------------------------------------------------------------------------
+# API: TestBatch
+
+
+class TestBatch(TestCase):
+    """
+    Tests trycast_many() and partition(), which check many values at once.
+    """
+
+    def test_trycast_many_returns_same_results_as_trycast(self) -> None:
+        values = [[1], ["1"], [], None, [True]]  # type: List[object]
+        self.assertEqual(
+            [trycast(List[int], v) for v in values],
+            trycast_many(List[int], values),
+        )
+        self.assertEqual(
+            [trycast(List[int], v, _FAILURE) for v in values],
+            trycast_many(List[int], values, _FAILURE),
+        )
+        self.assertEqual([], trycast_many(int, []))
+
+    def test_trycast_many_accepts_any_iterable(self) -> None:
+        self.assertEqual([1, None, 3], trycast_many(int, iter([1, "2", 3])))
+        self.assertEqual([0, 1, 2], trycast_many(int, (i for i in range(3))))
+
+    def test_partition_splits_valid_values_from_invalid_values(self) -> None:
+        movie = {"name": "Blade Runner", "year": 1982}
+        bad_movie = {"name": "Blade Runner"}
+        (valid, invalid) = partition(_Movie, [movie, 1, bad_movie, movie])
+        self.assertEqual([movie, movie], valid)
+        self.assertEqual([1, bad_movie], [value for (value, _) in invalid])
+        for value, e in invalid:
+            with self.subTest(value=value):
+                self.assertIsInstance(e, ValidationError)
+                with self.assertRaises(ValidationError) as expected:
+                    checkcast(_Movie, value)
+                self.assertEqual(str(expected.exception), str(e))
+
+    def test_partition_with_no_values(self) -> None:
+        self.assertEqual(([], []), partition(int, []))
+
+    def test_validator_partition_with_codegen(self) -> None:
+        validator = trycast_compile(Dict[str, int], codegen=True)
+        (valid, invalid) = validator.partition([{"a": 1}, {"a": "1"}])
+        self.assertEqual([{"a": 1}], valid)
+        self.assertEqual([{"a": "1"}], [value for (value, _) in invalid])
+        with self.assertRaises(ValidationError) as expected:
+            checkcast(Dict[str, int], {"a": "1"})
+        self.assertEqual(str(expected.exception), str(invalid[0][1]))
+
+        self.assertEqual([{"a": 1}, None], validator.trycast_many([{"a": 1}, []]))
+
+    def test_executor_checks_many_values_in_chunks(self) -> None:
+        movie = {"name": "Blade Runner", "year": 1982}
+        values = [
+            movie if i % 997 != 0 else {"name": "?", "year": i} if i % 2 else {}
+            for i in range(5000)
+        ]  # type: List[object]
+        (expected_valid, expected_invalid) = partition(_Movie, values)
+        for executor_type in [ThreadPoolExecutor, ProcessPoolExecutor]:
+            with executor_type(2) as executor:
+                with self.subTest(executor=executor_type.__name__):
+                    self.assertEqual(
+                        trycast_many(_Movie, values, _FAILURE),
+                        trycast_many(_Movie, values, _FAILURE, executor=executor),
+                    )
+                    (valid, invalid) = partition(
+                        _Movie, iter(values), executor=executor
+                    )
+                    self.assertEqual(expected_valid, valid)
+                    self.assertEqual(
+                        [(v, str(e)) for (v, e) in expected_invalid],
+                        [(v, str(e)) for (v, e) in invalid],
+                    )
+
+    def test_executor_is_not_used_for_few_values(self) -> None:
+        with _CountingExecutor(ThreadPoolExecutor(1)) as executor:
+            self.assertEqual([1, None], trycast_many(int, [1, "2"], executor=executor))
+            self.assertEqual(0, executor.submit_count)
+
+    def test_can_check_stringified_reference(self) -> None:
+        self.assertEqual([1, None], trycast_many("typing.Optional[int]", [1, "1"]))
+        self.assertRaisesRegex(
+            UnresolvableTypeError,
+            "trycast_many\\(\\) was called with eval=False",
+            lambda: trycast_many("typing.List[int]", [], eval=False),  # type: ignore[call-overload]
+        )
+        self.assertRaisesRegex(
+            UnresolvableTypeError,
+            "partition\\(\\) was called with eval=False",
+            lambda: partition("typing.List[int]", [], eval=False),  # type: ignore[call-overload]
+        )
+
+    def test_unsupported_types_are_reported_before_checking_values(self) -> None:
+        self.assertRaisesRegex(
+            TypeNotSupportedError,
+            "trycast_many cannot reliably determine whether value is a NewType",
+            lambda: trycast_many(List[_Url], []),
+        )
+        self.assertRaisesRegex(
+            UnresolvedForwardRefError,
+            "partition does not support checking against type form",
+            lambda: partition(test_data.forwardrefs_example.Shape, []),
+        )
+
+
+# ------------------------------------------------------------------------------
+# API: TestAsync
+
+
+class TestAsync(TestCase):
+    """
+    Tests atrycast() and acheckcast(), which yield to the event loop
+    while checking large values.
+    """
+
+    def test_atrycast_accepts_and_rejects_same_values_as_trycast(self) -> None:
+        movie = {"name": "Blade Runner", "year": 1982}
+        cases = [
+            (int, [1, "1"]),
+            (List[int], [[1, 2], [1, "2"], (1, 2)]),
+            (Tuple[int, ...], [(1, 2), (1, "2")]),
+            (Dict[str, List[int]], [{"a": [1]}, {"a": ["1"]}, {1: [1]}, []]),
+            (List[_Movie], [[movie, movie], [movie, {"name": "?"}]]),
+            (_TreeNode, [{"value": 1, "children": [{"value": 2, "children": []}]}]),
+            (Optional[List[int]], [None, [1], ["1"]]),
+        ]  # type: List[Tuple[object, List[object]]]
+        for tp, values in cases:
+            for value in values:
+                with self.subTest(tp=tp, value=value):
+                    self.assertIs(
+                        trycast(tp, value, _FAILURE),
+                        asyncio.run(atrycast(tp, value, _FAILURE)),
+                    )
+
+    def test_acheckcast_raises_same_validation_errors_as_checkcast(self) -> None:
+        cases = [
+            (List[int], [1, 2, "3"]),
+            (Dict[str, int], {"a": 1, 2: 2}),
+            (Dict[str, List[int]], {"a": [1], "b": [1, "2"]}),
+            (List[_Movie], [{"name": "Blade Runner", "year": 1982}, {"name": "?"}]),
+            (_TreeNode, {"value": 1, "children": [{"value": "2", "children": []}]}),
+        ]  # type: List[Tuple[object, object]]
+        for tp, value in cases:
+            with self.subTest(tp=tp):
+                with self.assertRaises(ValidationError) as expected:
+                    checkcast(tp, value)
+                with self.assertRaises(ValidationError) as actual:
+                    asyncio.run(acheckcast(tp, value, chunk_size=1))
+                self.assertEqual(str(expected.exception), str(actual.exception))
+
+    def test_yields_to_event_loop_after_every_chunk_of_elements(self) -> None:
+        value = [[i] for i in range(1000)]
+
+        async def check_while_counting_yields(chunk_size: int) -> int:
+            yield_count = 0
+
+            async def count_yields() -> None:
+                nonlocal yield_count
+                while True:
+                    await asyncio.sleep(0)
+                    yield_count += 1
+
+            counter = asyncio.ensure_future(count_yields())
+            await asyncio.sleep(0)  # start counter
+            yield_count = 0
+            self.assertIs(
+                value,
+                await acheckcast(List[List[int]], value, chunk_size=chunk_size),
+            )
+            counter.cancel()
+            return yield_count
+
+        # 1000 outer elements + 1000 inner elements
+        self.assertEqual(20, asyncio.run(check_while_counting_yields(100)))
+        self.assertEqual(0, asyncio.run(check_while_counting_yields(10_000)))
+        self.assertRaisesRegex(
+            ValueError,
+            "chunk_size must be at least 1",
+            lambda: asyncio.run(acheckcast(List[int], [], chunk_size=0)),
+        )
+
+    def test_validator_async_methods(self) -> None:
+        validator = trycast_compile(List[int])
+        self.assertEqual([1], asyncio.run(validator.acheckcast([1])))
+        self.assertIs(None, asyncio.run(validator.atrycast(["1"])))
+        self.assertIs(_FAILURE, asyncio.run(validator.atrycast(["1"], _FAILURE)))
+
+    def test_can_check_stringified_reference(self) -> None:
+        self.assertEqual([1], asyncio.run(acheckcast("typing.List[int]", [1])))
+        self.assertRaisesRegex(
+            UnresolvableTypeError,
+            "atrycast\\(\\) was called with eval=False",
+            lambda: asyncio.run(atrycast("typing.List[int]", [], eval=False)),  # type: ignore[call-overload]
+        )
+
+
+# ------------------------------------------------------------------------------
+# API: TestRunInExecutor
+
+
+class TestRunInExecutor(TestCase):
+    """
+    Tests run_in_executor(), which checks values in an executor's workers.
+    """
+
+    def test_returns_value_or_raises_same_validation_error_as_checkcast(
+        self,
+    ) -> None:
+        movie = {"name": "Blade Runner", "year": 1982}
+        bad_movie = {"name": "Blade Runner", "year": "1982"}
+        executor_types = [
+            None,
+            ThreadPoolExecutor,
+            ProcessPoolExecutor,
+        ]  # type: List[Optional[Callable[[int], Executor]]]
+        for executor_type in executor_types:
+            with self.subTest(executor=getattr(executor_type, "__name__", None)):
+                executor = executor_type(1) if executor_type is not None else None
+                try:
+                    self.assertIs(
+                        movie,
+                        asyncio.run(
+                            trycast_run_in_executor(_Movie, movie, executor=executor)
+                        ),
+                    )
+                    with self.assertRaises(ValidationError) as expected:
+                        checkcast(List[_Movie], [movie, bad_movie])
+                    with self.assertRaises(ValidationError) as actual:
+                        asyncio.run(
+                            trycast_run_in_executor(
+                                List[_Movie], [movie, bad_movie], executor=executor
+                            )
+                        )
+                    self.assertEqual(str(expected.exception), str(actual.exception))
+                finally:
+                    if executor is not None:
+                        executor.shutdown()
+
+    def test_can_check_stringified_reference(self) -> None:
+        with ProcessPoolExecutor(1) as executor:
+            self.assertEqual(
+                [1],
+                asyncio.run(
+                    trycast_run_in_executor("typing.List[int]", [1], executor=executor)
+                ),
+            )
+        self.assertRaisesRegex(
+            UnresolvableTypeError,
+            "run_in_executor\\(\\) was called with eval=False",
+            lambda: asyncio.run(trycast_run_in_executor("typing.List[int]", [], eval=False)),  # type: ignore[call-overload]
+        )
+
+    def test_locally_defined_type_can_only_be_checked_by_thread_workers(
+        self,
+    ) -> None:
+        class LocalMovie(RichTypedDict):
+            name: str
+
+        with ThreadPoolExecutor(1) as thread_executor:
+            self.assertEqual(
+                {"name": "Alien"},
+                asyncio.run(
+                    trycast_run_in_executor(
+                        LocalMovie, {"name": "Alien"}, executor=thread_executor
+                    )
+                ),
+            )
+        with ProcessPoolExecutor(1) as process_executor:
+            self.assertRaisesRegex(
+                TypeError,
+                "run_in_executor cannot send type .*LocalMovie to a worker "
+                "in another process because it cannot be pickled",
+                lambda: asyncio.run(
+                    trycast_run_in_executor(
+                        LocalMovie, {"name": "Alien"}, executor=process_executor
+                    )
+                ),
+            )
+
+
+# ------------------------------------------------------------------------------
+# API: TestClearCaches
+
+
+# For test_resolved_typeddict_annotations_are_cached_until_cleared
+class _Envelope(RichTypedDict):
+    payload: "_EnvelopePayload"  # type: ignore[reportInvalidTypeForm]  # pyright
+
+
+# For test_resolved_typeddict_annotations_are_cached_until_cleared
+_EnvelopePayload = int
+
+
+class TestClearCaches(TestCase):
+    """
+    Tests the caches of information that trycast derives from types.
+    """
+
+    def test_caches_may_be_used_and_cleared_from_many_threads(self) -> None:
+        tp = "test_data.forwardrefs_example.Shape"
+        circle = dict(type="circle", center=dict(x=50, y=50), radius=25)
+        square = dict(type="square", center=dict(x=50, y=50), radius=25)
+        failures = []  # type: List[str]
+
+        def check_many() -> None:
+            for i in range(200):
+                if trycast(tp, circle) is not circle:
+                    failures.append("circle rejected")
+                if trycast(tp, square) is not None:
+                    failures.append("square accepted")
+                if i % 50 == 0:
+                    clear_caches()
+
+        threads = [threading.Thread(target=check_many) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([], failures)
+
+    def test_eval_type_str_cache_may_be_inspected_and_cleared(self) -> None:
+        eval_type_str.cache_clear()
+        self.assertIs(int, eval_type_str("builtins.int"))
+        self.assertIs(int, eval_type_str("builtins.int"))
+        info = eval_type_str.cache_info()
+        self.assertEqual((1, 1, 1), (info.hits, info.misses, info.currsize))
+
+        clear_caches()
+        self.assertEqual(0, eval_type_str.cache_info().currsize)
+
+    def test_resolved_typeddict_annotations_are_cached_until_cleared(self) -> None:
+        global _EnvelopePayload
+        self.assertTrue(isassignable({"payload": 1}, _Envelope))
+        self.assertFalse(isassignable({"payload": "one"}, _Envelope))
+
+        _EnvelopePayload = str  # type: ignore[assignment]  # mypy
+        try:
+            # Annotations resolved before the rebinding are still used
+            self.assertTrue(isassignable({"payload": 1}, _Envelope))
+
+            clear_caches()
+            self.assertTrue(isassignable({"payload": "one"}, _Envelope))
+            self.assertFalse(isassignable({"payload": 1}, _Envelope))
+        finally:
+            _EnvelopePayload = int
+            clear_caches()
+
+    if sys.version_info >= (3, 11):
+
+        def test_specialized_generic_typeddict_annotations_are_cached_until_cleared(
+            self,
+        ) -> None:
+            global _EnvelopePayload
+
+            class Labeled(RichTypedDict, Generic[_T]):
+                value: _T
+                payload: "_EnvelopePayload"  # type: ignore[reportInvalidTypeForm]  # pyright
+
+            self.assertTrue(isassignable({"value": "a", "payload": 1}, Labeled[str]))
+            self.assertFalse(isassignable({"value": 1, "payload": 1}, Labeled[str]))
+
+            _EnvelopePayload = str  # type: ignore[assignment]  # mypy
+            try:
+                # Annotations specialized before the rebinding are still used
+                self.assertTrue(
+                    isassignable({"value": "a", "payload": 1}, Labeled[str])
+                )
+
+                clear_caches()
+                self.assertTrue(
+                    isassignable({"value": "a", "payload": "one"}, Labeled[str])
+                )
+                self.assertFalse(
+                    isassignable({"value": "a", "payload": 1}, Labeled[str])
+                )
+            finally:
+                _EnvelopePayload = int
+                clear_caches()
+
+    def test_typeddicts_defined_in_functions_can_be_garbage_collected(
+        self,
+    ) -> None:
+        def define_point() -> type:
+            class Point(RichTypedDict):
+                x: int
+                y: int
+
+            return Point
+
+        Point = define_point()
+        self.assertTrue(isassignable({"x": 1, "y": 2}, Point))
+
+        point_ref = weakref.ref(Point)
+        del Point
+        gc.collect()
+        self.assertIs(None, point_ref())
+
+
+# ------------------------------------------------------------------------------
+# API: TestDeepNesting
+
+
+# For TestDeepNesting
+class _Branch(RichTypedDict):
+    children: List["_Branch"]
+
+
+class TestDeepNesting(TestCase):
+    """
+    Tests checking values nested more deeply than the recursion limit.
+    """
+
+    # Deeper than the recursion limit allows a recursive check to go
+    DEPTH = 5_000
+
+    def test_very_deeply_nested_value_is_checked_without_recursion_error(
+        self,
+    ) -> None:
+        value = self._deep_branch(100_000, {"children": []})
+        self.assertIs(value, trycast(_Branch, value))
+
+        bad_value = self._deep_branch(100_000, {"children": ["leaf"]})
+        self.assertFalse(isassignable(bad_value, _Branch))
+
+    def test_deeply_nested_value_is_rejected_with_path_to_invalid_element(
+        self,
+    ) -> None:
+        value = self._deep_branch(self.DEPTH, {"children": ["leaf"]})
+        with self.assertRaises(ValidationError) as cm:
+            checkcast(_Branch, value)
+        prefixes = []
+        e = cm.exception  # type: Optional[ValidationError]
+        while e is not None:
+            if e._prefix is not None:
+                prefixes.append(str(e._prefix))
+            e = e._causes[0] if len(e._causes) > 0 else None
+        self.assertEqual(
+            ["At key 'children'", "At index 0"] * (self.DEPTH + 1), prefixes
+        )
+
+    def test_deeply_nested_value_is_checked_by_compiled_validator(self) -> None:
+        value = self._deep_branch(self.DEPTH, {"children": []})
+        self.assertIs(value, trycast_compile(_Branch).checkcast(value))
+
+        bad_value = self._deep_branch(self.DEPTH, {"children": ["leaf"]})
+        validator = trycast_compile(_Branch, codegen=True)
+        self.assertFalse(validator.isassignable(bad_value))
+
+    def test_deeply_nested_values_created_on_demand_are_checked(self) -> None:
+        # Each row is freed once checked, so its id() may be reused by the next
+        value = {"v": 0, "kids": _LazyRows(10, bad_at=9, kids=[])}  # type: object
+        for _ in range(self.DEPTH):
+            value = {"v": 0, "kids": [value]}
+        self.assertFalse(isassignable(value, _Row))
+        self.assertIsNone(trycast(_Row, value))
+
+    @staticmethod
+    def _deep_branch(depth: int, leaf: object) -> object:
+        value = leaf
+        for _ in range(depth):
+            value = {"children": [value]}
+        return value
+
+
+# ------------------------------------------------------------------------------
+# API: TestSharedValues
+
+
+class _Assumed(RichTypedDict):
+    items: List["_Referrer"]
+    count: int
+
+
+class _Alternative(RichTypedDict):
+    items: List["_Referrer"]
+
+
+class _Referrer(RichTypedDict):
+    referent: "Union[_Assumed, int]"
+
+
+class _GraphNode(RichTypedDict):
+    value: int
+    children: Sequence["_GraphNode"]
+
+
+# Refers to _GraphNode, which also refers to itself,
+# so values are checked against _GraphNode once each
+class _Graph(RichTypedDict):
+    root: _GraphNode
+
+
+# For test_values_created_on_demand_are_not_mistaken_for_one_another
+class _Row(RichTypedDict):
+    v: int
+    kids: Sequence["_Row"]
+
+
+class _LazyRows(CSequence):
+    """
+    A sequence which creates a new row each time one is looked up,
+    like a cursor over the rows of a database query.
+    """
+
+    def __init__(
+        self, length: int, bad_at: int, key: str = "v", **fields: object
+    ) -> None:
+        self._length = length
+        self._bad_at = bad_at
+        self._key = key
+        self._fields = fields
+
+    def __getitem__(self, i: int) -> Dict[str, object]:  # type: ignore[override]  # mypy
+        if not 0 <= i < self._length:
+            raise IndexError(i)
+        return {**self._fields, self._key: "bad" if i == self._bad_at else i}
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class TestSharedValues(TestCase):
+    """
+    Tests checking values which contain the same object many times,
+    or which contain themselves.
+    """
+
+    def test_value_containing_itself_is_checked(self) -> None:
+        value = {"value": 1, "children": []}  # type: Dict[str, Any]
+        value["children"].append({"value": 2, "children": [value]})
+        for validator in self._validators():
+            with self.subTest(codegen=validator.source is not None):
+                self.assertIs(value, validator.checkcast(value))
+        self.assertTrue(isassignable(value, _TreeNode))
+
+    def test_value_containing_itself_is_rejected_if_part_of_it_is_invalid(
+        self,
+    ) -> None:
+        value = {"value": 1, "children": []}  # type: Dict[str, Any]
+        value["children"].append({"value": "two", "children": [value]})
+        for validator in self._validators():
+            with self.subTest(codegen=validator.source is not None):
+                self.assertFalse(validator.isassignable(value))
+        with self.assertRaises(ValidationError) as cm:
+            trycast_compile(_TreeNode).checkcast(value)
+        self.assertTrue(
+            str(cm.exception).endswith("At key 'value': Expected int but found 'two'")
+        )
+        self.assertFalse(isassignable(value, _TreeNode))
+
+    def test_many_values_containing_themselves_are_partitioned(self) -> None:
+        value = {"value": 1, "children": []}  # type: Dict[str, Any]
+        value["children"].append(value)
+        bad_value = {"value": "one", "children": [value]}
+        for validator in self._validators():
+            with self.subTest(codegen=validator.source is not None):
+                (valid, invalid) = validator.partition([value, bad_value])
+                self.assertEqual([value], valid)
+                self.assertEqual([bad_value], [v for (v, _) in invalid])
+
+    def test_value_sharing_its_children_is_checked_once_per_child(self) -> None:
+        # Contains 2**60 paths but only 61 distinct nodes
+        value = {"root": self._diamonds(60, {"value": 0, "children": []})}
+        for codegen in [False, True]:
+            with self.subTest(codegen=codegen):
+                validator = trycast_compile(_Graph, codegen=codegen)
+                self.assertIs(value, validator.checkcast(value))
+
+                bad_value = {"root": {"value": 1, "children": [value["root"], 1]}}
+                self.assertFalse(validator.isassignable(bad_value))
+
+    def test_value_sharing_invalid_child_is_rejected(self) -> None:
+        value = {"root": self._diamonds(60, {"value": "zero", "children": []})}
+        for codegen in [False, True]:
+            with self.subTest(codegen=codegen):
+                validator = trycast_compile(_Graph, codegen=codegen)
+                self.assertFalse(validator.isassignable(value))
+
+    def test_values_created_on_demand_are_not_mistaken_for_one_another(
+        self,
+    ) -> None:
+        # Each row is freed once checked, so its id() may be reused by the next
+        root = {"v": 0, "kids": _LazyRows(30000, bad_at=29999, kids=[])}
+        for codegen in [False, True]:
+            with self.subTest(codegen=codegen):
+                validator = trycast_compile(_Row, codegen=codegen)
+                self.assertFalse(validator.isassignable(root))
+                with self.assertRaises(ValidationError):
+                    validator.checkcast(root)
+        self.assertFalse(isassignable(root, _Row))
+
+        rows = _LazyRows(30000, bad_at=29999, key="value", children=[])
+        graph = {"root": {"value": 0, "children": [{"value": 1, "children": rows}]}}
+        for codegen in [False, True]:
+            with self.subTest(codegen=codegen, tp=_Graph):
+                graph_validator = trycast_compile(_Graph, codegen=codegen)
+                self.assertFalse(graph_validator.isassignable(graph))
+
+    def test_match_which_assumed_a_value_matched_is_forgotten_if_it_did_not(
+        self,
+    ) -> None:
+        value = {"items": [], "count": "many"}  # type: Dict[str, Any]
+        value["items"].append({"referent": value})
+        # The referrer matches _Referrer only if the value matches _Assumed,
+        # which it does not, so the value does not match _Alternative either
+        tp = Union[_Assumed, _Alternative]
+        for codegen in [False, True]:
+            with self.subTest(codegen=codegen):
+                self.assertFalse(trycast_compile(tp, codegen=codegen).isassignable(value))  # type: ignore[arg-type]  # pyright
+        self.assertFalse(isassignable(value, tp))
+
+        value["count"] = 1
+        for codegen in [False, True]:
+            with self.subTest(codegen=codegen):
+                self.assertTrue(trycast_compile(tp, codegen=codegen).isassignable(value))  # type: ignore[arg-type]  # pyright
+
+    if sys.version_info >= (3, 12):
+
+        def test_value_sharing_its_children_is_checked_by_recursive_alias(
+            self,
+        ) -> None:
+            from test_data.type_statement_example import NestedForest
+
+            value = []  # type: List[object]
+            for _ in range(60):
+                value = [value, value]
+            for codegen in [False, True]:
+                with self.subTest(codegen=codegen):
+                    validator = trycast_compile(NestedForest, codegen=codegen)
+                    self.assertIs(value, validator.checkcast([value])[0])
+                    self.assertFalse(validator.isassignable([[value, 1]]))
+
+    @staticmethod
+    def _validators() -> "List[Validator[_TreeNode]]":
+        return [
+            trycast_compile(_TreeNode),
+            trycast_compile(_TreeNode, codegen=True),
+        ]
+
+    @staticmethod
+    def _diamonds(depth: int, leaf: object) -> object:
+        value = leaf
+        for i in range(depth):
+            value = {"value": i, "children": [value, value]}
+        return value
+
+
 # ------------------------------------------------------------------------------
 # Internal: TestIsTypedDict
 
@@ -3037,6 +4776,251 @@ class TestIsTypedDict(TestCase):
         self.assertTrue(_is_typed_dict(TypingExtensionsPoint))
 
 
+# ------------------------------------------------------------------------------
+# Internal: TestCheckcastIteratively
+
+from unittest.mock import patch
+
+import trycast as trycast_module
+from trycast import _checkcast_inner, _checkcast_iteratively, _Sampler, _TrycastOptions
+
+
+class TestCheckcastIteratively(TestCase):
+    """
+    Tests whether the _checkcast_iteratively() internal function
+    checks values exactly as _checkcast_inner() does.
+    """
+
+    CASES = [
+        (List[int], [[], [1, 2], [1, "2"], (1,), "12"]),
+        (List[List[int]], [[[1], [2, 3]], [[1], ["2"]], [1]]),
+        (Set[int], [{1, 2}, {1, "2"}, [1]]),
+        (FrozenSet[int], [frozenset([1]), frozenset(["1"]), {1}]),
+        (Tuple[int, ...], [(), (1, 2), (1, "2"), [1]]),
+        (Tuple[int, str], [(1, "a"), (1, 2), (1,), [1, "a"]]),
+        (Tuple[()], [(), (1,)]),
+        (Sequence[int], [[1], (1, "2"), "12", range(3)]),
+        (MutableSequence[int], [[1], [1, "2"], (1,)]),
+        (Dict[str, int], [{}, {"a": 1}, {1: 1}, {"a": "1"}, [("a", 1)]]),
+        (Mapping[str, List[int]], [{"a": [1]}, {"a": ["1"]}, MappingProxyType({})]),
+        (MutableMapping[str, int], [{"a": 1}, {"a": "1"}, MappingProxyType({})]),
+        (Optional[List[int]], [None, [1], ["1"], 1]),
+        (Union[int, str, List[str]], [1, "a", ["a"], [1], 1.5]),
+        (Union[int, _HashFails], [1, _HashFails(), "a"]),
+        (Union[Literal[1], _HashFails], [1, _HashFails(), "a"]),
+        (
+            Union[_Circle, _Rect],
+            [
+                {"type": "circle", "radius": 1},
+                {"type": "rect", "width": 1, "height": 2},
+                {"type": "rect", "radius": 1},
+                {"type": "oval"},
+                {},
+            ],
+        ),
+        (_Movie, [{"name": "A", "year": 1}, {"name": "A"}, {"name": "A", "year": "1"}]),
+        (_MaybeBookBasedMovie, [{"name": "A", "year": 1}, {"based_on": 1}, {}]),
+        (Dict[str, _Url], [{"a": "https://"}, {"a": 1}]),
+        (Literal["a", 1], ["a", 1, "b"]),
+        (Any, [1, None]),
+    ]  # type: List[Tuple[object, List[object]]]
+
+    def test_checks_values_same_as_recursive_check(self) -> None:
+        for strict in [True, False]:
+            for explain in [True, False]:
+                options = _TrycastOptions(
+                    strict=strict, eval=True, funcname="checkcast", explain=explain
+                )
+                for tp, values in self.CASES:
+                    for value in values:
+                        with self.subTest(
+                            tp=tp, value=value, strict=strict, explain=explain
+                        ):
+                            self.assertEqual(
+                                self._result_of(_checkcast_inner, tp, value, options),
+                                self._result_of(
+                                    _checkcast_iteratively, tp, value, options
+                                ),
+                            )
+
+    def test_checks_samples_same_as_recursive_check(self) -> None:
+        tp = Dict[str, List[int]]
+        value = {str(i): [i] * i for i in range(100)}
+        bad_value = {**value, "50": ["50"]}
+        for v in [value, bad_value]:
+            outcomes = [
+                self._result_of(
+                    check,
+                    tp,
+                    v,
+                    _TrycastOptions(
+                        strict=True,
+                        eval=True,
+                        funcname="checkcast",
+                        sampler=_Sampler(10, seed=0),
+                    ),
+                )
+                for check in [_checkcast_inner, _checkcast_iteratively]
+            ]
+            self.assertEqual(outcomes[0], outcomes[1])
+
+    def test_value_containing_itself_is_checked_once(self) -> None:
+        value = {"children": []}  # type: Dict[str, List[object]]
+        value["children"].append(value)
+        options = _TrycastOptions(strict=True, eval=True, funcname="checkcast")
+        self.assertIsNone(_checkcast_iteratively(_Branch, value, options))
+
+        value["children"].append("leaf")
+        self.assertIsNotNone(_checkcast_iteratively(_Branch, value, options))
+
+    def test_value_nested_deeper_than_limit_raises_recursion_error(self) -> None:
+        value = TestDeepNesting._deep_branch(2_000, {"children": []})
+        options = _TrycastOptions(strict=True, eval=True, funcname="checkcast")
+        with patch.object(trycast_module, "_MAX_ITERATIVE_DEPTH", 1000):
+            with self.assertRaises(RecursionError):
+                _checkcast_iteratively(_Branch, value, options)
+
+    @staticmethod
+    def _result_of(
+        check: Callable[[object, object, _TrycastOptions], Optional[ValidationError]],
+        tp: object,
+        value: object,
+        options: _TrycastOptions,
+    ) -> object:
+        try:
+            e = check(tp, value, options)
+        except TypeError as te:
+            return (type(te), str(te))
+        return None if e is None else str(e)
+
+
+# ------------------------------------------------------------------------------
+# Internal: TestPlanMemo
+
+from trycast import _invalid_values_in_chunk, _ValueContainsItselfError
+
+
+class _CountingMapping(CMapping):
+    """A mapping which counts how many times its items are looked up."""
+
+    lookup_count = 0
+
+    def __init__(self, **items: object) -> None:
+        self._items = items
+
+    def __getitem__(self, key: str) -> object:
+        _CountingMapping.lookup_count += 1
+        return self._items[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class TestPlanMemo(TestCase):
+    """
+    Tests whether compiled checks remember the result of checking each
+    value against each shared plan, once they start remembering results.
+    """
+
+    def setUp(self) -> None:
+        patcher = patch.object(trycast_module, "_PLAN_CHECKS_BEFORE_TRACKING", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shared_value_is_checked_once_against_each_plan(self) -> None:
+        leaf = _CountingMapping(value=0, children=[])
+        value = leaf
+        for i in range(20):
+            value = _CountingMapping(value=i, children=[value, value])
+        for codegen in [False, True]:
+            with self.subTest(codegen=codegen):
+                validator = trycast_compile(_Graph, codegen=codegen)
+                _CountingMapping.lookup_count = 0
+                self.assertTrue(validator.isassignable({"root": leaf}))
+                lookups_per_mapping = _CountingMapping.lookup_count
+
+                _CountingMapping.lookup_count = 0
+                self.assertTrue(validator.isassignable({"root": value}))
+                # Checks each of 21 distinct mappings once
+                self.assertEqual(
+                    21 * lookups_per_mapping, _CountingMapping.lookup_count
+                )
+
+    def test_value_containing_itself_is_checked_iteratively(self) -> None:
+        node = {"value": 1, "children": []}  # type: Dict[str, Any]
+        node["children"].append(node)
+        value = {"root": node}
+        validator = trycast_compile(_Graph)
+        with self.assertRaises(_ValueContainsItselfError):
+            validator._plan._check(value, False)
+        self.assertIs(value, validator.checkcast(value))
+
+        codegen_validator = trycast_compile(_Graph, codegen=True)
+        assert codegen_validator._match_func is not None
+        with self.assertRaises(_ValueContainsItselfError):
+            codegen_validator._match_func(value)
+        self.assertTrue(codegen_validator.isassignable(value))
+
+    def test_value_containing_itself_is_checked_by_executor_worker(self) -> None:
+        value = {"value": 1, "children": []}  # type: Dict[str, Any]
+        value["children"].append(value)
+        bad_value = {"value": "one", "children": [value]}
+        self.assertEqual(
+            [(1, None)],
+            _invalid_values_in_chunk(_TreeNode, True, True, [value, bad_value], False),
+        )
+
+    def test_plan_referred_to_by_one_typeddict_remembers_nothing(self) -> None:
+        list_validator = trycast_compile(List[Dict[str, int]], codegen=True)
+        self.assertNotIn("_PlanMemo", list_validator.source or "")
+
+        # Refers only to itself, so checks trees exactly as fast as before
+        tree_validator = trycast_compile(_TreeNode, codegen=True)
+        self.assertNotIn("_PlanMemo", tree_validator.source or "")
+        self.assertNotIn(", m)", tree_validator.source or "")
+        self.assertFalse(tree_validator._plan._is_shared)  # type: ignore[attr-defined]  # mypy
+
+        graph_validator = trycast_compile(_Graph, codegen=True)
+        self.assertIn("_PlanMemo", graph_validator.source or "")
+
+
+# ------------------------------------------------------------------------------
+# Internal: TestPickleWorkerResult
+
+from trycast import _pickle_worker_result
+
+
+class TestPickleWorkerResult(TestCase):
+    def test_keeps_type_value_and_causes_of_validation_errors(self) -> None:
+        with self.assertRaises(ValidationError) as cm:
+            checkcast(List[int], [1, "two"])
+        e = cm.exception
+        [(i, unpickled_e)] = pickle.loads(_pickle_worker_result([(1, e)]))
+        self.assertEqual(1, i)
+        self.assertEqual(str(e), str(unpickled_e))
+        self.assertEqual(List[int], unpickled_e._tp)
+        self.assertEqual(len(e._causes), len(unpickled_e._causes))
+
+    def test_keeps_only_explanation_of_validation_error_that_cannot_be_pickled(
+        self,
+    ) -> None:
+        class LocalMovie(RichTypedDict):
+            name: str
+
+        with self.assertRaises(ValidationError) as cm:
+            checkcast(List[LocalMovie], [{"name": "Alien"}, {}])
+        e = cm.exception
+        with self.assertRaises(Exception):
+            pickle.dumps(e)
+        [(i, unpickled_e)] = pickle.loads(_pickle_worker_result([(1, e)]))
+        self.assertEqual(1, i)
+        self.assertIsInstance(unpickled_e, ValidationError)
+        self.assertEqual(str(e), str(unpickled_e))
+
+
 # ------------------------------------------------------------------------------
 # Meta: TestTypechecks
 
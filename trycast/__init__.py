@@ -1,10 +1,18 @@
+import array
 import builtins
+import copy
 import functools
 import importlib
 import inspect
+import io
+import itertools
 import math
+import pickle
+import random
 import re
 import sys
+import threading
+import weakref
 from collections.abc import Callable as CCallable
 from collections.abc import Mapping as CMapping
 from collections.abc import MutableMapping as CMutableMapping
@@ -20,6 +28,9 @@ from typing import (
     Dict,
     ForwardRef,
     FrozenSet,
+    Generator,
+    Generic,
+    Iterable,
     List,
     Literal,
     Mapping,
@@ -212,11 +223,23 @@ if sys.version_info >= (3, 11):
 else:
     from typing import _type_check  # type: ignore[attr-defined]
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
 
 __all__ = (
     "trycast",
     "checkcast",
     "isassignable",
+    "trycast_many",
+    "partition",
+    "atrycast",
+    "acheckcast",
+    # NOTE: Not exported because it would shadow the builtin compile()
+    # "compile",
+    # NOTE: Not exported because it would be confused with
+    #       asyncio's loop.run_in_executor()
+    # "run_in_executor",
     # NOTE: May be part of the API in the future
     # "eval_type_str",
 )
@@ -224,6 +247,7 @@ __all__ = (
 
 _T = TypeVar("_T")
 _F = TypeVar("_F")
+_R = TypeVar("_R")
 _SimpleTypeVar = TypeVar("_SimpleTypeVar")
 _SimpleTypeVarCo = TypeVar("_SimpleTypeVarCo", covariant=True)  # type: ignore[not-supported-yet]  # pytest
 
@@ -242,12 +266,19 @@ _MISSING = object()
 # def trycast(tp: TypeForm[_T], value: object) -> Optional[_T]: ...
 
 
-# Overload: (tp: str, eval: Literal[False]) -> NoReturn
+# Overload: (tp: str, eval: Literal[False], sample: Optional[int] = None, seed: Optional[int] = None) -> NoReturn
 
 
 @overload
 def trycast(  # type: ignore[43]  # pyre
-    tp: str, value: object, /, *, strict: bool = True, eval: Literal[False]
+    tp: str,
+    value: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: Literal[False],
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
 ) -> NoReturn: ...  # pragma: no cover
 
 
@@ -255,19 +286,33 @@ def trycast(  # type: ignore[43]  # pyre
 
 
 @overload
-def trycast(tp: str, value: object, /, *, strict: bool = True, eval: bool = True) -> bool:  # type: ignore[43]  # pyre
+def trycast(tp: str, value: object, /, *, strict: bool = True, eval: bool = True, sample: Optional[int] = None, seed: Optional[int] = None) -> bool:  # type: ignore[43]  # pyre
     ...  # pragma: no cover
 
 
 @overload
 def trycast(  # type: ignore[43]  # pyre
-    tp: Type[_T], value: object, /, *, strict: bool = True, eval: bool = True
+    tp: Type[_T],
+    value: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
 ) -> Optional[_T]: ...  # pragma: no cover
 
 
 @overload
 def trycast(  # type: ignore[43]  # pyre
-    tp: object, value: object, /, *, strict: bool = True, eval: bool = True
+    tp: object,
+    value: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
 ) -> Optional[object]: ...  # pragma: no cover
 
 
@@ -283,6 +328,8 @@ def trycast(
     *,
     strict: bool = True,
     eval: Literal[False],
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
 ) -> NoReturn: ...  # pragma: no cover
 
 
@@ -295,19 +342,31 @@ def trycast(
     *,
     strict: bool = True,
     eval: bool = True,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
 ) -> Union[_T, _F]: ...  # pragma: no cover
 
 
 @overload
 def trycast(
-    tp: object, value: object, /, failure: _F, *, strict: bool = True, eval: bool = True
+    tp: object,
+    value: object,
+    /,
+    failure: _F,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
 ) -> Union[object, _F]: ...  # pragma: no cover
 
 
 # Implementation
 
 
-def trycast(tp, value, /, failure=None, *, strict=True, eval=True):
+def trycast(
+    tp, value, /, failure=None, *, strict=True, eval=True, sample=None, seed=None
+):
     """
     If `value` is in the shape of `tp` (as accepted by a Python typechecker
     conforming to PEP 484 "Type Hints") then returns it, otherwise returns
@@ -352,6 +411,18 @@ def trycast(tp, value, /, failure=None, *, strict=True, eval=True):
         If eval=False then this function will not attempt to resolve string
         type references, which requires the use of the eval() function.
         Otherwise string type references will be accepted.
+    * sample --
+        If sample=N then each list, tuple, or other sequence with more than
+        N elements, and each dict or other mapping with more than N items,
+        is checked by checking only N of its elements (or items):
+        the first, the last, and N-2 others chosen at random.
+        Elements that are not checked may not be in the shape of
+        the element type. Useful for trusted-but-verified large collections.
+    * seed --
+        The seed of the random choice of elements to check when sample=N.
+        If None then a seed is chosen at random. A ValidationError caused by
+        a sampled element reports the seed, so that the same elements
+        can be checked again by passing the same seed.
 
     Raises:
     * TypeNotSupportedError --
@@ -362,8 +433,20 @@ def trycast(tp, value, /, failure=None, *, strict=True, eval=True):
         If `tp` is a type form which contains a ForwardRef.
     * UnresolvableTypeError --
         If `tp` is a string that could not be resolved to a type.
+    * ValueError --
+        If `sample` is not None and is less than 2.
     """
-    e = _checkcast_outer(tp, value, _TrycastOptions(strict, eval, funcname="trycast"))
+    e = _checkcast_outer(
+        tp,
+        value,
+        _TrycastOptions(
+            strict,
+            eval,
+            funcname="trycast",
+            explain=False,
+            sampler=_Sampler.create(sample, seed),
+        ),
+    )
     if e is not None:
         return failure
     else:
@@ -383,7 +466,7 @@ def trycast(tp, value, /, failure=None, *, strict=True, eval=True):
 # def checkcast(tp: TypeForm[_T], value: object) -> _T: ...
 
 
-# Overload: (tp: str, eval: Literal[False]) -> NoReturn
+# Overload: (tp: str, eval: Literal[False], sample: Optional[int] = None, seed: Optional[int] = None) -> NoReturn
 
 
 @overload
@@ -394,6 +477,8 @@ def checkcast(  # type: ignore[43]  # pyre
     *,
     strict: bool = True,
     eval: Literal[False],
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
     _funcname: str = "checkcast",
 ) -> NoReturn: ...  # pragma: no cover
 
@@ -402,7 +487,7 @@ def checkcast(  # type: ignore[43]  # pyre
 
 
 @overload
-def checkcast(tp: str, value: object, /, *, strict: bool = True, eval: bool = True, _funcname: str = "checkcast") -> bool:  # type: ignore[43]  # pyre
+def checkcast(tp: str, value: object, /, *, strict: bool = True, eval: bool = True, sample: Optional[int] = None, seed: Optional[int] = None, _funcname: str = "checkcast") -> bool:  # type: ignore[43]  # pyre
     ...  # pragma: no cover
 
 
@@ -414,6 +499,8 @@ def checkcast(  # type: ignore[43]  # pyre
     *,
     strict: bool = True,
     eval: bool = True,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
     _funcname: str = "checkcast",
 ) -> _T: ...  # pragma: no cover
 
@@ -426,6 +513,8 @@ def checkcast(  # type: ignore[43]  # pyre
     *,
     strict: bool = True,
     eval: bool = True,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
     _funcname: str = "checkcast",
 ) -> object: ...  # pragma: no cover
 
@@ -433,7 +522,17 @@ def checkcast(  # type: ignore[43]  # pyre
 # Implementation
 
 
-def checkcast(tp, value, /, *, strict=True, eval=True, _funcname="checkcast"):
+def checkcast(
+    tp,
+    value,
+    /,
+    *,
+    strict=True,
+    eval=True,
+    sample=None,
+    seed=None,
+    _funcname="checkcast",
+):
     """
     If `value` is in the shape of `tp` (as accepted by a Python typechecker
     conforming to PEP 484 "Type Hints") then returns it, otherwise
@@ -463,7 +562,11 @@ def checkcast(tp, value, /, *, strict=True, eval=True, _funcname="checkcast"):
     * UnresolvedForwardRefError
     * UnresolvableTypeError
     """
-    e = _checkcast_outer(tp, value, _TrycastOptions(strict, eval, _funcname))
+    e = _checkcast_outer(
+        tp,
+        value,
+        _TrycastOptions(strict, eval, _funcname, sampler=_Sampler.create(sample, seed)),
+    )
     if e is not None:
         raise e
     else:
@@ -474,11 +577,36 @@ class _TrycastOptions(NamedTuple):
     strict: bool
     eval: bool
     funcname: str
+    # Whether to explain why a value does not match with a ValidationError.
+    # If False then _REJECTED is returned instead, allocating nothing.
+    explain: bool = True
+    # If not None then checks only a sample of the elements of large collections
+    sampler: "Optional[_Sampler]" = None
 
 
 def _checkcast_outer(
     tp: object, value: object, options: _TrycastOptions
 ) -> "Optional[ValidationError]":
+    tp = _resolve_outer_type(tp, options)
+    try:
+        try:
+            return _checkcast_inner(tp, value, options)
+        except RecursionError:
+            # Value is nested too deeply to check recursively
+            return _checkcast_iteratively(tp, value, options)
+    except UnresolvedForwardRefError:
+        raise _unresolved_forward_ref_error(tp, options)
+
+
+def _resolve_outer_type(tp: object, options: _TrycastOptions) -> object:
+    """
+    Resolves the type argument given to a public API function,
+    evaluating it if it is a string reference.
+
+    Raises:
+    * UnresolvableTypeError
+    * TypeError -- If `tp` is not a type.
+    """
     if isinstance(tp, str):
         if options.eval:
             tp = eval_type_str(tp)  # does use eval()
@@ -505,24 +633,27 @@ def _checkcast_outer(
                 )
             else:
                 raise
-    try:
-        return _checkcast_inner(tp, value, options)
-    except UnresolvedForwardRefError:
-        if options.eval:
-            advise = (
-                "Try altering the first type argument to be a string "
-                "reference (surrounded with quotes) instead."
-            )
-        else:
-            advise = (
-                f"{options.funcname}() cannot resolve string type references "
-                "because it was called with eval=False."
-            )
-        raise UnresolvedForwardRefError(
-            f"{options.funcname} does not support checking against type form {tp!r} "
-            "which contains a string-based forward reference. "
-            f"{advise}"
+    return tp
+
+
+def _unresolved_forward_ref_error(
+    tp: object, options: _TrycastOptions
+) -> "UnresolvedForwardRefError":
+    if options.eval:
+        advise = (
+            "Try altering the first type argument to be a string "
+            "reference (surrounded with quotes) instead."
+        )
+    else:
+        advise = (
+            f"{options.funcname}() cannot resolve string type references "
+            "because it was called with eval=False."
         )
+    return UnresolvedForwardRefError(
+        f"{options.funcname} does not support checking against type form {tp!r} "
+        "which contains a string-based forward reference. "
+        f"{advise}"
+    )
 
 
 def _checkcast_inner(
@@ -533,19 +664,86 @@ def _checkcast_inner(
     * TypeNotSupportedError
     * UnresolvedForwardRefError
     """
+    handler = _checkcast_handler_for_class.get(type(tp))
+    if handler is None:
+        type_origin = get_origin(tp)
+        if type_origin is not None:
+            handler = _checkcast_handler_for_origin.get(type_origin)
+            if handler is None:
+                handler = _checkcast_handler_for_origin_class.get(type(type_origin))
+        if handler is None:
+            handler = _checkcast_other
+    return handler(tp, value, options)
+
+
+# ------------------------------------------------------------------------------
+# _checkcast_inner handlers
+
+# Checks whether a value is in the shape of a type form,
+# as _checkcast_inner() does, given (tp, value, options).
+_CheckcastHandler = Callable[
+    [object, object, _TrycastOptions], "Optional[ValidationError]"
+]
+
+# Handlers for type forms which are instances of a particular class,
+# such as `type` for plain classes. Looked up first.
+_checkcast_handler_for_class = {}  # type: Dict[type, _CheckcastHandler]
+
+# Handlers for type forms with a particular origin, such as `list` for List[T].
+# Looked up if there is no handler for the class of a type form.
+_checkcast_handler_for_origin = {}  # type: Dict[object, _CheckcastHandler]
+
+# Handlers for type forms whose origin is an instance of a particular class,
+# such as a TypedDict metaclass for Point[int].
+# Looked up if there is no handler for the origin of a type form.
+_checkcast_handler_for_origin_class = {}  # type: Dict[type, _CheckcastHandler]
+
+
+def _register_checkcast_handler(
+    *,
+    classes: Sequence[type] = (),
+    origins: Sequence[object] = (),
+    origin_classes: Sequence[type] = (),
+) -> Callable[[_CheckcastHandler], _CheckcastHandler]:
+    """
+    Decorates a function which _checkcast_inner() should call to check
+    type forms that are instances of any of the specified `classes`,
+    that have any of the specified `origins`, or whose origins are
+    instances of any of the specified `origin_classes`.
+
+    Type forms which match no registered handler are checked by
+    _checkcast_other().
+    """
+
+    def decorate(handler: _CheckcastHandler) -> _CheckcastHandler:
+        for c in classes:
+            _checkcast_handler_for_class[c] = handler
+        for o in origins:
+            _checkcast_handler_for_origin[o] = handler
+        for oc in origin_classes:
+            _checkcast_handler_for_origin_class[oc] = handler
+        return handler
+
+    return decorate
+
+
+@_register_checkcast_handler(classes=[type])
+def _checkcast_class(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
     if tp is int:
         # Also accept bools as valid int values
         if isinstance(value, int):
             return None
         else:
-            return ValidationError(tp, value)
+            return _rejection(tp, value, options)
 
     if tp is float:
         # Also accept ints and bools as valid float values
         if isinstance(value, float) or isinstance(value, int):
             return None
         else:
-            return ValidationError(tp, value)
+            return _rejection(tp, value, options)
 
     if tp is complex:
         # Also accept floats, ints, and bools as valid complex values
@@ -556,242 +754,343 @@ def _checkcast_inner(
         ):
             return None
         else:
-            return ValidationError(tp, value)
+            return _rejection(tp, value, options)
 
-    type_origin = get_origin(tp)
+    if isinstance(value, tp):  # type: ignore[arg-type]  # mypy
+        return None
+    else:
+        return _rejection(tp, value, options)
 
-    if type_origin is list or type_origin is List:  # List, List[T]
-        return _checkcast_listlike(tp, value, list, options)
 
-    if type_origin is set or type_origin is Set:  # Set, Set[T]
-        return _checkcast_listlike(tp, value, set, options)
+@_register_checkcast_handler(origins=[list, List])
+def _checkcast_list(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # List, List[T]
+    return _checkcast_listlike(tp, value, list, options)
 
-    if type_origin is frozenset or type_origin is FrozenSet:  # FrozenSet, FrozenSet[T]
-        return _checkcast_listlike(tp, value, frozenset, options, covariant_t=True)
 
-    if type_origin is tuple or type_origin is Tuple:
-        if isinstance(value, tuple):
-            type_args = get_args(tp)
+@_register_checkcast_handler(origins=[set, Set])
+def _checkcast_set(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # Set, Set[T]
+    return _checkcast_listlike(tp, value, set, options)
 
-            if len(type_args) == 0 or (
-                len(type_args) == 2 and type_args[1] is Ellipsis
-            ):  # Tuple, Tuple[T, ...]
 
-                return _checkcast_listlike(
-                    tp,
-                    value,
-                    tuple,
-                    options,
-                    covariant_t=True,
-                    t_ellipsis=True,
-                )
-            else:  # Tuple[Ts]
-                if len(value) != len(type_args):
-                    return ValidationError(tp, value)
+@_register_checkcast_handler(origins=[frozenset, FrozenSet])
+def _checkcast_frozenset(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # FrozenSet, FrozenSet[T]
+    return _checkcast_listlike(tp, value, frozenset, options, covariant_t=True)
 
-                for i, T, t in zip(range(len(type_args)), type_args, value):
-                    e = _checkcast_inner(T, t, options)
-                    if e is not None:
-                        return ValidationError(
-                            tp,
-                            value,
-                            _causes=[e._with_prefix(_LazyStr(lambda: f"At index {i}"))],
-                        )
 
-                return None
-        else:
-            return ValidationError(tp, value)
+@_register_checkcast_handler(origins=[tuple, Tuple])
+def _checkcast_tuple(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    if isinstance(value, tuple):
+        type_args = get_args(tp)
 
-    if type_origin is Sequence or type_origin is CSequence:  # Sequence, Sequence[T]
-        return _checkcast_listlike(tp, value, CSequence, options, covariant_t=True)
+        if len(type_args) == 0 or (
+            len(type_args) == 2 and type_args[1] is Ellipsis
+        ):  # Tuple, Tuple[T, ...]
 
-    if (
-        type_origin is MutableSequence or type_origin is CMutableSequence
-    ):  # MutableSequence, MutableSequence[T]
-        return _checkcast_listlike(tp, value, CMutableSequence, options)
+            return _checkcast_listlike(
+                tp,
+                value,
+                tuple,
+                options,
+                covariant_t=True,
+                t_ellipsis=True,
+            )
+        else:  # Tuple[Ts]
+            if len(value) != len(type_args):
+                return _rejection(tp, value, options)
 
-    if type_origin is dict or type_origin is Dict:  # Dict, Dict[K, V]
-        return _checkcast_dictlike(tp, value, dict, options)
+            for i, T, t in zip(range(len(type_args)), type_args, value):
+                e = _checkcast_inner(T, t, options)
+                if e is not None:
+                    if not options.explain:
+                        return e
+                    return ValidationError(
+                        tp,
+                        value,
+                        _causes=[e._with_prefix(_LazyStr(lambda: f"At index {i}"))],
+                    )
 
-    if type_origin is Mapping or type_origin is CMapping:  # Mapping, Mapping[K, V]
-        return _checkcast_dictlike(tp, value, CMapping, options, covariant_v=True)
+            return None
+    else:
+        return _rejection(tp, value, options)
 
-    if (
-        type_origin is MutableMapping or type_origin is CMutableMapping
-    ):  # MutableMapping, MutableMapping[K, V]
-        return _checkcast_dictlike(tp, value, CMutableMapping, options)
 
-    if (
-        type_origin is Union or type_origin is UnionType
-    ):  # Union[T1, T2, ...], Optional[T]
-        causes = []
-        for T in get_args(tp):
-            e = _checkcast_inner(T, value, options)
-            if e is not None:
-                causes.append(e)
-            else:
-                return None
-        return ValidationError(tp, value, _causes=causes)
+@_register_checkcast_handler(origins=[Sequence, CSequence])
+def _checkcast_sequence(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # Sequence, Sequence[T]
+    return _checkcast_listlike(tp, value, CSequence, options, covariant_t=True)
 
-    if type_origin is Literal:  # Literal[...]
-        for literal in get_args(tp):
-            if value == literal:
+
+@_register_checkcast_handler(origins=[MutableSequence, CMutableSequence])
+def _checkcast_mutable_sequence(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # MutableSequence, MutableSequence[T]
+    return _checkcast_listlike(tp, value, CMutableSequence, options)
+
+
+@_register_checkcast_handler(origins=[dict, Dict])
+def _checkcast_dict(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # Dict, Dict[K, V]
+    return _checkcast_dictlike(tp, value, dict, options)
+
+
+@_register_checkcast_handler(origins=[Mapping, CMapping])
+def _checkcast_mapping(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # Mapping, Mapping[K, V]
+    return _checkcast_dictlike(tp, value, CMapping, options, covariant_v=True)
+
+
+@_register_checkcast_handler(origins=[MutableMapping, CMutableMapping])
+def _checkcast_mutable_mapping(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # MutableMapping, MutableMapping[K, V]
+    return _checkcast_dictlike(tp, value, CMutableMapping, options)
+
+
+@_register_checkcast_handler(
+    classes=[UnionType],  # type: ignore[reportArgumentType]  # pyright
+    origins=[Union, UnionType],
+)
+def _checkcast_union(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # Union[T1, T2, ...], Optional[T]
+    type_dispatch = _union_type_dispatch(tp, options.eval)
+    if value is None and type_dispatch is not None and type_dispatch.accepts_none:
+        return None
+    if _is_literal_value(tp, value):
+        return None
+    if type(value) is dict or isinstance(value, CMapping):
+        discriminator = _union_discriminator(tp, options.eval)
+        if discriminator is not None:
+            # Try the only tagged member that could match first
+            tag = value.get(discriminator.key, _MISSING)
+            try:
+                M = discriminator.member_for_tag.get((type(tag), tag))
+            except TypeError:  # unhashable tag value
+                M = None
+            if M is not None and _checkcast_inner(M, value, options) is None:
                 return None
-        return ValidationError(tp, value)
+            if not options.explain:
+                # No tagged member can match. Check only the untagged members.
+                for T in discriminator.untagged_members:
+                    if _checkcast_inner(T, value, options) is None:
+                        return None
+                return _REJECTED
+    # Otherwise check all members in order, to report all causes,
+    # skipping members that could never match the type of the value
 
-    if type_origin is CCallable:
-        callable_args = get_args(tp)
-        if callable_args == ():
-            # Callable
-            if callable(value):
+    if type_dispatch is None:
+        members = get_args(tp)
+        may_match = None  # type: Optional[Tuple[bool, ...]]
+    else:
+        (members, may_match) = type_dispatch.entry_for(type(value))
+
+    if not options.explain:
+        for T in members:
+            if _checkcast_inner(T, value, options) is None:
                 return None
-            else:
-                return ValidationError(tp, value)
+        return _REJECTED
+
+    causes = []
+    for i, T in enumerate(get_args(tp)):
+        if may_match is not None and not may_match[i]:
+            causes.append(ValidationError(T, value))
+            continue
+        e = _checkcast_inner(T, value, options)
+        if e is not None:
+            causes.append(e)
         else:
-            assert len(callable_args) == 2
-            (param_types, return_type) = callable_args
+            return None
+    return ValidationError(tp, value, _causes=causes)
 
-            if return_type is not Any:
-                # Callable[..., T]
-                raise TypeNotSupportedError(
-                    f"{options.funcname} cannot reliably determine whether value is "
-                    f"a {type_repr(tp)} because "
-                    f"callables at runtime do not always have a "
-                    f"declared return type. "
-                    f"Consider using {options.funcname}(Callable, value) instead."
+
+@_register_checkcast_handler(origins=[Literal])
+def _checkcast_literal(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # Literal[...]
+    if _is_literal_value(tp, value):
+        return None
+    return _rejection(tp, value, options)
+
+
+@_register_checkcast_handler(origins=[CCallable])
+def _checkcast_callable(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    callable_args = get_args(tp)
+    if callable_args == ():
+        # Callable
+        if callable(value):
+            return None
+        else:
+            return _rejection(tp, value, options)
+    else:
+        assert len(callable_args) == 2
+        (param_types, return_type) = callable_args
+
+        if return_type is not Any:
+            # Callable[..., T]
+            raise _callable_return_type_not_supported_error(tp, options)
+
+        if param_types is Ellipsis:
+            # Callable[..., Any]
+            return _checkcast_inner(Callable, value, options)
+
+        assert isinstance(param_types, list)
+        for param_type in param_types:
+            if param_type is not Any:
+                raise _callable_param_types_not_supported_error(
+                    tp, param_types, options
                 )
 
-            if param_types is Ellipsis:
-                # Callable[..., Any]
-                return _checkcast_inner(Callable, value, options)
+        # Callable[[Any * N], Any]
+        return _checkcast_callable_arity(
+            tp, value, len(param_types), explain=options.explain
+        )
 
-            assert isinstance(param_types, list)
-            for param_type in param_types:
-                if param_type is not Any:
-                    raise TypeNotSupportedError(
-                        f"{options.funcname} cannot reliably determine whether value is "
-                        f"a {type_repr(tp)} because "
-                        f"callables at runtime do not always have "
-                        f"declared parameter types. "
-                        f"Consider using {options.funcname}("
-                        f"Callable[{','.join('Any' * len(param_types))}, Any], value) "
-                        f"instead."
-                    )
 
-            # Callable[[Any * N], Any]
-            if callable(value):
-                try:
-                    sig = _inspect_signature(value)
-                except TypeError:
-                    # Not a callable
-                    return ValidationError(tp, value)
-                except ValueError as f:
-                    # Unable to introspect signature for value.
-                    # It might be a built-in function that lacks signature support.
-                    # Assume conservatively that value does NOT match the requested type.
-                    e = ValidationError(tp, value)
-                    e.__cause__ = f
-                    return e
-                else:
-                    sig_min_param_count = 0  # type: float
-                    sig_max_param_count = 0  # type: float
-                    for expected_param in sig.parameters.values():
-                        if (
-                            expected_param.kind == Parameter.POSITIONAL_ONLY
-                            or expected_param.kind == Parameter.POSITIONAL_OR_KEYWORD
-                        ):
-                            if expected_param.default is Parameter.empty:
-                                sig_min_param_count += 1
-                            sig_max_param_count += 1
-                        elif expected_param.kind == Parameter.VAR_POSITIONAL:
-                            sig_max_param_count = math.inf
-
-                    if sig_min_param_count <= len(param_types) <= sig_max_param_count:
-                        return None
-                    else:
-                        return ValidationError(tp, value)
-            else:
-                return ValidationError(tp, value)
+@_register_checkcast_handler(origin_classes=[TypeAliasType])
+def _checkcast_type_alias_alias(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # A[X1, X2, ...] where A is a TypeAliasType
+    return _checkcast_inner(_type_alias_value(tp), value, options)
+
+
+@_register_checkcast_handler(origin_classes=_typed_dict_metas)
+def _checkcast_generic_typeddict(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # T[X1, X2, ...] where T extends TypedDict
+    return _checkcast_typeddict(
+        tp,
+        get_origin(tp),
+        value,
+        options,
+        _specialized_typeddict_annotations(tp, options.eval),
+    )
+
+
+@_register_checkcast_handler(classes=_typed_dict_metas)
+def _checkcast_nongeneric_typeddict(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":  # T extends TypedDict
+    return _checkcast_typeddict(
+        tp, tp, value, options, _typeddict_annotations(tp, options.eval)
+    )
+
+
+@_register_checkcast_handler(classes=[NewType])  # type: ignore[list-item]  # mypy
+def _checkcast_newtype(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    if options.strict:
+        raise _newtype_not_supported_error(tp, options)
+    else:
+        supertype = tp.__supertype__  # type: ignore[attr-defined]  # mypy
+        return _checkcast_inner(supertype, value, options)
+
+
+@_register_checkcast_handler(classes=[TypeVar])
+def _checkcast_typevar(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    raise _typevar_not_supported_error(options)
+
+
+@_register_checkcast_handler(classes=[type(Any), type(NoReturn)])
+def _checkcast_special_form(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    if tp is Any:
+        return None
+
+    if tp is Never or tp is NoReturn:
+        return _rejection(tp, value, options)
+
+    return _checkcast_other(tp, value, options)
+
+
+@_register_checkcast_handler(classes=[TypeAliasType])
+def _checkcast_type_alias(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    alias_value = _type_alias_value(tp)
+    if options.sampler is None:
+        scalar_types = _json_scalar_types(tp)
+        if scalar_types is not None:
+            quiet_options = options._replace(explain=False)
+            if _is_json_value(
+                value,
+                scalar_types,
+                lambda v: _checkcast_inner(alias_value, v, quiet_options) is None,
+            ):
+                return None
+            if not options.explain:
+                return _REJECTED
+            # Explain why with the same errors as if not a JSON type alias
+    return _checkcast_inner(alias_value, value, options)
+
+
+@_register_checkcast_handler(classes=[ForwardRef])
+def _checkcast_forwardref(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    raise UnresolvedForwardRefError()
+
+
+def _checkcast_other(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    """
+    Checks a type form which matches no registered handler,
+    such as an instance of a subclass of a class with a registered handler.
+    """
+    type_origin = get_origin(tp)
 
     if isinstance(type_origin, TypeAliasType):  # type: ignore[16]  # pyre
-        if len(type_origin.__type_params__) > 0:
-            substitutions = dict(
-                zip(
-                    type_origin.__type_params__,
-                    get_args(tp) + ((Any,) * len(type_origin.__type_params__)),
-                )
-            )  # type: Dict[object, object]
-            new_tp = _substitute(tp.__value__, substitutions)  # type: ignore[attr-defined]  # mypy
-        else:
-            new_tp = tp.__value__  # type: ignore[attr-defined]  # mypy
-        return _checkcast_inner(new_tp, value, options)  # type: ignore[16]  # pyre
+        return _checkcast_type_alias_alias(tp, value, options)
 
     # NOTE: Must come before the generic _GenericAlias check
     if _is_typed_dict(type_origin):  # T[X1, X2, ...] where T extends TypedDict
-        # Build substitution map from TypeVars to concrete types
-        type_params = getattr(type_origin, "__parameters__", ())
-        type_args = get_args(tp)
-        typevar_substitutions = dict(
-            zip(type_params, type_args)
-        )  # type: Dict[object, object]
-        return _checkcast_typeddict(
-            tp, type_origin, value, options, typevar_substitutions
-        )
+        return _checkcast_generic_typeddict(tp, value, options)
 
     if isinstance(tp, _GenericAlias):  # type: ignore[16]  # pyre
-        raise TypeNotSupportedError(
-            f"{options.funcname} does not know how to recognize generic type "
-            f"{type_repr(type_origin)}."
-        )
+        raise _generic_not_supported_error(type_origin, options)
 
     if _is_typed_dict(tp):  # T extends TypedDict
-        return _checkcast_typeddict(tp, tp, value, options, {})
+        return _checkcast_nongeneric_typeddict(tp, value, options)
 
     if _is_newtype(tp):
-        if options.strict:
-            supertype_repr = type_repr(tp.__supertype__)  # type: ignore[attr-defined]  # mypy
-            tp_name_repr = repr(tp.__name__)  # type: ignore[attr-defined]  # mypy
-            raise TypeNotSupportedError(
-                f"{options.funcname} cannot reliably determine whether value is "
-                f"a NewType({tp_name_repr}, {supertype_repr}) because "
-                f"NewType wrappers are erased at runtime "
-                f"and are indistinguishable from their supertype. "
-                f"Consider using {options.funcname}(..., strict=False) to treat "
-                f"NewType({tp_name_repr}, {supertype_repr}) "
-                f"like {supertype_repr}."
-            )
-        else:
-            supertype = tp.__supertype__  # type: ignore[attr-defined]  # mypy
-            return _checkcast_inner(supertype, value, options)
+        return _checkcast_newtype(tp, value, options)
 
     if isinstance(tp, TypeVar):
-        raise TypeNotSupportedError(
-            f"{options.funcname} cannot reliably determine whether value matches a TypeVar."
-        )
+        return _checkcast_typevar(tp, value, options)
 
     if tp is Any:
         return None
 
     if tp is Never or tp is NoReturn:
-        return ValidationError(tp, value)
+        return _rejection(tp, value, options)
 
     if isinstance(tp, TypeAliasType):  # type: ignore[16]  # pyre
-        if len(tp.__type_params__) > 0:  # type: ignore[16]  # pyre
-            substitutions = dict(
-                zip(tp.__type_params__, ((Any,) * len(tp.__type_params__)))
-            )
-            new_tp = _substitute(tp.__value__, substitutions)
-        else:
-            new_tp = tp.__value__
-        return _checkcast_inner(new_tp, value, options)  # type: ignore[16]  # pyre
+        return _checkcast_type_alias(tp, value, options)
 
     if isinstance(tp, ForwardRef):
-        raise UnresolvedForwardRefError()
+        return _checkcast_forwardref(tp, value, options)
 
     if isinstance(value, tp):  # type: ignore[arg-type]  # mypy
         return None
     else:
-        return ValidationError(tp, value)
+        return _rejection(tp, value, options)
 
 
 class TypeNotSupportedError(TypeError):
@@ -802,51 +1101,165 @@ class UnresolvedForwardRefError(TypeError):
     pass
 
 
-def _checkcast_typeddict(
-    tp: object,
-    typed_dict_class: object,
-    value: object,
-    options: _TrycastOptions,
-    typevar_substitutions: Dict[object, object],
+def _checkcast_callable_arity(
+    tp: object, value: object, param_count: int, *, explain: bool = True
 ) -> "Optional[ValidationError]":
     """
-    Check if value matches a TypedDict type.
-
-    Parameters:
-    * tp -- The original type annotation (for error messages)
-    * typed_dict_class -- The TypedDict class (possibly parameterized origin)
-    * value -- The value to check
-    * options -- Validation options
-    * typevar_substitutions -- Mapping from TypeVars to concrete types (empty dict if not generic)
+    Checks whether value is a callable that accepts exactly
+    `param_count` positional arguments.
     """
-    if not isinstance(value, Mapping):
-        return ValidationError(tp, value)
-
-    if options.eval:
-        resolved_annotations = get_type_hints(  # does use eval()
-            typed_dict_class  # type: ignore[arg-type]  # mypy
-        )  # resolve ForwardRefs in typed_dict_class.__annotations__
+    if callable(value):
+        try:
+            sig = _inspect_signature(value)
+        except TypeError:
+            # Not a callable
+            return ValidationError(tp, value) if explain else _REJECTED
+        except ValueError as f:
+            # Unable to introspect signature for value.
+            # It might be a built-in function that lacks signature support.
+            # Assume conservatively that value does NOT match the requested type.
+            if not explain:
+                return _REJECTED
+            e = ValidationError(tp, value)
+            e.__cause__ = f
+            return e
+        else:
+            sig_min_param_count = 0  # type: float
+            sig_max_param_count = 0  # type: float
+            for expected_param in sig.parameters.values():
+                if (
+                    expected_param.kind == Parameter.POSITIONAL_ONLY
+                    or expected_param.kind == Parameter.POSITIONAL_OR_KEYWORD
+                ):
+                    if expected_param.default is Parameter.empty:
+                        sig_min_param_count += 1
+                    sig_max_param_count += 1
+                elif expected_param.kind == Parameter.VAR_POSITIONAL:
+                    sig_max_param_count = math.inf
+
+            if sig_min_param_count <= param_count <= sig_max_param_count:
+                return None
+            else:
+                return ValidationError(tp, value) if explain else _REJECTED
     else:
-        resolved_annotations = typed_dict_class.__annotations__  # type: ignore[attr-defined]  # mypy
+        return ValidationError(tp, value) if explain else _REJECTED
+
+
+def _callable_return_type_not_supported_error(
+    tp: object, options: _TrycastOptions
+) -> TypeNotSupportedError:
+    return TypeNotSupportedError(
+        f"{options.funcname} cannot reliably determine whether value is "
+        f"a {type_repr(tp)} because "
+        f"callables at runtime do not always have a "
+        f"declared return type. "
+        f"Consider using {options.funcname}(Callable, value) instead."
+    )
+
+
+def _callable_param_types_not_supported_error(
+    tp: object, param_types: List[object], options: _TrycastOptions
+) -> TypeNotSupportedError:
+    return TypeNotSupportedError(
+        f"{options.funcname} cannot reliably determine whether value is "
+        f"a {type_repr(tp)} because "
+        f"callables at runtime do not always have "
+        f"declared parameter types. "
+        f"Consider using {options.funcname}("
+        f"Callable[{','.join('Any' * len(param_types))}, Any], value) "
+        f"instead."
+    )
+
+
+def _generic_not_supported_error(
+    type_origin: object, options: _TrycastOptions
+) -> TypeNotSupportedError:
+    return TypeNotSupportedError(
+        f"{options.funcname} does not know how to recognize generic type "
+        f"{type_repr(type_origin)}."
+    )
+
+
+def _newtype_not_supported_error(
+    tp: object, options: _TrycastOptions
+) -> TypeNotSupportedError:
+    supertype_repr = type_repr(tp.__supertype__)  # type: ignore[attr-defined]  # mypy
+    tp_name_repr = repr(tp.__name__)  # type: ignore[attr-defined]  # mypy
+    return TypeNotSupportedError(
+        f"{options.funcname} cannot reliably determine whether value is "
+        f"a NewType({tp_name_repr}, {supertype_repr}) because "
+        f"NewType wrappers are erased at runtime "
+        f"and are indistinguishable from their supertype. "
+        f"Consider using {options.funcname}(..., strict=False) to treat "
+        f"NewType({tp_name_repr}, {supertype_repr}) "
+        f"like {supertype_repr}."
+    )
+
+
+def _typevar_not_supported_error(options: _TrycastOptions) -> TypeNotSupportedError:
+    return TypeNotSupportedError(
+        f"{options.funcname} cannot reliably determine whether value matches a TypeVar."
+    )
+
+
+def _checkcast_typeddict(
+    tp: object,
+    typed_dict_class: object,
+    value: object,
+    options: _TrycastOptions,
+    resolved_annotations: Dict[str, object],
+) -> "Optional[ValidationError]":
+    """
+    Check if value matches a TypedDict type.
+
+    Parameters:
+    * tp -- The original type annotation (for error messages)
+    * typed_dict_class -- The TypedDict class (possibly parameterized origin)
+    * value -- The value to check
+    * options -- Validation options
+    * resolved_annotations -- The annotations of tp, with any type arguments
+      of tp substituted for TypeVars
+    """
+    if type(value) is not dict and not isinstance(value, CMapping):
+        return _rejection(tp, value, options)
 
     # {typing, typing_extensions}.TypedDict
     required_keys = typed_dict_class.__required_keys__  # type: ignore[attr-defined, union-attr]  # mypy
 
+    if type(value) is dict:
+        if value.keys() >= required_keys:
+            # All required keys are present
+            required_keys = ()
+        elif not options.explain:
+            # Reject before checking any field
+            return _REJECTED
+
     for k, v in value.items():
         V = resolved_annotations.get(k, _MISSING)
         if V is not _MISSING:
-            # Apply typevar substitutions to the annotation type
-            V_substituted = _substitute(V, typevar_substitutions)
-            e = _checkcast_inner(V_substituted, v, options)
+            e = _checkcast_inner(V, v, options)
             if e is not None:
+                if not options.explain:
+                    return e
                 return ValidationError(
                     tp,
                     value,
                     _causes=[e._with_prefix(_LazyStr(lambda: f"At key {k!r}"))],
                 )
 
+    return _checkcast_required_keys(tp, value, required_keys, options)
+
+
+def _checkcast_required_keys(
+    tp: object,
+    value: object,
+    required_keys: Iterable[str],
+    options: _TrycastOptions,
+) -> "Optional[ValidationError]":
     for k in required_keys:
-        if k not in value:
+        if k not in value:  # type: ignore[operator]  # mypy
+            if not options.explain:
+                return _REJECTED
             return ValidationError(
                 tp,
                 value,
@@ -859,7 +1272,513 @@ def _checkcast_typeddict(
     return None
 
 
+class _IdentityCache(Generic[_R]):
+    """
+    Wraps a function whose first argument is a type form,
+    caching its result for each identical set of arguments.
+
+    Unlike functools.lru_cache, does not hash the type form,
+    which costs as much as checking a value against a large
+    Literal[...] or Union[...]. Holds strong references to cached type forms
+    to keep their id()s unique, so forgets everything whenever it is full.
+
+    Safe to call from many threads at once, including on free-threaded
+    builds of Python, without taking a lock: Each lookup and each update
+    is a single dict operation. Threads that miss at the same time may
+    each call the wrapped function, which must therefore be pure.
+    """
+
+    def __init__(self, func: Callable[..., _R], maxsize: int) -> None:
+        self._func = func
+        self._maxsize = maxsize
+        self._entries = {}  # type: Dict[Tuple[object, ...], Tuple[object, _R]]
+
+    def __call__(self, tp: object, *args: object) -> _R:
+        key = (id(tp), *args)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is tp:
+            return entry[1]
+        result = self._func(tp, *args)
+        if len(self._entries) >= self._maxsize:
+            self._entries.clear()
+        self._entries[key] = (tp, result)
+        return result
+
+    def cache_clear(self) -> None:
+        self._entries.clear()
+
+
+class _ValueCache(Generic[_R]):
+    """
+    Wraps a function whose arguments are hashable,
+    caching its result for each equal set of arguments.
+    Forgets everything whenever it is full.
+
+    Unlike functools.lru_cache, which on free-threaded builds of Python
+    makes every caller of the wrapped function take the same lock,
+    a hit is a single dict lookup, which takes no lock.
+    Threads that miss at the same time may each call the wrapped function,
+    which must therefore be pure.
+    """
+
+    def __init__(self, func: Callable[..., _R], maxsize: int = 128) -> None:
+        self._func = func
+        self._maxsize = maxsize
+        self._entries = {}  # type: Dict[Tuple[object, ...], _R]
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args: object) -> _R:
+        try:
+            return self._entries[args]
+        except KeyError:
+            pass
+        result = self._func(*args)
+        if len(self._entries) >= self._maxsize:
+            self._entries.clear()
+        self._entries[args] = result
+        return result
+
+    def cache_clear(self) -> None:
+        self._entries.clear()
+
+
+def _literal_keys_uncached(tp: object) -> Optional[FrozenSet[Tuple[type, object]]]:
+    try:
+        return frozenset([(type(literal), literal) for literal in _literals_of(tp)])
+    except TypeError:  # unhashable literal
+        return None
+
+
+# Returns the (type, value) of each value of the specified Literal[...],
+# or of each Literal[...] member of the specified Union[...].
+# Returns None if any such value is unhashable.
+_literal_keys = _IdentityCache(
+    _literal_keys_uncached, maxsize=1024
+)  # type: _IdentityCache[Optional[FrozenSet[Tuple[type, object]]]]
+
+
+def _is_literal_value(tp: object, value: object) -> bool:
+    """
+    Returns whether value is one of the values of the specified Literal[...]
+    or of the Literal[...] members of the specified Union[...].
+
+    Per PEP 586, a value must have the same type as a literal to match it,
+    so True does not match Literal[1] and 1 does not match Literal[True].
+    """
+    literal_keys = _literal_keys(tp)
+    if literal_keys is None:
+        return _is_literal_value_by_scan(_literals_of(tp), value)
+    elif len(literal_keys) == 0:  # Union[...] without Literal[...] members
+        # NOTE: Don't hash the value, which may be costly or fail
+        return False
+    else:
+        return _is_literal_value_by_key(literal_keys, value)
+
+
+def _literals_of(tp: object) -> List[object]:
+    if get_origin(tp) is Literal:  # Literal[...]
+        return list(get_args(tp))
+    else:  # Union[...]
+        return [
+            literal
+            for T in get_args(tp)
+            if get_origin(T) is Literal
+            for literal in get_args(T)
+        ]
+
+
+def _is_literal_value_by_key(
+    literal_keys: FrozenSet[Tuple[type, object]], value: object
+) -> bool:
+    try:
+        return (type(value), value) in literal_keys
+    except Exception:  # unhashable value, or its __hash__ failed
+        return _is_literal_value_by_scan(
+            [literal for (_, literal) in literal_keys], value
+        )
+
+
+def _is_literal_value_by_scan(literals: Sequence[object], value: object) -> bool:
+    for literal in literals:
+        if type(value) is type(literal) and value == literal:
+            return True
+    return False
+
+
+# Caches the result of get_type_hints() for each TypedDict class.
+#
+# Weakly keyed so that TypedDicts defined inside functions can still be
+# garbage collected. Cleared by clear_caches().
+#
+# Safe to use from many threads without a lock because each get() and each
+# update is a single operation on the underlying dict. Threads that miss
+# at the same time may each resolve the same annotations.
+_resolved_annotations_cache = (
+    weakref.WeakKeyDictionary()
+)  # type: weakref.WeakKeyDictionary[object, Dict[str, object]]
+
+
+def _typeddict_annotations(typed_dict_class: object, eval: bool) -> Dict[str, object]:
+    """
+    Returns the annotations of the specified TypedDict class,
+    which must not be altered by the caller.
+    """
+    if eval:
+        resolved_annotations = _resolved_annotations_cache.get(typed_dict_class)
+        if resolved_annotations is None:
+            resolved_annotations = get_type_hints(  # does use eval()
+                typed_dict_class  # type: ignore[arg-type]  # mypy
+            )  # resolve ForwardRefs in typed_dict_class.__annotations__
+            _resolved_annotations_cache[typed_dict_class] = resolved_annotations
+        return resolved_annotations
+    else:
+        return typed_dict_class.__annotations__  # type: ignore[attr-defined]  # mypy
+
+
+def _specialized_typeddict_annotations_uncached(
+    tp: object, eval: bool
+) -> Dict[str, object]:
+    type_origin = get_origin(tp)
+    # Build substitution map from TypeVars to concrete types
+    type_params = getattr(type_origin, "__parameters__", ())
+    type_args = get_args(tp)
+    typevar_substitutions = dict(
+        zip(type_params, type_args)
+    )  # type: Dict[object, object]
+    return {
+        k: _substitute(V, typevar_substitutions)
+        for (k, V) in _typeddict_annotations(type_origin, eval).items()
+    }
+
+
+# Returns the annotations of the specified parameterized generic TypedDict,
+# such as Point[int], with its type arguments substituted for its TypeVars.
+# The result must not be altered by the caller.
+#
+# NOTE: Cached so that checking a parameterized generic TypedDict does not
+#       allocate new type forms for its fields, which would also defeat
+#       caches keyed by the identity of those type forms
+_specialized_typeddict_annotations = _IdentityCache(
+    _specialized_typeddict_annotations_uncached, maxsize=1024
+)  # type: _IdentityCache[Dict[str, object]]
+
+
+def _type_alias_value_uncached(tp: object) -> object:
+    value = _expand_type_alias(tp)
+
+    # Reject an alias which is only ever an alias of itself, such as
+    # `type X = X`, rather than expanding it forever when checking a value
+    expanded_aliases = [_alias_of(tp)]
+    alias_value = value
+    while isinstance(_alias_of(alias_value), TypeAliasType):  # type: ignore[16]  # pyre
+        if _alias_of(alias_value) in expanded_aliases:
+            raise TypeNotSupportedError(
+                f"Type alias {format_type_str(tp)} is defined only "
+                f"in terms of itself, so no value is in its shape."
+            )
+        expanded_aliases.append(_alias_of(alias_value))
+        alias_value = _expand_type_alias(alias_value)
+
+    return value
+
+
+def _alias_of(tp: object) -> object:
+    """
+    Returns the TypeAliasType A of a type form A or A[X1, X2, ...].
+    """
+    return tp if isinstance(tp, TypeAliasType) else get_origin(tp)  # type: ignore[16]  # pyre
+
+
+def _expand_type_alias(tp: object) -> object:
+    if isinstance(tp, TypeAliasType):  # A
+        alias = tp  # type: Any
+        type_args = ()  # type: Tuple[object, ...]
+    else:  # A[X1, X2, ...]
+        alias = get_origin(tp)
+        type_args = get_args(tp)
+    if len(alias.__type_params__) > 0:
+        # Substitute Any for any missing type arguments
+        substitutions = dict(
+            zip(
+                alias.__type_params__,
+                type_args + ((Any,) * len(alias.__type_params__)),
+            )
+        )  # type: Dict[object, object]
+        return _substitute(alias.__value__, substitutions)
+    else:
+        return alias.__value__
+
+
+# Returns the value of the specified TypeAliasType A, or A[X1, X2, ...],
+# with its type arguments (or Any) substituted for its type parameters.
+_type_alias_value = _IdentityCache(
+    _type_alias_value_uncached, maxsize=1024
+)  # type: _IdentityCache[object]
+
+
+class _UnionDiscriminator(NamedTuple):
+    # A key which is required by every tagged member
+    key: str
+    # The only tagged member that a Mapping can match,
+    # for the (type, value) of each possible value of its tag key
+    member_for_tag: Dict[Tuple[type, object], object]
+    # Members which are not tagged by the key, in order
+    untagged_members: Tuple[object, ...]
+
+
+def _union_discriminator_uncached(
+    tp: object, eval: bool
+) -> Optional[_UnionDiscriminator]:
+    """
+    If the specified Union is a tagged union, returns how to locate the only
+    member that a Mapping value could match by looking up the value of
+    its tag key. Otherwise returns None.
+
+    A member is tagged by a key if it is a TypedDict which requires that key
+    and declares its type as a Literal[...]. A key is only used as a tag
+    if it tags at least 2 members and no two members share a literal value.
+    """
+    members = get_args(tp)
+    annotations_for = {}  # type: Dict[object, Dict[str, object]]
+    for M in members:
+        if _is_typed_dict(M):
+            try:
+                annotations_for[M] = _typeddict_annotations(M, eval)
+            except Exception:
+                # Report any problem when the member itself is checked
+                return None
+
+    candidate_keys = {}  # type: Dict[str, None]
+    for M, annotations in annotations_for.items():
+        for k, V in annotations.items():
+            if k in M.__required_keys__ and get_origin(V) is Literal:  # type: ignore[attr-defined]  # mypy
+                candidate_keys[k] = None
+
+    best = None  # type: Optional[_UnionDiscriminator]
+    best_tagged_count = 1
+    for k in candidate_keys:
+        member_for_tag = {}  # type: Dict[Tuple[type, object], object]
+        tagged_members = []
+        ambiguous = False
+        try:
+            for M, annotations in annotations_for.items():
+                V = annotations.get(k)
+                if not (k in M.__required_keys__ and get_origin(V) is Literal):  # type: ignore[attr-defined]  # mypy
+                    continue
+                for literal in get_args(V):
+                    tag = (type(literal), literal)
+                    if member_for_tag.setdefault(tag, M) is not M:
+                        ambiguous = True
+                tagged_members.append(M)
+        except TypeError:  # unhashable literal
+            continue
+        if ambiguous:
+            continue
+        if len(tagged_members) > best_tagged_count:
+            best_tagged_count = len(tagged_members)
+            best = _UnionDiscriminator(
+                k,
+                member_for_tag,
+                tuple([M for M in members if M not in tagged_members]),
+            )
+    return best
+
+
+_union_discriminator = _IdentityCache(
+    _union_discriminator_uncached, maxsize=1024
+)  # type: _IdentityCache[Optional[_UnionDiscriminator]]
+
+
+# Exact types which are never registered with a collections.abc class
+# after the fact, so whose instances are known not to be instances of
+# any collections.abc class they are not already instances of
+_TYPES_WITH_FIXED_ABCS = frozenset(
+    [
+        type(None),
+        bool,
+        int,
+        float,
+        complex,
+        str,
+        bytes,
+        bytearray,
+        list,
+        tuple,
+        dict,
+        set,
+        frozenset,
+        range,
+    ]
+)
+
+# Concrete collection class that each value must be an instance of,
+# for each origin of a collection type
+_CONCRETE_CLASS_FOR_ORIGIN = {
+    list: list,
+    List: list,
+    set: set,
+    Set: set,
+    frozenset: frozenset,
+    FrozenSet: frozenset,
+    tuple: tuple,
+    Tuple: tuple,
+    dict: dict,
+    Dict: dict,
+}  # type: Dict[object, type]
+
+# collections.abc class that each value must be an instance of,
+# for each origin of a collection type
+_ABC_FOR_ORIGIN = {
+    Sequence: CSequence,
+    CSequence: CSequence,
+    MutableSequence: CMutableSequence,
+    CMutableSequence: CMutableSequence,
+    Mapping: CMapping,
+    CMapping: CMapping,
+    MutableMapping: CMutableMapping,
+    CMutableMapping: CMutableMapping,
+}  # type: Dict[object, type]
+
+# Maximum number of distinct types of values for which a _UnionTypeDispatch
+# remembers which members to check. Real traffic checks a handful of types.
+_MAX_TYPES_PER_UNION_DISPATCH = 64
+
+
+def _union_member_type_filter(
+    M: object, eval: bool
+) -> Optional[Callable[[type], bool]]:
+    """
+    Returns a function which returns False for each exact type whose
+    instances can never be in the shape of the specified member of a Union,
+    or None if instances of any type might be.
+
+    Raises if M is a TypedDict whose annotations cannot be resolved.
+    """
+    if M is None or M is type(None):
+        return lambda t: t is type(None)
+    if type(M) is type:  # a plain class
+        if M is object:
+            return None
+        return lambda t: _is_element_class_assignable(t, M)
+    type_origin = get_origin(M)
+    concrete_class = _CONCRETE_CLASS_FOR_ORIGIN.get(type_origin)
+    if concrete_class is not None:  # List[T], Dict[K, V], ...
+        return lambda t: issubclass(t, concrete_class)
+    abc = _ABC_FOR_ORIGIN.get(type_origin)
+    if abc is None and (_is_typed_dict(M) or _is_typed_dict(type_origin)):
+        # Resolve annotations now, as checking the member would
+        if _is_typed_dict(M):
+            _typeddict_annotations(M, eval)
+        else:
+            _specialized_typeddict_annotations(M, eval)
+        abc = CMapping
+    if abc is not None:  # Sequence[T], Mapping[K, V], TypedDicts, ...
+        return lambda t: t not in _TYPES_WITH_FIXED_ABCS or issubclass(t, abc)
+    if type_origin is Literal:
+        literal_types = frozenset([type(literal) for literal in get_args(M)])
+        return lambda t: t in literal_types
+    return None
+
+
+def _union_type_filters_uncached(
+    tp: object, eval: bool
+) -> Optional[Tuple[Optional[Callable[[type], bool]], ...]]:
+    """
+    Returns the _union_member_type_filter() of each member of the specified
+    Union, or None if no member can be skipped based on the type of a value.
+    """
+    try:
+        type_filters = tuple([_union_member_type_filter(M, eval) for M in get_args(tp)])
+    except Exception:
+        # Report any problem when the member itself is checked
+        return None
+    if all([f is None for f in type_filters]):
+        return None
+    return type_filters
+
+
+_union_type_filters = _IdentityCache(
+    _union_type_filters_uncached, maxsize=1024
+)  # type: _IdentityCache[Optional[Tuple[Optional[Callable[[type], bool]], ...]]]
+
+
+def _may_claim_another_class(t: type) -> bool:
+    """
+    Returns whether instances of the specified type may report a different
+    class than their type, which isinstance() also consults.
+    """
+    return any(["__class__" in vars(c) for c in t.__mro__[:-1]])
+
+
+class _UnionTypeDispatch(Generic[_R]):
+    """
+    Locates the members of a Union which might match a value,
+    based only on the exact type of the value, so that members which
+    could never match it (like a List[T] member for a dict value)
+    are not checked at all.
+
+    Each member is represented by an item, such as the member itself
+    or the plan which checks it.
+    """
+
+    __slots__ = ("_items", "_type_filters", "_entry_for_type", "accepts_none")
+
+    def __init__(
+        self,
+        items: Tuple[_R, ...],
+        type_filters: Tuple[Optional[Callable[[type], bool]], ...],
+    ) -> None:
+        self._items = items
+        self._type_filters = type_filters
+        # The items which might match and whether each item might match,
+        # for each exact type of value
+        self._entry_for_type = (
+            {}
+        )  # type: Dict[type, Tuple[Tuple[_R, ...], Tuple[bool, ...]]]
+        # Whether None is in the shape of some member
+        self.accepts_none = any([f is not None and f(type(None)) for f in type_filters])
+
+    def entry_for(self, t: type) -> Tuple[Tuple[_R, ...], Tuple[bool, ...]]:
+        """
+        Returns the items which might match a value of the exact type `t`,
+        in order, and whether each item might match such a value.
+        """
+        entry = self._entry_for_type.get(t)
+        if entry is None:
+            if _may_claim_another_class(t):
+                may_match = tuple([True for _ in self._items])
+            else:
+                may_match = tuple([f is None or f(t) for f in self._type_filters])
+            entry = (
+                tuple([item for (item, m) in zip(self._items, may_match) if m]),
+                may_match,
+            )
+            if len(self._entry_for_type) >= _MAX_TYPES_PER_UNION_DISPATCH:
+                self._entry_for_type.clear()
+            self._entry_for_type[t] = entry
+        return entry
+
+
+def _union_type_dispatch_uncached(
+    tp: object, eval: bool
+) -> "Optional[_UnionTypeDispatch[object]]":
+    type_filters = _union_type_filters(tp, eval)
+    if type_filters is None:
+        return None
+    return _UnionTypeDispatch(get_args(tp), type_filters)
+
+
+# Returns a _UnionTypeDispatch whose items are the members of
+# the specified Union, or None if no member can ever be skipped
+_union_type_dispatch = _IdentityCache(
+    _union_type_dispatch_uncached, maxsize=1024
+)  # type: _IdentityCache[Optional[_UnionTypeDispatch[object]]]
+
+
 def _substitute(tp: object, substitutions: Dict[object, object]) -> object:
+    if len(substitutions) == 0:
+        # Preserve the identity of tp, which caches may be keyed by
+        return tp
     if isinstance(tp, TypeVar):
         return substitutions.get(tp, tp)
     if isinstance(tp, GenericAlias):  # ex: tuple[T1, T2]
@@ -886,6 +1805,36 @@ def _substitute(tp: object, substitutions: Dict[object, object]) -> object:
     return tp
 
 
+# For each collection type that values are checked against, the exact types
+# whose instances are always instances of that collection type.
+#
+# Checking the exact type of a value first is much faster than isinstance()
+# for the collections.abc classes, whose ABCMeta.__instancecheck__ is slow
+# even when its per-class cache hits. Values of other types still fall back
+# to isinstance(), whose cache respects later ABC.register() calls.
+_EXACT_INSTANCE_TYPES = {
+    list: frozenset([list]),
+    set: frozenset([set]),
+    frozenset: frozenset([frozenset]),
+    tuple: frozenset([tuple]),
+    dict: frozenset([dict]),
+    CSequence: frozenset([list, tuple, str, bytes, range]),
+    CMutableSequence: frozenset([list]),
+    CMapping: frozenset([dict]),
+    CMutableMapping: frozenset([dict]),
+}  # type: Dict[type, FrozenSet[type]]
+
+
+def _is_instance(value: object, collection_type: type) -> bool:
+    """
+    Returns isinstance(value, collection_type)
+    for a collection type in _EXACT_INSTANCE_TYPES.
+    """
+    return type(value) in _EXACT_INSTANCE_TYPES[collection_type] or isinstance(
+        value, collection_type
+    )
+
+
 def _checkcast_listlike(
     tp: object,
     value: object,
@@ -895,7 +1844,7 @@ def _checkcast_listlike(
     covariant_t: bool = False,
     t_ellipsis: bool = False,
 ) -> "Optional[ValidationError]":
-    if isinstance(value, listlike_type):
+    if _is_instance(value, listlike_type):
         T_ = get_args(tp)
 
         if len(T_) == 0:
@@ -906,16 +1855,24 @@ def _checkcast_listlike(
                 if len(T_) == 2 and T_[1] is Ellipsis:
                     (T, _) = T_
                 else:
-                    return ValidationError(tp, value)
+                    return _rejection(tp, value, options)
             else:
                 (T,) = T_
 
         if _is_simple_typevar(T, covariant=covariant_t):
             pass
+        elif _are_elements_known_to_be(value, T):
+            pass
+        elif options.sampler is not None and options.sampler.applies_to(value):
+            return _checkcast_sampled_sequence(tp, value, T, options, options.sampler)
+        elif _are_elements_instances_of(value, T):
+            pass
         else:
-            for i, x in enumerate(value):  # type: ignore[reportArgumentType]  # pyright
+            for i, x in enumerate(value):  # type: ignore[arg-type, var-annotated, reportArgumentType]  # mypy, pyright
                 e = _checkcast_inner(T, x, options)
                 if e is not None:
+                    if not options.explain:
+                        return e
                     return ValidationError(
                         tp,
                         value,
@@ -923,222 +1880,4105 @@ def _checkcast_listlike(
                     )
 
         return None
+    elif listlike_type is CSequence and _is_ndarray_sequence(value):
+        return _checkcast_ndarray_sequence(tp, value, options)
     else:
-        return ValidationError(tp, value)
+        return _rejection(tp, value, options)
 
 
-def _checkcast_dictlike(
-    tp: object,
-    value: object,
-    dictlike_type: Type,
-    options: _TrycastOptions,
-    *,
-    covariant_v: bool = False,
-) -> "Optional[ValidationError]":
-    if isinstance(value, dictlike_type):
-        K_V = get_args(tp)
+# Class of the elements of an array.array or 1-dimensional memoryview,
+# for each array.array typecode or memoryview struct format
+_ELEMENT_CLASS_FOR_FORMAT = {
+    **dict.fromkeys("bBhHiIlLqQnN", int),
+    **dict.fromkeys("efd", float),
+    "?": bool,
+    "c": bytes,
+    **dict.fromkeys("uw", str),
+}  # type: Dict[str, type]
 
-        if len(K_V) == 0:
-            (K, V) = (
-                _SimpleTypeVar,
-                _SimpleTypeVarCo if covariant_v else _SimpleTypeVar,
-            )
-        else:
-            (K, V) = K_V
 
-        if _is_simple_typevar(K) and _is_simple_typevar(V, covariant=covariant_v):
-            pass
-        else:
-            for k, v in value.items():  # type: ignore[reportAttributeAccessIssue]  # pyright
-                e = _checkcast_inner(K, k, options)
-                if e is not None:
-                    return ValidationError(
-                        tp,
-                        value,
-                        _causes=[e._with_prefix(_LazyStr(lambda: f"Key {k!r}"))],
-                    )
-                e = _checkcast_inner(V, v, options)
-                if e is not None:
-                    return ValidationError(
-                        tp,
-                        value,
-                        _causes=[e._with_prefix(_LazyStr(lambda: f"At key {k!r}"))],
-                    )
+def _memoryview_element_class(value: memoryview) -> Optional[type]:
+    if value.ndim != 1:
+        # Iterating over other memoryviews raises
         return None
-    else:
-        return ValidationError(tp, value)
+    return _ELEMENT_CLASS_FOR_FORMAT.get(value.format.lstrip("@=<>!"))
 
 
-def _is_simple_typevar(T: object, covariant: bool = False) -> bool:
-    return (
-        isinstance(T, TypeVar)
-        and T.__constraints__ == ()
-        and T.__covariant__ == covariant
-        and T.__contravariant__ is False
-        and T.__constraints__ == ()
-    )
+# For each exact sequence type, a function which returns the class of
+# every element of a sequence of that type, or None if unknown.
+# Subclasses are not included because they may override __iter__.
+_ELEMENT_CLASS_GETTERS = {
+    str: lambda value: str,
+    bytes: lambda value: int,
+    bytearray: lambda value: int,
+    range: lambda value: int,
+    array.array: lambda value: _ELEMENT_CLASS_FOR_FORMAT.get(value.typecode),
+    memoryview: _memoryview_element_class,
+}  # type: Dict[type, Callable[[Any], Optional[type]]]
 
 
-# ------------------------------------------------------------------------------
-# ValidationError
+def _are_elements_known_to_be(value: object, T: object) -> bool:
+    """
+    Returns True if every element of `value` is known to be in the shape of `T`
+    without iterating over `value`, or False if unknown.
 
+    Elements are known for str, bytes, bytearray, range, array.array,
+    and memoryview values from the value's type, typecode, or format.
+    """
+    element_class_getter = _ELEMENT_CLASS_GETTERS.get(type(value))
+    if element_class_getter is None or type(T) is not type:
+        return False
+    element_class = element_class_getter(value)
+    if element_class is None:
+        return False
+    return _is_element_class_assignable(element_class, T)
 
-if sys.version_info >= (3, 11):
-    from typing import Self as _SelfValidationError
-else:
-    _SelfValidationError = TypeVar("_SelfValidationError", bound="ValidationError")
 
+# Minimum size of a collection whose elements are checked in bulk by
+# _are_elements_instances_of() rather than one at a time
+_BULK_CHECK_MIN_SIZE = 16
 
-class ValidationError(ValueError):
-    # === Init ===
+# Exact types of collections whose elements may be checked in bulk
+_BULK_CHECKED_TYPES = frozenset([list, tuple, set, frozenset])
 
-    def __init__(
-        self,
-        tp: object,
-        value: object,
-        /,
-        # NOTE: Inner type and structure for representing "cause" information
-        #       is private and may change in the future.
-        _causes: "Optional[Sequence[ValidationError]]" = None,
-        *,
-        _message: "Optional[_LazyStr]" = None,
-    ) -> None:
-        """
-        Creates a ValidationError related to the specified value not matching
-        the expected specified type.
 
-        Parameters (positional-only):
-        * tp -- the expected type of the specified value.
-        * value -- a value.
-        """
-        if _causes is None:
-            _causes = []
-        if _message is None:
-            _message = _LazyStr(
-                lambda: f"Expected {format_type_str(tp)} but found {value!r}"
-            )
-        super().__init__(_message)
-        self._tp = tp
-        self._value = value
-        self._causes = _causes
-        self._prefix = None  # type: Optional[_LazyStr]
+def _are_elements_instances_of(value: object, T: object) -> bool:
+    """
+    Returns True if every element of the list, tuple, set, or frozenset `value`
+    is in the shape of `T`, where `T` is a plain class such as int or str,
+    or False if some element may not be.
+
+    Collects the classes of all elements with C-level bulk operations,
+    which is several times faster than checking elements one at a time.
+    Callers must still check elements one at a time if False is returned,
+    to find the first element that is not in the shape of `T`.
+    """
+    if (
+        type(T) is not type
+        or type(value) not in _BULK_CHECKED_TYPES
+        or len(value) < _BULK_CHECK_MIN_SIZE  # type: ignore[arg-type]  # mypy
+    ):
+        return False
+    return _are_element_classes_assignable(
+        set(map(type, value)), T  # type: ignore[call-overload]  # mypy
+    )
+
+
+def _are_items_instances_of(value: object, K: object, V: object) -> bool:
+    """
+    Returns True if every key of the dict `value` is in the shape of `K` and
+    every value is in the shape of `V`, where `K` and `V` are plain classes,
+    or False if some key or value may not be.
+
+    See _are_elements_instances_of() for details.
+    """
+    if (
+        type(K) is not type
+        or type(V) is not type
+        or type(value) is not dict
+        or len(value) < _BULK_CHECK_MIN_SIZE  # type: ignore[arg-type]  # mypy
+    ):
+        return False
+    return _are_element_classes_assignable(
+        set(map(type, value)), K  # type: ignore[call-overload]  # mypy
+    ) and _are_element_classes_assignable(
+        set(map(type, value.values())), V  # type: ignore[attr-defined]  # mypy
+    )
+
+
+def _are_element_classes_assignable(element_classes: Set[type], T: object) -> bool:
+    for element_class in element_classes:
+        if not _is_element_class_assignable(element_class, T):
+            return False
+    return True
+
+
+def _is_element_class_assignable(element_class: type, T: object) -> bool:
+    """
+    Returns whether every instance of `element_class` is in the shape of `T`,
+    where `T` is a plain class.
+    """
+    if T is float:
+        # Also accept ints and bools as valid float values
+        return issubclass(element_class, (float, int))
+    if T is complex:
+        # Also accept floats, ints, and bools as valid complex values
+        return issubclass(element_class, (complex, float, int))
+    return issubclass(element_class, T)  # type: ignore[arg-type]  # mypy
+
+
+# ------------------------------------------------------------------------------
+# JSON type aliases
+#
+# Nearly every program that parses JSON defines a recursive type alias like:
+#
+#     type JSON = None | bool | int | float | str | list[JSON] | dict[str, JSON]
+#
+# Checking a value against such an alias one Union at a time re-expands the
+# alias and tries each member at every level of the value, so values of this
+# shape are instead checked by _is_json_value() in a single loop.
+
+# Exact types of values which are in the shape of each scalar member
+# of a JSON type alias
+_EXACT_TYPES_FOR_JSON_SCALAR = {
+    type(None): frozenset([type(None)]),
+    bool: frozenset([bool]),
+    int: frozenset([int, bool]),
+    float: frozenset([float, int, bool]),
+    str: frozenset([str]),
+}  # type: Dict[object, FrozenSet[type]]
+
+
+def _json_scalar_types_uncached(tp: object) -> Optional[FrozenSet[type]]:
+    """
+    If the specified TypeAliasType is a JSON type alias, returns the exact
+    types of the scalar values in its shape. Otherwise returns None.
+
+    A JSON type alias is a Union of some of None, bool, int, float, and str,
+    together with list[A] and dict[str, A], where A is the alias itself.
+    """
+    if not isinstance(tp, TypeAliasType) or len(tp.__type_params__) > 0:  # type: ignore[16]  # pyre
+        return None
+    try:
+        alias_value = _type_alias_value(tp)
+    except Exception:
+        # Report any problem when the alias itself is checked
+        return None
+    if get_origin(alias_value) not in (Union, UnionType):
+        return None
+    scalar_types = frozenset()  # type: FrozenSet[type]
+    has_list = has_dict = False
+    for M in get_args(alias_value):
+        exact_types = _EXACT_TYPES_FOR_JSON_SCALAR.get(M)
+        if exact_types is not None:
+            scalar_types |= exact_types
+        elif get_origin(M) in (list, List) and get_args(M) == (tp,):
+            has_list = True
+        elif get_origin(M) in (dict, Dict) and get_args(M) == (str, tp):
+            has_dict = True
+        else:
+            return None
+    if not (has_list and has_dict):
+        return None
+    return scalar_types
+
+
+# Returns the exact types of the scalar values in the shape of the specified
+# JSON type alias, or None if it is not a JSON type alias
+_json_scalar_types = _IdentityCache(
+    _json_scalar_types_uncached, maxsize=1024
+)  # type: _IdentityCache[Optional[FrozenSet[type]]]
+
+
+# Number of lists and dicts that _is_json_value() walks before it starts
+# remembering which ones it has walked
+_JSON_CONTAINERS_WALKED_BEFORE_TRACKING = 10000
+
+
+def _is_json_value(
+    value: object,
+    scalar_types: FrozenSet[type],
+    is_other_value: Callable[[object], bool],
+) -> bool:
+    """
+    Returns whether `value` is in the shape of a JSON type alias whose
+    scalar values have the exact types `scalar_types`.
+
+    Walks the value with an explicit stack rather than recursively, and
+    dispatches on the exact type of each part of the value. Parts of other
+    types, such as instances of subclasses of list or str, are checked
+    against the alias with `is_other_value` instead.
+    """
+    stack = [value]
+    pop = stack.pop
+    push = stack.append
+    # Lists and dicts are only remembered after many have been walked,
+    # so that a value which contains itself is not walked forever
+    untracked_count = _JSON_CONTAINERS_WALKED_BEFORE_TRACKING
+    walked_ids = set()  # type: Set[int]
+    while len(stack) > 0:
+        v = pop()
+        t = type(v)
+        if t is list or t is dict:
+            if untracked_count > 0:
+                untracked_count -= 1
+            elif id(v) in walked_ids:
+                continue
+            else:
+                walked_ids.add(id(v))
+            if t is list:
+                for x in v:  # type: ignore[attr-defined]  # mypy
+                    if type(x) not in scalar_types:
+                        push(x)
+            else:
+                for k, x in v.items():  # type: ignore[attr-defined]  # mypy
+                    if type(k) is not str:
+                        if not is_other_value(v):
+                            return False
+                        break
+                    if type(x) not in scalar_types:
+                        push(x)
+        elif t not in scalar_types and not is_other_value(v):
+            return False
+    return True
+
+
+# ------------------------------------------------------------------------------
+# NumPy support
+#
+# NumPy is not a dependency of trycast. If NumPy has not been imported
+# then no value can be an ndarray, so its module is never imported here.
+
+# Class of the elements of ndarray.tolist(), for each dtype kind
+_ELEMENT_CLASS_FOR_NDARRAY_KIND = {
+    "b": bool,
+    "i": int,
+    "u": int,
+    "f": float,
+    "c": complex,
+    "U": str,
+    "S": bytes,
+}  # type: Dict[str, type]
+
+
+def _is_ndarray_sequence(value: object) -> bool:
+    """
+    Returns whether `value` is a NumPy ndarray with at least 1 dimension,
+    which trycast treats as a Sequence.
+
+    Subclasses of ndarray are not included because they may iterate
+    differently, such as numpy.matrix.
+    """
+    numpy = sys.modules.get("numpy")
+    return (
+        numpy is not None
+        and type(value) is numpy.ndarray  # type: ignore[attr-defined]
+        and value.ndim >= 1  # type: ignore[attr-defined]
+    )
+
+
+def _checkcast_ndarray_sequence(
+    tp: object, value: Any, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    """
+    Checks an ndarray for which _is_ndarray_sequence() is True against
+    Sequence[T] with the same result as checking value.tolist(),
+    without converting `value` if its dtype alone decides the result.
+    """
+    T_ = get_args(tp)
+    if len(T_) == 0:
+        return None
+    (T,) = T_
+    if _is_simple_typevar(T, covariant=True) or _are_ndarray_elements_known_to_be(
+        value, T
+    ):
+        return None
+    e = _checkcast_listlike(tp, _ndarray_elements(value), list, options)
+    if e is None or not options.explain:
+        return e
+    return ValidationError(tp, value, _causes=e._causes)
+
+
+def _are_ndarray_elements_known_to_be(value: Any, T: object) -> bool:
+    """
+    Returns True if every element of the 1-dimensional ndarray `value`
+    is known to be in the shape of `T` from its dtype, or False if unknown.
+
+    If `T` is a Literal[...] then compares all elements to its values at once.
+    """
+    if value.ndim != 1:
+        # Rows are checked one at a time
+        return False
+    element_class = _ELEMENT_CLASS_FOR_NDARRAY_KIND.get(value.dtype.kind)
+    if element_class is None:
+        return False
+    if type(T) is type:
+        return _is_element_class_assignable(element_class, T)
+    if get_origin(T) is Literal:
+        literals = [x for x in get_args(T) if type(x) is element_class]
+        numpy = sys.modules["numpy"]
+        return bool(numpy.isin(value, literals).all())
+    return False
+
+
+def _ndarray_elements(value: Any) -> List[object]:
+    """
+    Returns the elements of an ndarray for which _is_ndarray_sequence() is True:
+    Python scalars for a 1-dimensional ndarray, or rows otherwise.
+    """
+    return value.tolist() if value.ndim == 1 else list(value)
+
+
+def _checkcast_dictlike(
+    tp: object,
+    value: object,
+    dictlike_type: Type,
+    options: _TrycastOptions,
+    *,
+    covariant_v: bool = False,
+) -> "Optional[ValidationError]":
+    if _is_instance(value, dictlike_type):
+        K_V = get_args(tp)
+
+        if len(K_V) == 0:
+            (K, V) = (
+                _SimpleTypeVar,
+                _SimpleTypeVarCo if covariant_v else _SimpleTypeVar,
+            )
+        else:
+            (K, V) = K_V
+
+        if _is_simple_typevar(K) and _is_simple_typevar(V, covariant=covariant_v):
+            pass
+        elif options.sampler is not None and options.sampler.applies_to(value):
+            return _checkcast_sampled_mapping(tp, value, K, V, options, options.sampler)
+        elif _are_items_instances_of(value, K, V):
+            pass
+        else:
+            for k, v in value.items():  # type: ignore[attr-defined, reportAttributeAccessIssue]  # mypy, pyright
+                e = _checkcast_inner(K, k, options)
+                if e is not None:
+                    if not options.explain:
+                        return e
+                    return ValidationError(
+                        tp,
+                        value,
+                        _causes=[e._with_prefix(_LazyStr(lambda: f"Key {k!r}"))],
+                    )
+                e = _checkcast_inner(V, v, options)
+                if e is not None:
+                    if not options.explain:
+                        return e
+                    return ValidationError(
+                        tp,
+                        value,
+                        _causes=[e._with_prefix(_LazyStr(lambda: f"At key {k!r}"))],
+                    )
+        return None
+    else:
+        return _rejection(tp, value, options)
+
+
+class _Sampler:
+    """
+    Chooses which elements of large collections are checked
+    by trycast(..., sample=N) and checkcast(..., sample=N).
+    """
+
+    __slots__ = ("_size", "_seed", "_random")
 
-    # Private factory method
     @staticmethod
-    def _from_message(message: "_LazyStr") -> "ValidationError":
-        return ValidationError(None, None, _message=message)
+    def create(sample: Optional[int], seed: Optional[int]) -> "Optional[_Sampler]":
+        if sample is None:
+            return None
+        if not isinstance(sample, int) or sample < 2:
+            raise ValueError(
+                f"sample must be None or an int of at least 2 "
+                f"(so that the first and last elements are checked). "
+                f"Got {sample!r}."
+            )
+        return _Sampler(sample, seed)
+
+    def __init__(self, size: int, seed: Optional[int]) -> None:
+        self._size = size
+        self._seed = seed
+        self._random = None  # type: Optional[random.Random]
+
+    def applies_to(self, value: object) -> bool:
+        """
+        Returns whether only a sample of the elements of `value` is checked.
+        """
+        return (
+            isinstance(value, (CSequence, CMapping))
+            and len(value) > self._size  # type: ignore[arg-type]  # mypy
+        )
+
+    def indexes(self, length: int) -> List[int]:
+        """
+        Returns the ascending indexes of the elements to check
+        of a collection with `length` elements.
+        """
+        if self._random is None:
+            self._random = random.Random(self.seed)
+        middle = self._random.sample(range(1, length - 1), self._size - 2)
+        return [0, *sorted(middle), length - 1]
+
+    @property
+    def seed(self) -> int:
+        if self._seed is None:
+            self._seed = random.randrange(2**32)
+        return self._seed
+
+    def _note(self, length: int, noun: str) -> "ValidationError":
+        return ValidationError._from_message(
+            _LazyStr(
+                lambda: f"Checked a sample of {self._size} of {length} {noun}, "
+                f"chosen with seed={self.seed}"
+            )
+        )
+
+
+def _checkcast_sampled_sequence(
+    tp: object,
+    value: object,
+    T: object,
+    options: _TrycastOptions,
+    sampler: _Sampler,
+) -> "Optional[ValidationError]":
+    for i in sampler.indexes(len(value)):  # type: ignore[arg-type]  # mypy
+        e = _checkcast_inner(T, value[i], options)  # type: ignore[index]  # mypy
+        if e is not None:
+            if not options.explain:
+                return e
+            return ValidationError(
+                tp,
+                value,
+                _causes=[
+                    e._with_prefix(_LazyStr(lambda: f"At index {i}")),
+                    sampler._note(len(value), "elements"),  # type: ignore[arg-type]  # mypy
+                ],
+            )
+    return None
+
+
+def _checkcast_sampled_mapping(
+    tp: object,
+    value: object,
+    K: object,
+    V: object,
+    options: _TrycastOptions,
+    sampler: _Sampler,
+) -> "Optional[ValidationError]":
+    items = iter(value.items())  # type: ignore[attr-defined]  # mypy
+    next_index = 0
+    for i in sampler.indexes(len(value)):  # type: ignore[arg-type]  # mypy
+        (k, v) = next(itertools.islice(items, i - next_index, None))
+        next_index = i + 1
+
+        e = _checkcast_inner(K, k, options)
+        if e is not None:
+            prefix = _LazyStr(lambda: f"Key {k!r}")
+        else:
+            e = _checkcast_inner(V, v, options)
+            if e is None:
+                continue
+            prefix = _LazyStr(lambda: f"At key {k!r}")
+        if not options.explain:
+            return e
+        return ValidationError(
+            tp,
+            value,
+            _causes=[
+                e._with_prefix(prefix),
+                sampler._note(len(value), "items"),  # type: ignore[arg-type]  # mypy
+            ],
+        )
+    return None
+
+
+def _is_simple_typevar(T: object, covariant: bool = False) -> bool:
+    return (
+        isinstance(T, TypeVar)
+        and T.__constraints__ == ()
+        and T.__covariant__ == covariant
+        and T.__contravariant__ is False
+        and T.__constraints__ == ()
+    )
+
+
+# ------------------------------------------------------------------------------
+# checkcast: Shared and cyclic values
+
+# A value may refer to the same dict or list from many places, such as a graph
+# of records built by an ORM, or may even contain itself.
+#
+# A compiled check remembers the result of checking each value against each
+# shared plan (see _PlanMemo), so that a shared value is checked only once.
+# A compiled check which finds a value that it is still checking gives up with
+# _ValueContainsItselfError. Such a value is checked by
+# _checkcast_iteratively() instead, with a _CheckMemo.
+
+
+# Exact types of values which never contain other values
+_ATOMIC_TYPES = frozenset([type(None), bool, int, float, complex, str, bytes])
+
+
+class _ValueContainsItselfError(RecursionError):
+    """
+    Raised by a compiled check which finds a value that it is still checking,
+    and which would otherwise follow that value until the recursion limit.
+
+    Callers check such a value with _checkcast_iteratively() instead,
+    the same as any value nested too deeply to check recursively.
+    """
+
+
+# Indexes into a _CheckMemo frame
+_FRAME_DEPTH = 0
+_FRAME_FORWARD = 1
+_FRAME_KEY = 2
+_FRAME_OUTER_ASSUMED_DEPTH = 3
+_FRAME_OUTER_PROVISIONAL_COUNT = 4
+
+
+class _CheckMemo:
+    """
+    Remembers the result of checking each value against each type form
+    during a single check of a value by _checkcast_iteratively(),
+    so that a value referred to from many places is checked only once
+    against each node, and so that checking a value which contains itself
+    finishes.
+
+    A value which is found again while it is still being checked against
+    the same node is assumed to match that node. If nothing else about the
+    value fails to match then the assumption was right. Until then, matches
+    which depend on the assumption are remembered only provisionally,
+    and are forgotten if the assumption turns out to be wrong.
+    """
+
+    __slots__ = (
+        "_results",
+        "_values",
+        "_frames",
+        "_assumed_depth",
+        "_provisional_keys",
+    )
+
+    def __init__(self) -> None:
+        # For each (id(value), id(node)) the result of the finished check,
+        # or the frame of a check which is still running or which
+        # matched provisionally
+        self._results = (
+            {}
+        )  # type: Dict[Tuple[int, int], Union[Optional[ValidationError], List[Any]]]
+        # Each value in _results, kept alive so that its id() is not reused
+        # during the check (see _PlanMemo._values)
+        self._values = []  # type: List[object]
+        # Frame of each running check, outermost first. A frame is a list of
+        # [depth, forward, key, outer_assumed_depth, outer_provisional_count]
+        # where forward is the frame of the running check that a provisional
+        # match depends on, or None while the check is running.
+        self._frames = []  # type: List[List[Any]]
+        # Smallest depth of a running check whose value was assumed to match
+        # since the innermost running check started
+        self._assumed_depth = sys.maxsize
+        # Keys of the provisional matches, in the order that they were made
+        self._provisional_keys = []  # type: List[Tuple[int, int]]
+
+    def start(self, value: object, node: object) -> object:
+        """
+        Returns the result of checking `value` against `node` if it is known,
+        or _MISSING if the caller must check it and then call finish().
+        """
+        key = (id(value), id(node))
+        result = self._results.get(key, _MISSING)
+        if result is _MISSING:
+            frame = [
+                len(self._frames) + 1,
+                None,
+                key,
+                self._assumed_depth,
+                len(self._provisional_keys),
+            ]
+            self._results[key] = frame
+            self._values.append(value)
+            self._frames.append(frame)
+            self._assumed_depth = sys.maxsize
+            return _MISSING
+        if type(result) is list:
+            # Found a value which contains itself, or which matched
+            # provisionally. Assume that it matches.
+            while result[_FRAME_FORWARD] is not None:
+                result = result[_FRAME_FORWARD]
+            if result[_FRAME_DEPTH] < self._assumed_depth:
+                self._assumed_depth = result[_FRAME_DEPTH]
+            return None
+        return result
+
+    def finish(self, e: "Optional[ValidationError]", explain: bool) -> None:
+        """
+        Remembers the result of the innermost running check,
+        which was started with start().
+        """
+        frame = self._frames.pop()
+        key = frame[_FRAME_KEY]
+        assumed_depth = self._assumed_depth
+        self._assumed_depth = frame[_FRAME_OUTER_ASSUMED_DEPTH]
+        if e is not None:
+            # A value which fails to match even with assumptions never matches.
+            # Forget matches which may have depended on it matching.
+            self._forget_provisional_since(
+                frame[_FRAME_OUTER_PROVISIONAL_COUNT], commit=False
+            )
+            if not explain:
+                self._results[key] = e
+            else:
+                # NOTE: A ValidationError explaining why is not shared,
+                #       because its prefix is altered by the check that
+                #       receives it
+                del self._results[key]
+        elif assumed_depth < frame[_FRAME_DEPTH]:
+            # Depends on whether a value that is still being checked matches
+            if assumed_depth < self._assumed_depth:
+                self._assumed_depth = assumed_depth
+            frame[_FRAME_FORWARD] = self._frames[assumed_depth - 1]
+            self._provisional_keys.append(key)
+        else:
+            # Every assumption made since starting was confirmed
+            self._forget_provisional_since(
+                frame[_FRAME_OUTER_PROVISIONAL_COUNT], commit=True
+            )
+            self._results[key] = None
+
+    def _forget_provisional_since(self, count: int, *, commit: bool) -> None:
+        provisional_keys = self._provisional_keys
+        if len(provisional_keys) == count:
+            return
+        results = self._results
+        for key in provisional_keys[count:]:
+            if commit:
+                results[key] = None
+            else:
+                del results[key]
+        del provisional_keys[count:]
+
+
+# ------------------------------------------------------------------------------
+# checkcast: Deeply nested values
+
+# _checkcast_inner() recurses at least once for each level of nesting of a
+# value, so it cannot check values nested more deeply than the recursion limit
+# allows, such as a list of a list of a list ... 5,000 levels deep.
+# Such values are instead checked again by _checkcast_iteratively(),
+# which walks them with an explicit stack.
+#
+# Values which contain themselves also exhaust the recursion limit
+# (or raise _ValueContainsItselfError), so are also checked by
+# _checkcast_iteratively(), with a _CheckMemo.
+
+# Maximum number of levels of nesting that _checkcast_iteratively() walks
+# before giving up
+_MAX_ITERATIVE_DEPTH = 1_000_000
+
+# Checks the elements of a value by yielding each (type form, element)
+# to check, receiving the result of _checkcast_inner() for each one,
+# and finally returning the same result that _checkcast_inner() would.
+_CheckSteps = Generator[
+    Tuple[object, object], "Optional[ValidationError]", "Optional[ValidationError]"
+]
+
+# Returns the _CheckSteps of a type form and value, given (tp, value, options)
+_CheckStepsFunc = Callable[[object, object, _TrycastOptions], _CheckSteps]
+
+
+def _checkcast_iteratively(
+    tp: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    """
+    Checks whether a value is in the shape of a type form, exactly as
+    _checkcast_inner() does, but without recursing for each level of nesting.
+
+    Each part of the value is checked only once against each type form,
+    even if the value refers to it from many places or contains itself.
+
+    Raises:
+    * TypeNotSupportedError
+    * UnresolvedForwardRefError
+    * RecursionError -- If the value is nested more than _MAX_ITERATIVE_DEPTH
+      levels deep.
+    """
+    stack = []  # type: List[_CheckSteps]
+    # Whether the result of each steps in the stack is remembered in the memo
+    checks = []  # type: List[bool]
+    memo = _CheckMemo()
+    (T, x) = (tp, value)
+    while True:
+        # Check x against T, either immediately or with steps pushed on the stack
+        # NOTE: Must look up handlers the same way as _checkcast_inner()
+        handler = _checkcast_handler_for_class.get(type(T))
+        if handler is None:
+            type_origin = get_origin(T)
+            if type_origin is not None:
+                handler = _checkcast_handler_for_origin.get(type_origin)
+                if handler is None:
+                    handler = _checkcast_handler_for_origin_class.get(type(type_origin))
+            if handler is None:
+                handler = _checkcast_other
+        steps_func = _check_steps_for_handler.get(handler)
+        if steps_func is None:
+            result = handler(T, x, options)  # type: object
+        else:
+            is_remembered = type(x) not in _ATOMIC_TYPES
+            result = memo.start(x, T) if is_remembered else _MISSING
+            if result is _MISSING:
+                if len(stack) >= _MAX_ITERATIVE_DEPTH:
+                    raise RecursionError(
+                        f"{options.funcname}() cannot check a value "
+                        f"nested more than {_MAX_ITERATIVE_DEPTH} levels deep"
+                    )
+                stack.append(steps_func(T, x, options))
+                checks.append(is_remembered)
+                result = None  # starts the new steps
+
+        # Resume the innermost steps with the result until one asks for another check
+        while True:
+            if len(stack) == 0:
+                return result  # type: ignore[return-value]  # mypy
+            try:
+                (T, x) = stack[-1].send(result)  # type: ignore[arg-type]  # mypy
+                break
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                if checks.pop():
+                    memo.finish(stop.value, options.explain)
+
+
+def _listlike_steps(
+    tp: object,
+    value: object,
+    listlike_type: Type,
+    options: _TrycastOptions,
+    *,
+    covariant_t: bool = False,
+    t_ellipsis: bool = False,
+) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_listlike()
+    if not _is_instance(value, listlike_type):
+        # Does not check elements, except of at most a few levels of an ndarray
+        return _checkcast_listlike(
+            tp,
+            value,
+            listlike_type,
+            options,
+            covariant_t=covariant_t,
+            t_ellipsis=t_ellipsis,
+        )
+
+    T_ = get_args(tp)
+    if len(T_) == 0:
+        T = _SimpleTypeVarCo if covariant_t else _SimpleTypeVar  # type: object
+    elif t_ellipsis:
+        if len(T_) == 2 and T_[1] is Ellipsis:
+            (T, _) = T_
+        else:
+            return _rejection(tp, value, options)
+    else:
+        (T,) = T_
+
+    if _is_simple_typevar(T, covariant=covariant_t):
+        return None
+    if _are_elements_known_to_be(value, T):
+        return None
+    if options.sampler is not None and options.sampler.applies_to(value):
+        return (
+            yield from _sampled_sequence_steps(tp, value, T, options, options.sampler)
+        )
+    if _are_elements_instances_of(value, T):
+        return None
+    for i, x in enumerate(value):  # type: ignore[arg-type, var-annotated, reportArgumentType]  # mypy, pyright
+        e = yield (T, x)
+        if e is not None:
+            if not options.explain:
+                return e
+            return ValidationError(
+                tp,
+                value,
+                _causes=[e._with_prefix(_LazyStr(lambda: f"At index {i}"))],
+            )
+    return None
+
+
+def _sampled_sequence_steps(
+    tp: object,
+    value: object,
+    T: object,
+    options: _TrycastOptions,
+    sampler: _Sampler,
+) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_sampled_sequence()
+    for i in sampler.indexes(len(value)):  # type: ignore[arg-type]  # mypy
+        e = yield (T, value[i])  # type: ignore[index]  # mypy
+        if e is not None:
+            if not options.explain:
+                return e
+            return ValidationError(
+                tp,
+                value,
+                _causes=[
+                    e._with_prefix(_LazyStr(lambda: f"At index {i}")),
+                    sampler._note(len(value), "elements"),  # type: ignore[arg-type]  # mypy
+                ],
+            )
+    return None
+
+
+def _tuple_steps(tp: object, value: object, options: _TrycastOptions) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_tuple()
+    if not isinstance(value, tuple):
+        return _rejection(tp, value, options)
+
+    type_args = get_args(tp)
+    if len(type_args) == 0 or (
+        len(type_args) == 2 and type_args[1] is Ellipsis
+    ):  # Tuple, Tuple[T, ...]
+        return (
+            yield from _listlike_steps(
+                tp, value, tuple, options, covariant_t=True, t_ellipsis=True
+            )
+        )
+
+    # Tuple[Ts]
+    if len(value) != len(type_args):
+        return _rejection(tp, value, options)
+    for i, T, t in zip(range(len(type_args)), type_args, value):
+        e = yield (T, t)
+        if e is not None:
+            if not options.explain:
+                return e
+            return ValidationError(
+                tp,
+                value,
+                _causes=[e._with_prefix(_LazyStr(lambda: f"At index {i}"))],
+            )
+    return None
+
+
+def _dictlike_steps(
+    tp: object,
+    value: object,
+    dictlike_type: Type,
+    options: _TrycastOptions,
+    *,
+    covariant_v: bool = False,
+) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_dictlike()
+    if not _is_instance(value, dictlike_type):
+        return _rejection(tp, value, options)
+
+    K_V = get_args(tp)
+    if len(K_V) == 0:
+        (K, V) = (
+            _SimpleTypeVar,
+            _SimpleTypeVarCo if covariant_v else _SimpleTypeVar,
+        )
+    else:
+        (K, V) = K_V
+
+    if _is_simple_typevar(K) and _is_simple_typevar(V, covariant=covariant_v):
+        return None
+    if options.sampler is not None and options.sampler.applies_to(value):
+        return (
+            yield from _sampled_mapping_steps(tp, value, K, V, options, options.sampler)
+        )
+    if _are_items_instances_of(value, K, V):
+        return None
+    for k, v in value.items():  # type: ignore[attr-defined, reportAttributeAccessIssue]  # mypy, pyright
+        e = yield (K, k)
+        if e is not None:
+            if not options.explain:
+                return e
+            return ValidationError(
+                tp,
+                value,
+                _causes=[e._with_prefix(_LazyStr(lambda: f"Key {k!r}"))],
+            )
+        e = yield (V, v)
+        if e is not None:
+            if not options.explain:
+                return e
+            return ValidationError(
+                tp,
+                value,
+                _causes=[e._with_prefix(_LazyStr(lambda: f"At key {k!r}"))],
+            )
+    return None
+
+
+def _sampled_mapping_steps(
+    tp: object,
+    value: object,
+    K: object,
+    V: object,
+    options: _TrycastOptions,
+    sampler: _Sampler,
+) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_sampled_mapping()
+    items = iter(value.items())  # type: ignore[attr-defined]  # mypy
+    next_index = 0
+    for i in sampler.indexes(len(value)):  # type: ignore[arg-type]  # mypy
+        (k, v) = next(itertools.islice(items, i - next_index, None))
+        next_index = i + 1
+
+        e = yield (K, k)
+        if e is not None:
+            prefix = _LazyStr(lambda: f"Key {k!r}")
+        else:
+            e = yield (V, v)
+            if e is None:
+                continue
+            prefix = _LazyStr(lambda: f"At key {k!r}")
+        if not options.explain:
+            return e
+        return ValidationError(
+            tp,
+            value,
+            _causes=[
+                e._with_prefix(prefix),
+                sampler._note(len(value), "items"),  # type: ignore[arg-type]  # mypy
+            ],
+        )
+    return None
+
+
+def _union_steps(tp: object, value: object, options: _TrycastOptions) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_union()
+    type_dispatch = _union_type_dispatch(tp, options.eval)
+    if value is None and type_dispatch is not None and type_dispatch.accepts_none:
+        return None
+    if _is_literal_value(tp, value):
+        return None
+    if type(value) is dict or isinstance(value, CMapping):
+        discriminator = _union_discriminator(tp, options.eval)
+        if discriminator is not None:
+            tag = value.get(discriminator.key, _MISSING)  # type: ignore[attr-defined]  # mypy
+            try:
+                M = discriminator.member_for_tag.get((type(tag), tag))
+            except TypeError:  # unhashable tag value
+                M = None
+            if M is not None and (yield (M, value)) is None:
+                return None
+            if not options.explain:
+                for T in discriminator.untagged_members:
+                    if (yield (T, value)) is None:
+                        return None
+                return _REJECTED
+
+    if type_dispatch is None:
+        members = get_args(tp)
+        may_match = None  # type: Optional[Tuple[bool, ...]]
+    else:
+        (members, may_match) = type_dispatch.entry_for(type(value))
+
+    if not options.explain:
+        for T in members:
+            if (yield (T, value)) is None:
+                return None
+        return _REJECTED
+
+    causes = []
+    for i, T in enumerate(get_args(tp)):
+        if may_match is not None and not may_match[i]:
+            causes.append(ValidationError(T, value))
+            continue
+        e = yield (T, value)
+        if e is not None:
+            causes.append(e)
+        else:
+            return None
+    return ValidationError(tp, value, _causes=causes)
+
+
+def _typeddict_steps(
+    tp: object,
+    typed_dict_class: object,
+    value: object,
+    options: _TrycastOptions,
+    resolved_annotations: Dict[str, object],
+) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_typeddict()
+    if type(value) is not dict and not isinstance(value, CMapping):
+        return _rejection(tp, value, options)
+
+    required_keys = typed_dict_class.__required_keys__  # type: ignore[attr-defined, union-attr]  # mypy
+    if type(value) is dict:
+        if value.keys() >= required_keys:
+            required_keys = ()
+        elif not options.explain:
+            return _REJECTED
+
+    for k, v in value.items():  # type: ignore[attr-defined]  # mypy
+        V = resolved_annotations.get(k, _MISSING)
+        if V is not _MISSING:
+            e = yield (V, v)
+            if e is not None:
+                if not options.explain:
+                    return e
+                return ValidationError(
+                    tp,
+                    value,
+                    _causes=[e._with_prefix(_LazyStr(lambda: f"At key {k!r}"))],
+                )
+
+    return _checkcast_required_keys(tp, value, required_keys, options)
+
+
+def _generic_typeddict_steps(
+    tp: object, value: object, options: _TrycastOptions
+) -> _CheckSteps:
+    return _typeddict_steps(
+        tp,
+        get_origin(tp),
+        value,
+        options,
+        _specialized_typeddict_annotations(tp, options.eval),
+    )
+
+
+def _nongeneric_typeddict_steps(
+    tp: object, value: object, options: _TrycastOptions
+) -> _CheckSteps:
+    return _typeddict_steps(
+        tp, tp, value, options, _typeddict_annotations(tp, options.eval)
+    )
+
+
+def _newtype_steps(tp: object, value: object, options: _TrycastOptions) -> _CheckSteps:
+    if options.strict:
+        return _checkcast_newtype(tp, value, options)  # raises
+    return (yield (tp.__supertype__, value))  # type: ignore[attr-defined]  # mypy
+
+
+def _type_alias_alias_steps(
+    tp: object, value: object, options: _TrycastOptions
+) -> _CheckSteps:
+    return (yield (_type_alias_value(tp), value))
+
+
+def _type_alias_steps(
+    tp: object, value: object, options: _TrycastOptions
+) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_type_alias()
+    if options.sampler is None and _json_scalar_types(tp) is not None:
+        # Check a JSON type alias in a single loop, without recursing
+        if _checkcast_type_alias(tp, value, options._replace(explain=False)) is None:
+            return None
+        if not options.explain:
+            return _REJECTED
+    return (yield (_type_alias_value(tp), value))
+
+
+def _other_steps(tp: object, value: object, options: _TrycastOptions) -> _CheckSteps:
+    # NOTE: Must check the same way as _checkcast_other()
+    type_origin = get_origin(tp)
+    if isinstance(type_origin, TypeAliasType):  # type: ignore[16]  # pyre
+        return (yield from _type_alias_alias_steps(tp, value, options))
+    if _is_typed_dict(type_origin):
+        return (yield from _generic_typeddict_steps(tp, value, options))
+    if isinstance(tp, _GenericAlias):  # type: ignore[16]  # pyre
+        return _checkcast_other(tp, value, options)  # raises
+    if _is_typed_dict(tp):
+        return (yield from _nongeneric_typeddict_steps(tp, value, options))
+    if _is_newtype(tp):
+        return (yield from _newtype_steps(tp, value, options))
+    if isinstance(tp, TypeAliasType):  # type: ignore[16]  # pyre
+        return (yield from _type_alias_steps(tp, value, options))
+    # Does not check any elements
+    return _checkcast_other(tp, value, options)
+
+
+# The _CheckStepsFunc for each _checkcast_inner() handler of a type form
+# whose values may contain other values to check.
+# Other handlers are called by _checkcast_iteratively() directly.
+_check_steps_for_handler = {
+    _checkcast_list: lambda tp, value, options: _listlike_steps(
+        tp, value, list, options
+    ),
+    _checkcast_set: lambda tp, value, options: _listlike_steps(tp, value, set, options),
+    _checkcast_frozenset: lambda tp, value, options: _listlike_steps(
+        tp, value, frozenset, options, covariant_t=True
+    ),
+    _checkcast_tuple: _tuple_steps,
+    _checkcast_sequence: lambda tp, value, options: _listlike_steps(
+        tp, value, CSequence, options, covariant_t=True
+    ),
+    _checkcast_mutable_sequence: lambda tp, value, options: _listlike_steps(
+        tp, value, CMutableSequence, options
+    ),
+    _checkcast_dict: lambda tp, value, options: _dictlike_steps(
+        tp, value, dict, options
+    ),
+    _checkcast_mapping: lambda tp, value, options: _dictlike_steps(
+        tp, value, CMapping, options, covariant_v=True
+    ),
+    _checkcast_mutable_mapping: lambda tp, value, options: _dictlike_steps(
+        tp, value, CMutableMapping, options
+    ),
+    _checkcast_union: _union_steps,
+    _checkcast_type_alias_alias: _type_alias_alias_steps,
+    _checkcast_generic_typeddict: _generic_typeddict_steps,
+    _checkcast_nongeneric_typeddict: _nongeneric_typeddict_steps,
+    _checkcast_newtype: _newtype_steps,
+    _checkcast_type_alias: _type_alias_steps,
+    _checkcast_other: _other_steps,
+}  # type: Dict[_CheckcastHandler, _CheckStepsFunc]
+
+
+# ------------------------------------------------------------------------------
+# ValidationError
+
+
+if sys.version_info >= (3, 11):
+    from typing import Self as _SelfValidationError
+else:
+    _SelfValidationError = TypeVar("_SelfValidationError", bound="ValidationError")
+
+
+class ValidationError(ValueError):
+    # === Init ===
+
+    def __init__(
+        self,
+        tp: object,
+        value: object,
+        /,
+        # NOTE: Inner type and structure for representing "cause" information
+        #       is private and may change in the future.
+        _causes: "Optional[Sequence[ValidationError]]" = None,
+        *,
+        _message: "Optional[_LazyStr]" = None,
+    ) -> None:
+        """
+        Creates a ValidationError related to the specified value not matching
+        the expected specified type.
+
+        Parameters (positional-only):
+        * tp -- the expected type of the specified value.
+        * value -- a value.
+        """
+        if _causes is None:
+            _causes = []
+        if _message is None:
+            _message = _LazyStr(
+                lambda: f"Expected {format_type_str(tp)} but found {value!r}"
+            )
+        super().__init__(_message)
+        self._tp = tp
+        self._value = value
+        self._causes = _causes
+        self._prefix = None  # type: Optional[_LazyStr]
+
+    # Private factory method
+    @staticmethod
+    def _from_message(message: "_LazyStr") -> "ValidationError":
+        return ValidationError(None, None, _message=message)
+
+    # Private builder method
+    def _with_prefix(
+        self: _SelfValidationError, prefix: "_LazyStr", /  # type: ignore[11]  # pyre  # noqa: W504
+    ) -> _SelfValidationError:
+        self._prefix = prefix
+        return self
+
+    # === __str__ ===
+
+    def __str__(self) -> str:
+        """
+        Returns a human-readable explanation of this ValidationError.
+
+        The specific format of this explanation may change in the future.
+        """
+        parts = []  # type: List[str]
+        self._format_to(parts)
+        return "".join(parts)
+
+    def _format_to(self, parts: List[str], indent: int = 0) -> None:
+        for i in range(indent):
+            parts.append("  ")
+        if self._prefix is not None:
+            parts.append(str(self._prefix))  # NOTE: May be a _LazyStr
+            parts.append(": ")
+        parts.append(super().__str__())
+        if len(self._causes) > 0:
+            for c in self._causes:  # type: ignore[16]  # pyre
+                parts.append("\n")
+                c._format_to(parts, indent=indent + 1)
+
+    # === Pickle and Copy ===
+
+    # NOTE: A ValidationError sent back from a worker in another process
+    #       is pickled as only its explanation if its type or value
+    #       cannot be pickled. See _pickle_worker_result().
+
+    def __reduce__(self) -> Tuple[Callable[..., "ValidationError"], Tuple[Any, ...]]:
+        return (_unpickle_validation_error_with_state, self._state())
+
+    def __copy__(self) -> "ValidationError":
+        return _unpickle_validation_error_with_state(*self._state())
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> "ValidationError":
+        return _unpickle_validation_error_with_state(
+            *copy.deepcopy(self._state(), memo)
+        )
+
+    def _state(
+        self,
+    ) -> Tuple[object, object, List["ValidationError"], str, Optional[str]]:
+        return (
+            self._tp,
+            self._value,
+            list(self._causes),
+            super().__str__(),
+            str(self._prefix) if self._prefix is not None else None,
+        )
+
+
+def _unpickle_validation_error(explanation: str) -> ValidationError:
+    return ValidationError._from_message(_LazyStr(lambda: explanation))
+
+
+def _unpickle_validation_error_with_state(
+    tp: object,
+    value: object,
+    causes: List[ValidationError],
+    message: str,
+    prefix: Optional[str],
+) -> ValidationError:
+    e = ValidationError(tp, value, causes, _message=_LazyStr(lambda: message))
+    if prefix is not None:
+        e._with_prefix(_LazyStr(lambda: prefix))
+    return e
+
+
+class _LazyStr(str):
+    def __init__(self, value_func: Callable[[], str], /) -> None:
+        self._value_func = value_func
+        self._value = None  # type: Optional[str]
+
+    def __str__(self) -> str:
+        if self._value is None:
+            self._value = self._value_func()
+        return self._value
+
+
+# Returned by _checkcast_inner() in place of every ValidationError
+# if options.explain is False. Must not be altered, such as by _with_prefix().
+_REJECTED = ValidationError._from_message(_LazyStr(lambda: "Value was rejected"))
+
+
+def _rejection(tp: object, value: object, options: _TrycastOptions) -> ValidationError:
+    """
+    Returns a ValidationError explaining that value is not in the shape of tp,
+    or _REJECTED if options.explain is False.
+    """
+    return ValidationError(tp, value) if options.explain else _REJECTED
+
+
+# ------------------------------------------------------------------------------
+# isassignable
+
+# TODO: Once support for TypeForm is implemented in mypy,
+#       replace the   `(Type[T]) -> TypeGuard[T]` overload
+#       and the       `(object) -> bool` overload with
+#       the following `(TypeForm[T]) -> TypeGuard[T]` overload:
+#
+#       See: https://github.com/python/mypy/issues/9773
+# @overload
+# def isassignable(value: object, tp: TypeForm[_T]) -> TypeGuard[_T]: ...
+
+
+@overload
+def isassignable(
+    value: object, tp: str, /, *, eval: Literal[False]
+) -> NoReturn: ...  # pragma: no cover
+
+
+@overload
+def isassignable(
+    value: object, tp: str, /, *, eval: bool = True
+) -> bool: ...  # pragma: no cover
+
+
+@overload
+def isassignable(
+    value: object, tp: Type[_T], /, *, eval: bool = True
+) -> TypeGuard[_T]: ...  # pragma: no cover
+
+
+@overload
+def isassignable(
+    value: object, tp: object, /, *, eval: bool = True
+) -> bool: ...  # pragma: no cover
+
+
+def isassignable(value, tp, /, *, eval=True):
+    """
+    Returns whether `value` is in the shape of `tp`
+    (as accepted by a Python typechecker conforming to PEP 484 "Type Hints").
+
+    This method logically performs an operation similar to:
+
+        return isinstance(value, tp)
+
+    except that it supports many more types than `isinstance`, including:
+        * List[T]
+        * Dict[K, V]
+        * Optional[T]
+        * Union[T1, T2, ...]
+        * Literal[...]
+        * T extends TypedDict
+
+    See trycast.trycast(..., strict=True) for information about parameters,
+    raised exceptions, and other details.
+    """
+    e = _checkcast_outer(
+        tp,
+        value,
+        _TrycastOptions(strict=True, eval=eval, funcname="isassignable", explain=False),
+    )
+    result = e is None
+    if isinstance(tp, type):
+        return cast(
+            TypeGuard[_T],  # type: ignore[reportGeneralTypeIssues]  # pyright
+            result,
+        )
+    else:
+        return result
+
+
+# ------------------------------------------------------------------------------
+# trycast_many, partition
+
+# TODO: Once support for TypeForm is implemented in mypy,
+#       replace the   `(Type[T]) -> List[Optional[T]]` overload
+#       and the       `(object) -> List[Optional[object]]` overload with
+#       the following `(TypeForm[T]) -> List[Optional[T]]` overload:
+#
+#       See: https://github.com/python/mypy/issues/9773
+# @overload
+# def trycast_many(tp: TypeForm[_T], values: Iterable[object]) -> List[Optional[_T]]: ...
+
+
+@overload
+def trycast_many(  # type: ignore[43]  # pyre
+    tp: str,
+    values: Iterable[object],
+    /,
+    failure: object = None,
+    *,
+    strict: bool = True,
+    eval: Literal[False],
+    executor: "Optional[Executor]" = None,
+) -> NoReturn: ...  # pragma: no cover
+
+
+@overload
+def trycast_many(  # type: ignore[43]  # pyre
+    tp: str,
+    values: Iterable[object],
+    /,
+    failure: object = None,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    executor: "Optional[Executor]" = None,
+) -> List[object]: ...  # pragma: no cover
+
+
+@overload
+def trycast_many(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    values: Iterable[object],
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    executor: "Optional[Executor]" = None,
+) -> List[Optional[_T]]: ...  # pragma: no cover
+
+
+@overload
+def trycast_many(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    values: Iterable[object],
+    /,
+    failure: _F,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    executor: "Optional[Executor]" = None,
+) -> List[Union[_T, _F]]: ...  # pragma: no cover
+
+
+@overload
+def trycast_many(  # type: ignore[43]  # pyre
+    tp: object,
+    values: Iterable[object],
+    /,
+    failure: object = None,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    executor: "Optional[Executor]" = None,
+) -> List[object]: ...  # pragma: no cover
+
+
+def trycast_many(tp, values, /, failure=None, *, strict=True, eval=True, executor=None):
+    """
+    Returns a list containing the result of trycast(tp, value, failure)
+    for each value in `values`.
+
+    Resolves `tp` only once, the same way that compile() does, rather than
+    once per value. Therefore checking many values with trycast_many()
+    is faster than calling trycast() in a loop.
+
+    If an executor (such as a concurrent.futures.InterpreterPoolExecutor
+    or ProcessPoolExecutor) is given then many `values` are split into
+    chunks which are checked concurrently by the executor's workers.
+    See trycast.compile() for details about the `executor` parameter.
+
+    See trycast.trycast() for information about parameters,
+    raised exceptions, and other details.
+
+    Like compile(), reports unsupported parts of `tp` immediately,
+    even if `values` is empty.
+    """
+    validator = _compile(
+        tp,
+        _TrycastOptions(strict, eval, funcname="trycast_many"),
+        codegen=False,
+        executor=executor,
+    )
+    return validator.trycast_many(values, failure)
+
+
+@overload
+def partition(  # type: ignore[43]  # pyre
+    tp: str,
+    values: Iterable[object],
+    /,
+    *,
+    strict: bool = True,
+    eval: Literal[False],
+    executor: "Optional[Executor]" = None,
+) -> NoReturn: ...  # pragma: no cover
+
+
+@overload
+def partition(  # type: ignore[43]  # pyre
+    tp: str,
+    values: Iterable[object],
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    executor: "Optional[Executor]" = None,
+) -> (
+    "Tuple[List[object], List[Tuple[object, ValidationError]]]"
+): ...  # pragma: no cover
+
+
+@overload
+def partition(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    values: Iterable[object],
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    executor: "Optional[Executor]" = None,
+) -> "Tuple[List[_T], List[Tuple[object, ValidationError]]]": ...  # pragma: no cover
+
+
+@overload
+def partition(  # type: ignore[43]  # pyre
+    tp: object,
+    values: Iterable[object],
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    executor: "Optional[Executor]" = None,
+) -> (
+    "Tuple[List[object], List[Tuple[object, ValidationError]]]"
+): ...  # pragma: no cover
+
+
+def partition(tp, values, /, *, strict=True, eval=True, executor=None):
+    """
+    Splits `values` into a list of the values which are in the shape of `tp`
+    and a list of (value, ValidationError) pairs for the values which are not,
+    each in the same order as in `values`.
+
+    Each ValidationError is the same as the one that checkcast(tp, value)
+    would raise.
+
+    Resolves `tp` only once, the same way that compile() does, rather than
+    once per value.
+
+    If an executor (such as a concurrent.futures.InterpreterPoolExecutor
+    or ProcessPoolExecutor) is given then many `values` are split into
+    chunks which are checked concurrently by the executor's workers.
+    See trycast.compile() for details about the `executor` parameter.
+
+    See trycast.trycast() for information about parameters,
+    raised exceptions, and other details.
+
+    Like compile(), reports unsupported parts of `tp` immediately,
+    even if `values` is empty.
+    """
+    validator = _compile(
+        tp,
+        _TrycastOptions(strict, eval, funcname="partition"),
+        codegen=False,
+        executor=executor,
+    )
+    return validator.partition(values)
+
+
+# ------------------------------------------------------------------------------
+# atrycast, acheckcast
+
+# The default number of elements of lists, tuples, and dicts that
+# atrycast() and acheckcast() check between each yield to the event loop
+_DEFAULT_ASYNC_CHUNK_SIZE = 1000
+
+
+@overload
+async def atrycast(  # type: ignore[43]  # pyre
+    tp: str,
+    value: object,
+    /,
+    failure: object = None,
+    *,
+    strict: bool = True,
+    eval: Literal[False],
+    chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+) -> NoReturn: ...  # pragma: no cover
+
+
+@overload
+async def atrycast(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    value: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+) -> Optional[_T]: ...  # pragma: no cover
+
+
+@overload
+async def atrycast(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    value: object,
+    /,
+    failure: _F,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+) -> Union[_T, _F]: ...  # pragma: no cover
+
+
+@overload
+async def atrycast(  # type: ignore[43]  # pyre
+    tp: object,
+    value: object,
+    /,
+    failure: object = None,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+) -> object: ...  # pragma: no cover
+
+
+async def atrycast(
+    tp,
+    value,
+    /,
+    failure=None,
+    *,
+    strict=True,
+    eval=True,
+    chunk_size=_DEFAULT_ASYNC_CHUNK_SIZE,
+):
+    """
+    Same as trycast(tp, value, failure) except that while checking the
+    elements of lists, tuples, and dicts inside `value` it yields to the
+    asyncio event loop after every `chunk_size` elements, so that checking
+    a very large value does not block other tasks for long.
+
+    Like compile(), reports unsupported parts of `tp` immediately,
+    even if `value` never reaches them.
+
+    See trycast.trycast() for information about other parameters,
+    raised exceptions, and other details.
+    """
+    validator = _compile(
+        tp, _TrycastOptions(strict, eval, funcname="atrycast"), codegen=False
+    )
+    return await validator.atrycast(value, failure, chunk_size=chunk_size)
+
+
+@overload
+async def acheckcast(  # type: ignore[43]  # pyre
+    tp: str,
+    value: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: Literal[False],
+    chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+) -> NoReturn: ...  # pragma: no cover
+
+
+@overload
+async def acheckcast(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    value: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+) -> _T: ...  # pragma: no cover
+
+
+@overload
+async def acheckcast(  # type: ignore[43]  # pyre
+    tp: object,
+    value: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+) -> object: ...  # pragma: no cover
+
+
+async def acheckcast(
+    tp, value, /, *, strict=True, eval=True, chunk_size=_DEFAULT_ASYNC_CHUNK_SIZE
+):
+    """
+    Same as checkcast(tp, value) except that while checking the
+    elements of lists, tuples, and dicts inside `value` it yields to the
+    asyncio event loop after every `chunk_size` elements, so that checking
+    a very large value does not block other tasks for long.
+
+    Raises the same ValidationError that checkcast() would.
+
+    Like compile(), reports unsupported parts of `tp` immediately,
+    even if `value` never reaches them.
+
+    See trycast.checkcast() for information about other parameters,
+    raised exceptions, and other details.
+    """
+    validator = _compile(
+        tp, _TrycastOptions(strict, eval, funcname="acheckcast"), codegen=False
+    )
+    return await validator.acheckcast(value, chunk_size=chunk_size)
+
+
+# ------------------------------------------------------------------------------
+# run_in_executor
+
+
+@overload
+async def run_in_executor(  # type: ignore[43]  # pyre
+    tp: str,
+    value: object,
+    /,
+    *,
+    executor: "Optional[Executor]" = None,
+    strict: bool = True,
+    eval: Literal[False],
+) -> NoReturn: ...  # pragma: no cover
+
+
+@overload
+async def run_in_executor(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    value: object,
+    /,
+    *,
+    executor: "Optional[Executor]" = None,
+    strict: bool = True,
+    eval: bool = True,
+) -> _T: ...  # pragma: no cover
+
+
+@overload
+async def run_in_executor(  # type: ignore[43]  # pyre
+    tp: object,
+    value: object,
+    /,
+    *,
+    executor: "Optional[Executor]" = None,
+    strict: bool = True,
+    eval: bool = True,
+) -> object: ...  # pragma: no cover
+
+
+async def run_in_executor(tp, value, /, *, executor=None, strict=True, eval=True):
+    """
+    Same as checkcast(tp, value) except that the check runs in `executor`
+    (such as a ThreadPoolExecutor or ProcessPoolExecutor) rather than in the
+    calling thread, so that checking a large value does not block the
+    asyncio event loop. If `executor` is None then runs the check in the
+    event loop's default executor.
+
+    If the executor runs its workers in other processes (or interpreters)
+    then `tp` and `value` are pickled to send them to a worker.
+    A class is sent as its importable qualified name, so that each worker
+    resolves it (and caches what it derives from it) only once.
+    A type defined inside a function cannot be imported by a worker,
+    so it can only be checked by an executor whose workers are threads.
+
+    See trycast.checkcast() for information about other parameters,
+    raised exceptions, and other details.
+
+    Raises:
+    * ValidationError -- If `value` is not in the shape of `tp`.
+    * TypeNotSupportedError
+    * UnresolvedForwardRefError
+    * UnresolvableTypeError
+    * TypeError -- If `tp` cannot be sent to a worker in another process.
+    """
+    import asyncio  # slow to import, so import only when needed
+
+    options = _TrycastOptions(strict, eval, funcname="run_in_executor")
+    tp = _resolve_outer_type(tp, options)
+    loop = asyncio.get_running_loop()
+    if _has_process_workers(executor):
+        pickled_e = await loop.run_in_executor(
+            executor,
+            _pickled_result_of,
+            _checkcast_in_worker,
+            _portable_type_reference(tp),
+            value,
+            options,
+        )
+        e = pickle.loads(pickled_e)
+    else:
+        e = await loop.run_in_executor(
+            executor, _checkcast_in_worker, tp, value, options
+        )
+    if e is not None:
+        raise e
+    else:
+        return value
+
+
+def _has_process_workers(executor: "Optional[Executor]") -> bool:
+    """
+    Returns whether `executor` runs its workers in other processes
+    or interpreters, which must be sent pickled types and values.
+    """
+    if executor is None:  # the event loop's default ThreadPoolExecutor
+        return False
+    import concurrent.futures  # slow to import, so import only when needed
+
+    process_executor_types = (concurrent.futures.ProcessPoolExecutor,) + (
+        (concurrent.futures.InterpreterPoolExecutor,)  # type: ignore[attr-defined]  # Python 3.14+
+        if hasattr(concurrent.futures, "InterpreterPoolExecutor")
+        else ()
+    )  # type: Tuple[type, ...]
+    return isinstance(executor, process_executor_types)
+
+
+def _portable_type_reference_uncached(tp: object) -> object:
+    """
+    Returns a picklable reference to `tp` which _checkcast_in_worker()
+    can resolve back to `tp` in another process.
+
+    Raises:
+    * TypeError -- If `tp` cannot be pickled.
+    """
+    module_name = getattr(tp, "__module__", None)
+    qualname = getattr(tp, "__qualname__", None)
+    if (
+        isinstance(tp, type)
+        and isinstance(module_name, str)
+        and isinstance(qualname, str)
+        and qualname.isidentifier()  # not nested in a class or function
+        and getattr(sys.modules.get(module_name), qualname, None) is tp
+    ):
+        return f"{module_name}.{qualname}"
+
+    try:
+        pickle.dumps(tp)
+    except Exception as e:
+        raise TypeError(
+            f"run_in_executor cannot send type {format_type_str(tp)} "
+            f"to a worker in another process because it cannot be pickled. "
+            f"Try defining the type at the top level of a module "
+            f"or using a ThreadPoolExecutor instead."
+        ) from e
+    return tp
+
+
+_portable_type_reference = _IdentityCache(
+    _portable_type_reference_uncached, maxsize=1024
+)
+
+
+def _checkcast_in_worker(
+    tp_ref: object, value: object, options: _TrycastOptions
+) -> "Optional[ValidationError]":
+    """
+    Checks `value` against the type referred to by `tp_ref`,
+    inside an executor's worker which may be in a different process.
+    """
+    return _checkcast_outer(_type_from_reference(tp_ref), value, options)
+
+
+def _type_from_reference(tp_ref: object) -> object:
+    """
+    Returns the type referred to by `tp_ref`, which is either a type
+    or a reference created by _portable_type_reference().
+    """
+    if isinstance(tp_ref, str):
+        return eval_type_str(tp_ref)  # created by _portable_type_reference()
+    else:
+        return tp_ref
+
+
+def _pickled_result_of(func: Callable[..., object], *args: object) -> bytes:
+    """
+    Returns the result of func(*args) pickled by _pickle_worker_result().
+
+    Submitted in place of `func` to an executor whose workers are in
+    other processes or interpreters.
+    """
+    return _pickle_worker_result(func(*args))
+
+
+def _pickle_worker_result(result: object) -> bytes:
+    """
+    Pickles the result of a check in a worker in another process.
+
+    If the result cannot be pickled then pickles each ValidationError in it
+    as only its explanation, because the type and value that a
+    ValidationError refers to may not be picklable.
+    """
+    try:
+        return pickle.dumps(result)
+    except Exception:
+        buffer = io.BytesIO()
+        _ExplanationPickler(buffer).dump(result)
+        return buffer.getvalue()
+
+
+class _ExplanationPickler(pickle.Pickler):
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, ValidationError):
+            return (_unpickle_validation_error, (str(obj),))
+        return NotImplemented
+
+
+# ------------------------------------------------------------------------------
+# compile
+
+# TODO: Once support for TypeForm is implemented in mypy,
+#       replace the   `(Type[T]) -> Validator[T]` overload
+#       and the       `(object) -> Validator[object]` overload with
+#       the following `(TypeForm[T]) -> Validator[T]` overload:
+#
+#       See: https://github.com/python/mypy/issues/9773
+# @overload
+# def compile(tp: TypeForm[_T]) -> Validator[_T]: ...
+
+
+@overload
+def compile(  # type: ignore[43]  # pyre
+    tp: str,
+    /,
+    *,
+    strict: bool = True,
+    eval: Literal[False],
+    codegen: bool = False,
+    executor: "Optional[Executor]" = None,
+) -> NoReturn: ...  # pragma: no cover
+
+
+@overload
+def compile(  # type: ignore[43]  # pyre
+    tp: str,
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    codegen: bool = False,
+    executor: "Optional[Executor]" = None,
+) -> "Validator[object]": ...  # pragma: no cover
+
+
+@overload
+def compile(  # type: ignore[43]  # pyre
+    tp: Type[_T],
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    codegen: bool = False,
+    executor: "Optional[Executor]" = None,
+) -> "Validator[_T]": ...  # pragma: no cover
+
+
+@overload
+def compile(  # type: ignore[43]  # pyre
+    tp: object,
+    /,
+    *,
+    strict: bool = True,
+    eval: bool = True,
+    codegen: bool = False,
+    executor: "Optional[Executor]" = None,
+) -> "Validator[object]": ...  # pragma: no cover
+
+
+def compile(tp, /, *, strict=True, eval=True, codegen=False, executor=None):
+    """
+    Resolves `tp` once into a Validator which can then check many values
+    against `tp` without repeating any type introspection per value.
+
+    A Validator has trycast(), checkcast(), isassignable(), trycast_many(),
+    partition(), atrycast(), and acheckcast() methods which behave the same
+    as the functions of the same name:
+
+        point_validator = trycast.compile(Point2D)
+        ...
+        if (point := point_validator.trycast(request_json)) is None:
+            ...
+
+    See trycast.trycast() for information about the `strict` and `eval`
+    parameters.
+
+    Parameters:
+    * codegen --
+        If codegen=True then generates and compiles specialized Python source
+        code for checking values against `tp`, which is faster to run than
+        the default tree of checks, at the cost of a slower compile().
+        Values that fail a check are rechecked with the default tree of checks
+        to explain the failure. The generated source is available from
+        Validator.source for debugging.
+    * executor --
+        If an executor (such as a concurrent.futures.ProcessPoolExecutor)
+        is given then large list, tuple, and dict values are split into
+        chunks which are checked concurrently by the executor's workers.
+        Similarly the many values given to Validator.trycast_many() and
+        Validator.partition() are split into chunks.
+        Smaller values are always checked in the calling thread.
+        The results and any ValidationError are the same as if the value
+        were checked in the calling thread. If the executor runs its workers
+        in other processes (or interpreters) then `tp` must be picklable.
+
+    Unlike trycast(), which only reports unsupported parts of `tp`
+    when a value is checked against them, compile() reports them immediately.
+    However the annotations of a TypedDict are only resolved the first time
+    a value is checked against it (or immediately if codegen=True),
+    so that they may refer to types defined after compile() is called.
+
+    Raises:
+    * TypeNotSupportedError
+    * UnresolvedForwardRefError
+    * UnresolvableTypeError
+    """
+    return _compile(
+        tp, _TrycastOptions(strict, eval, funcname="compile"), codegen, executor
+    )
+
+
+def _compile(
+    tp: object,
+    options: _TrycastOptions,
+    codegen: bool,
+    executor: "Optional[Executor]" = None,
+) -> "Validator":
+    tp = _resolve_outer_type(tp, options)
+    try:
+        plan = _compile_plan(tp, options)
+        if codegen:
+            (match_func, source) = _SourceGenerator(tp).generate(plan)
+        else:
+            (match_func, source) = (None, None)
+    except UnresolvedForwardRefError:
+        raise _unresolved_forward_ref_error(tp, options)
+    return Validator(tp, plan, options, match_func, source, executor)
+
+
+class Validator(Generic[_T]):
+    """
+    Checks whether values are in the shape of a particular type.
+
+    Create instances with trycast.compile().
+    """
+
+    def __init__(
+        self,
+        tp: object,
+        plan: "_Plan",
+        options: _TrycastOptions,
+        match_func: Optional[Callable[[object], bool]],
+        source: Optional[str],
+        executor: "Optional[Executor]" = None,
+        /,
+    ) -> None:
+        self._tp = tp
+        self._plan = plan
+        self._options = options
+        self._match_func = match_func
+        self._source = source
+        self._executor = executor
+
+    @property
+    def source(self) -> Optional[str]:
+        """
+        The Python source code generated for this validator
+        if it was created with compile(..., codegen=True), or None otherwise.
+
+        The format of this source code may change in the future.
+        """
+        return self._source
+
+    @overload
+    def trycast(self, value: object, /) -> Optional[_T]: ...  # pragma: no cover
+
+    @overload
+    def trycast(
+        self, value: object, /, failure: _F
+    ) -> Union[_T, _F]: ...  # pragma: no cover
+
+    def trycast(self, value, /, failure=None):
+        """
+        If `value` is in the shape of this validator's type then returns it,
+        otherwise returns `failure` (which is None by default).
+
+        See trycast.trycast() for details.
+        """
+        if self._matches(value):
+            return value
+        else:
+            return failure
+
+    def checkcast(self, value: object, /) -> _T:
+        """
+        If `value` is in the shape of this validator's type then returns it,
+        otherwise raises ValidationError.
+
+        See trycast.checkcast() for details.
+        """
+        if self._match_func is not None and self._matches(value):
+            return cast(_T, value)
+        e = self._check(value)
+        if e is not None:
+            raise e
+        else:
+            return cast(_T, value)
+
+    def isassignable(self, value: object, /) -> TypeGuard[_T]:
+        """
+        Returns whether `value` is in the shape of this validator's type.
+
+        See trycast.isassignable() for details.
+        """
+        return self._matches(value)
+
+    @overload
+    def trycast_many(
+        self,
+        values: Iterable[object],
+        /,
+    ) -> List[Optional[_T]]: ...  # pragma: no cover
+
+    @overload
+    def trycast_many(
+        self, values: Iterable[object], /, failure: _F
+    ) -> List[Union[_T, _F]]: ...  # pragma: no cover
+
+    def trycast_many(self, values, /, failure=None):
+        """
+        Returns a list containing the result of trycast(value, failure)
+        for each value in `values`.
+
+        See trycast.trycast_many() for details.
+        """
+        if self._executor is not None:
+            values = list(values)
+            if len(values) >= _PARALLEL_BATCH_MIN_SIZE:
+                invalid_indexes = {
+                    i for (i, _) in self._check_many_in_parallel(values, False)
+                }
+                return [
+                    failure if i in invalid_indexes else value
+                    for (i, value) in enumerate(values)
+                ]
+        matches = self._matches
+        return [value if matches(value) else failure for value in values]
+
+    def partition(
+        self,
+        values: Iterable[object],
+        /,
+    ) -> "Tuple[List[_T], List[Tuple[object, ValidationError]]]":
+        """
+        Splits `values` into a list of the values which are in the shape of
+        this validator's type and a list of (value, ValidationError) pairs
+        for the values which are not.
+
+        See trycast.partition() for details.
+        """
+        if self._executor is not None:
+            values = list(values)
+            if len(values) >= _PARALLEL_BATCH_MIN_SIZE:
+                errors = dict(self._check_many_in_parallel(values, True))
+                return (
+                    [
+                        cast(_T, value)
+                        for (i, value) in enumerate(values)
+                        if i not in errors
+                    ],
+                    [(values[i], e) for (i, e) in errors.items()],
+                )
+
+        valid = []  # type: List[_T]
+        invalid = []  # type: List[Tuple[object, ValidationError]]
+        has_match_func = self._match_func is not None
+        for value in values:
+            if has_match_func and self._matches(value):
+                valid.append(cast(_T, value))
+                continue
+            e = self._check(value)
+            if e is None:
+                valid.append(cast(_T, value))
+            else:
+                invalid.append((value, e))
+        return (valid, invalid)
+
+    @overload
+    async def atrycast(
+        self,
+        value: object,
+        /,
+        *,
+        chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+    ) -> Optional[_T]: ...  # pragma: no cover
+
+    @overload
+    async def atrycast(
+        self,
+        value: object,
+        /,
+        failure: _F,
+        *,
+        chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE,
+    ) -> Union[_T, _F]: ...  # pragma: no cover
+
+    async def atrycast(
+        self, value, /, failure=None, *, chunk_size=_DEFAULT_ASYNC_CHUNK_SIZE
+    ):
+        """
+        Same as trycast(value, failure) except that it periodically yields
+        to the asyncio event loop while checking a large value.
+
+        See trycast.atrycast() for details.
+        """
+        e = await self._acheck(value, False, chunk_size)
+        if e is not None:
+            return failure
+        else:
+            return value
+
+    async def acheckcast(
+        self, value: object, /, *, chunk_size: int = _DEFAULT_ASYNC_CHUNK_SIZE
+    ) -> _T:
+        """
+        Same as checkcast(value) except that it periodically yields
+        to the asyncio event loop while checking a large value.
+
+        See trycast.acheckcast() for details.
+        """
+        e = await self._acheck(value, True, chunk_size)
+        if e is not None:
+            raise e
+        else:
+            return cast(_T, value)
+
+    async def _acheck(
+        self, value: object, explain: bool, chunk_size: int
+    ) -> "Optional[ValidationError]":
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1. Got {chunk_size!r}.")
+        try:
+            return await _acheck_plan(self._plan, value, explain, _Pacer(chunk_size))
+        except RecursionError:
+            # Value is nested too deeply to check recursively
+            return self._check_iteratively(value, explain)
+        except UnresolvedForwardRefError:
+            raise _unresolved_forward_ref_error(self._tp, self._options)
+
+    def _matches(self, value: object) -> bool:
+        if self._match_func is not None and not self._is_checked_in_parallel(value):
+            try:
+                return self._match_func(value)
+            except RecursionError:
+                pass  # Value is nested too deeply. Check it iteratively.
+        return self._check(value, explain=False) is None
+
+    def _check(
+        self, value: object, *, explain: bool = True
+    ) -> "Optional[ValidationError]":
+        try:
+            if self._is_checked_in_parallel(value):
+                assert self._executor is not None
+                return _check_in_parallel(
+                    self._plan, value, explain, self._executor, self._options
+                )
+            return self._plan._check(value, explain)
+        except RecursionError:
+            # Value is nested too deeply to check recursively
+            return self._check_iteratively(value, explain)
+        except UnresolvedForwardRefError:
+            raise _unresolved_forward_ref_error(self._tp, self._options)
+
+    def _check_iteratively(
+        self, value: object, explain: bool
+    ) -> "Optional[ValidationError]":
+        try:
+            return _checkcast_iteratively(
+                self._tp, value, self._options._replace(explain=explain)
+            )
+        except UnresolvedForwardRefError:
+            raise _unresolved_forward_ref_error(self._tp, self._options)
+
+    def _is_checked_in_parallel(self, value: object) -> bool:
+        return self._executor is not None and _is_parallelizable(self._plan, value)
+
+    def _check_many_in_parallel(
+        self, values: List[object], explain: bool
+    ) -> "List[Tuple[int, ValidationError]]":
+        assert self._executor is not None
+        try:
+            return _check_many_in_parallel(
+                self._tp, values, explain, self._executor, self._options
+            )
+        except UnresolvedForwardRefError:
+            raise _unresolved_forward_ref_error(self._tp, self._options)
+
+    def __repr__(self) -> str:
+        return f"<trycast.Validator for {format_type_str(self._tp)}>"
+
+
+# ------------------------------------------------------------------------------
+# compile: Parallel checks
+
+# The number of elements of a collection checked by each task given to an executor
+_PARALLEL_CHUNK_SIZE = 10_000
+
+# Collections smaller than this are always checked in the calling thread,
+# because splitting them into chunks costs more than it saves
+_PARALLEL_MIN_SIZE = 4 * _PARALLEL_CHUNK_SIZE
+
+
+# The number of values given to trycast_many() or partition()
+# checked by each task given to an executor
+_PARALLEL_BATCH_CHUNK_SIZE = 1000
+
+# Fewer values than this are always checked in the calling thread
+_PARALLEL_BATCH_MIN_SIZE = 2 * _PARALLEL_BATCH_CHUNK_SIZE
+
+
+def _is_parallelizable(plan: "_Plan", value: object) -> bool:
+    """
+    Returns whether checking `value` against `plan` may be split into chunks
+    which are checked concurrently by _check_in_parallel().
+    """
+    if isinstance(plan, _ListlikePlan):
+        return (
+            plan._element_plan is not None
+            and (type(value) is list or type(value) is tuple)
+            and isinstance(value, plan._listlike_type)
+            and len(value) >= _PARALLEL_MIN_SIZE  # type: ignore[arg-type]  # mypy
+        )
+    elif isinstance(plan, _DictlikePlan):
+        return (
+            plan._key_value_plans is not None
+            and type(value) is dict
+            and len(value) >= _PARALLEL_MIN_SIZE  # type: ignore[arg-type]  # mypy
+        )
+    else:
+        return False
+
+
+def _check_in_parallel(
+    plan: "_Plan",
+    value: object,
+    explain: bool,
+    executor: "Executor",
+    options: _TrycastOptions,
+) -> "Optional[ValidationError]":
+    """
+    Checks a value for which _is_parallelizable(plan, value) is True by
+    checking chunks of its elements (or items) concurrently with `executor`.
+
+    Returns the same result as plan._check(value, explain).
+    In particular if several elements are not in the shape of the element type
+    then reports the first such element, just like plan._check().
+    """
+    if isinstance(plan, _ListlikePlan):
+        elements = iter(value)  # type: ignore[call-overload]  # mypy
+    else:
+        elements = iter(value.items())  # type: ignore[attr-defined]  # mypy
+    tp_ref = (
+        _portable_type_reference(plan._tp)
+        if _has_process_workers(executor)
+        else plan._tp
+    )
+    futures = []
+    while chunk := list(itertools.islice(elements, _PARALLEL_CHUNK_SIZE)):
+        futures.append(
+            executor.submit(
+                _first_invalid_index_in_chunk,
+                tp_ref,
+                options.strict,
+                options.eval,
+                chunk,
+            )
+        )
+
+    # Find the first invalid element, in the same order as plan._check()
+    try:
+        for chunk_index, future in enumerate(futures):
+            offset = future.result()
+            if offset is not None:
+                i = chunk_index * _PARALLEL_CHUNK_SIZE + offset
+                break
+        else:
+            return None
+    finally:
+        for future in futures:
+            future.cancel()
+    if not explain:
+        return _REJECTED
+
+    # Explain why the first invalid element is invalid, as plan._check() would
+    if isinstance(plan, _ListlikePlan):
+        assert plan._element_plan is not None
+        x = value[i]  # type: ignore[index]  # mypy
+        e = plan._element_plan._check(x, explain)
+        assert e is not None
+        return plan._element_error(value, i, e)
+    else:
+        assert isinstance(plan, _DictlikePlan) and plan._key_value_plans is not None
+        (key_plan, value_plan) = plan._key_value_plans
+        (k, v) = next(itertools.islice(value.items(), i, None))  # type: ignore[attr-defined]  # mypy
+        e = key_plan._check(k, explain)
+        if e is not None:
+            return plan._key_error(value, k, e)
+        e = value_plan._check(v, explain)
+        assert e is not None
+        return plan._value_error(value, k, e)
+
+
+def _first_invalid_index_in_chunk(
+    tp_ref: object, strict: bool, eval: bool, chunk: List[Any]
+) -> Optional[int]:
+    """
+    Returns the index of the first element (or item) of `chunk` which is
+    not in the shape of the element (or item) type of the collection type
+    referred to by `tp_ref`, or None if there is no such element.
+
+    Runs inside an executor's worker, which may be in a different process.
+    """
+    plan = _plan_for_worker(_type_from_reference(tp_ref), strict, eval)
+    if isinstance(plan, _ListlikePlan):
+        element_plan = plan._element_plan
+        assert element_plan is not None
+        for i, x in enumerate(chunk):
+            if element_plan._check(x, False) is not None:
+                return i
+    else:
+        assert isinstance(plan, _DictlikePlan) and plan._key_value_plans is not None
+        (key_plan, value_plan) = plan._key_value_plans
+        for i, (k, v) in enumerate(chunk):
+            if (
+                key_plan._check(k, False) is not None
+                or value_plan._check(v, False) is not None
+            ):
+                return i
+    return None
+
+
+def _check_many_in_parallel(
+    tp: object,
+    values: List[object],
+    explain: bool,
+    executor: "Executor",
+    options: _TrycastOptions,
+) -> "List[Tuple[int, ValidationError]]":
+    """
+    Checks each of many values against `tp` by checking chunks of the values
+    concurrently with `executor`.
+
+    Returns the index of each value which is not in the shape of `tp`,
+    in order, with a ValidationError explaining why (or _REJECTED
+    if `explain` is False).
+    """
+    has_process_workers = _has_process_workers(executor)
+    tp_ref = _portable_type_reference(tp) if has_process_workers else tp
+    futures = []  # type: List[Any]
+    for start in range(0, len(values), _PARALLEL_BATCH_CHUNK_SIZE):
+        args = (
+            tp_ref,
+            options.strict,
+            options.eval,
+            values[start : start + _PARALLEL_BATCH_CHUNK_SIZE],
+            explain,
+        )
+        if has_process_workers:
+            futures.append(
+                executor.submit(_pickled_result_of, _invalid_values_in_chunk, *args)
+            )
+        else:
+            futures.append(executor.submit(_invalid_values_in_chunk, *args))
+    invalid = []  # type: List[Tuple[int, ValidationError]]
+    try:
+        for chunk_index, future in enumerate(futures):
+            start = chunk_index * _PARALLEL_BATCH_CHUNK_SIZE
+            chunk_invalid = future.result()  # type: Any
+            if has_process_workers:
+                chunk_invalid = pickle.loads(chunk_invalid)
+            invalid.extend(
+                (start + offset, e if e is not None else _REJECTED)
+                for (offset, e) in chunk_invalid
+            )
+    finally:
+        for future in futures:
+            future.cancel()
+    return invalid
+
+
+def _invalid_values_in_chunk(
+    tp_ref: object, strict: bool, eval: bool, chunk: List[object], explain: bool
+) -> "List[Tuple[int, Optional[ValidationError]]]":
+    """
+    Returns the index of each value in `chunk` which is not in the shape of
+    the type referred to by `tp_ref`, with a ValidationError explaining why
+    if `explain` is True.
+
+    Runs inside an executor's worker, which may be in a different process
+    or interpreter. Each process and interpreter has its own caches of
+    resolved types and plans, which persist between chunks.
+    """
+    tp = _type_from_reference(tp_ref)
+    plan = _plan_for_worker(tp, strict, eval)
+    invalid = []  # type: List[Tuple[int, Optional[ValidationError]]]
+    for i, value in enumerate(chunk):
+        try:
+            e = plan._check(value, explain)
+        except RecursionError:
+            # Value is nested too deeply to check recursively
+            e = _checkcast_iteratively(
+                tp, value, _TrycastOptions(strict, eval, "compile", explain)
+            )
+        if e is not None:
+            # NOTE: Don't send _REJECTED, which would not be unpickled
+            #       as the same object in another process
+            invalid.append((i, e if explain else None))
+    return invalid
+
+
+@_ValueCache
+def _plan_for_worker(tp: object, strict: bool, eval: bool) -> "_Plan":
+    # NOTE: Compiles `tp` rather than receiving the caller's plan so that
+    #       only `tp` needs to be pickled when the worker is in another process
+    return _compile_plan(tp, _TrycastOptions(strict, eval, funcname="compile"))
+
+
+# ------------------------------------------------------------------------------
+# compile: Cooperative checks
+
+
+class _Pacer:
+    """
+    Counts the elements checked by _acheck_plan(), deciding when it
+    should yield to the event loop.
+    """
+
+    __slots__ = ("_chunk_size", "_remaining")
+
+    def __init__(self, chunk_size: int) -> None:
+        self._chunk_size = chunk_size
+        self._remaining = chunk_size
+
+    def tick(self) -> bool:
+        """
+        Records that an element was checked,
+        returning whether it is time to yield to the event loop.
+        """
+        self._remaining -= 1
+        if self._remaining > 0:
+            return False
+        self._remaining = self._chunk_size
+        return True
+
+
+async def _yield_to_event_loop() -> None:
+    import asyncio  # slow to import, so import only when needed
+
+    await asyncio.sleep(0)
+
+
+def _is_walked_cooperatively(plan: "_Plan") -> bool:
+    """
+    Returns whether _acheck_plan() checks values against `plan` itself,
+    rather than delegating to plan._check().
+    """
+    return (
+        isinstance(plan, (_TypedDictPlan, _LazyPlan))
+        or (isinstance(plan, _ListlikePlan) and plan._element_plan is not None)
+        or (isinstance(plan, _DictlikePlan) and plan._key_value_plans is not None)
+    )
+
+
+async def _acheck_plan(
+    plan: "_Plan", value: object, explain: bool, pacer: _Pacer
+) -> "Optional[ValidationError]":
+    """
+    Returns the same result as plan._check(value, explain), but yields to the
+    event loop whenever `pacer` says so while walking the elements of lists,
+    tuples, and dicts.
+
+    Only collections and TypedDicts are walked here. Other parts of `value`,
+    such as the members of a Union, are checked with _Plan._check().
+    """
+    while isinstance(plan, _LazyPlan):
+        plan = plan._resolved_plan()
+
+    if isinstance(plan, _ListlikePlan):
+        element_plan = plan._element_plan
+        if (
+            element_plan is None
+            or not isinstance(value, plan._listlike_type)
+            or _are_elements_known_to_be(value, element_plan._tp)
+        ):
+            return plan._check(value, explain)
+        walk = _is_walked_cooperatively(element_plan)
+        for i, x in enumerate(value):  # type: ignore[reportArgumentType]  # pyright
+            if walk:
+                e = await _acheck_plan(element_plan, x, explain, pacer)
+            else:
+                e = element_plan._check(x, explain)
+            if e is not None:
+                if not explain:
+                    return e
+                return plan._element_error(value, i, e)
+            if pacer.tick():
+                await _yield_to_event_loop()
+        return None
+
+    elif isinstance(plan, _DictlikePlan):
+        if plan._key_value_plans is None or not isinstance(value, plan._dictlike_type):
+            return plan._check(value, explain)
+        (key_plan, value_plan) = plan._key_value_plans
+        walk = _is_walked_cooperatively(value_plan)
+        for k, v in value.items():  # type: ignore[reportAttributeAccessIssue]  # pyright
+            e = key_plan._check(k, explain)
+            if e is not None:
+                if not explain:
+                    return e
+                return plan._key_error(value, k, e)
+            if walk:
+                e = await _acheck_plan(value_plan, v, explain, pacer)
+            else:
+                e = value_plan._check(v, explain)
+            if e is not None:
+                if not explain:
+                    return e
+                return plan._value_error(value, k, e)
+            if pacer.tick():
+                await _yield_to_event_loop()
+        return None
+
+    elif isinstance(plan, _TypedDictPlan):
+        if type(value) is not dict and not isinstance(value, CMapping):
+            return plan._check(value, explain)
+        field_plans = plan._resolved_field_plans()
+        for k, v in value.items():
+            P = field_plans.get(k)
+            if P is not None:
+                if _is_walked_cooperatively(P):
+                    e = await _acheck_plan(P, v, explain, pacer)
+                else:
+                    e = P._check(v, explain)
+                if e is not None:
+                    if not explain:
+                        return e
+                    return plan._field_error(value, k, e)
+        return plan._check_required_keys(value, explain)
+
+    else:
+        return plan._check(value, explain)
+
+
+def _compile_plan(
+    tp: object,
+    options: _TrycastOptions,
+    plan_for_type: "Optional[Dict[object, _Plan]]" = None,
+    referrer: "Optional[_Plan]" = None,
+) -> "_Plan":
+    """
+    Resolves `tp` into a graph of _Plans which checks values with the same
+    results as _checkcast_inner(tp, value, options).
+
+    Parameters:
+    * plan_for_type -- The plan already compiled for each TypedDict and
+      type alias reachable from the type being compiled. A recursive reference
+      to one of these types refers back to its existing plan, so that the
+      graph is finite even for a type like `type X = list[X]`.
+    * referrer -- The plan of the TypedDict or type alias whose fields or
+      value `tp` is part of, or None if `tp` is part of the type being compiled.
+
+    Raises:
+    * TypeNotSupportedError
+    * UnresolvedForwardRefError
+    """
+    if plan_for_type is None:
+        plan_for_type = {}
+
+    if tp is int:
+        # Also accept bools as valid int values
+        return _IsInstancePlan(tp, int)
+
+    if tp is float:
+        # Also accept ints and bools as valid float values
+        return _IsInstancePlan(tp, (float, int))
+
+    if tp is complex:
+        # Also accept floats, ints, and bools as valid complex values
+        return _IsInstancePlan(tp, (complex, float, int))
+
+    type_origin = get_origin(tp)
+
+    if type_origin is list or type_origin is List:  # List, List[T]
+        return _compile_listlike_plan(tp, list, options, plan_for_type, referrer)
+
+    if type_origin is set or type_origin is Set:  # Set, Set[T]
+        return _compile_listlike_plan(tp, set, options, plan_for_type, referrer)
+
+    if type_origin is frozenset or type_origin is FrozenSet:  # FrozenSet, FrozenSet[T]
+        return _compile_listlike_plan(
+            tp, frozenset, options, plan_for_type, referrer, covariant_t=True
+        )
+
+    if type_origin is tuple or type_origin is Tuple:
+        type_args = get_args(tp)
+        if len(type_args) == 0 or (
+            len(type_args) == 2 and type_args[1] is Ellipsis
+        ):  # Tuple, Tuple[T, ...]
+            return _compile_listlike_plan(
+                tp, tuple, options, plan_for_type, referrer, covariant_t=True
+            )
+        else:  # Tuple[Ts]
+            return _FixedTuplePlan(
+                tp,
+                tuple(
+                    [
+                        _compile_plan(T, options, plan_for_type, referrer)
+                        for T in type_args
+                    ]
+                ),
+            )
+
+    if type_origin is Sequence or type_origin is CSequence:  # Sequence, Sequence[T]
+        return _compile_listlike_plan(
+            tp, CSequence, options, plan_for_type, referrer, covariant_t=True
+        )
+
+    if (
+        type_origin is MutableSequence or type_origin is CMutableSequence
+    ):  # MutableSequence, MutableSequence[T]
+        return _compile_listlike_plan(
+            tp, CMutableSequence, options, plan_for_type, referrer
+        )
+
+    if type_origin is dict or type_origin is Dict:  # Dict, Dict[K, V]
+        return _compile_dictlike_plan(tp, dict, options, plan_for_type, referrer)
+
+    if type_origin is Mapping or type_origin is CMapping:  # Mapping, Mapping[K, V]
+        return _compile_dictlike_plan(
+            tp, CMapping, options, plan_for_type, referrer, covariant_v=True
+        )
+
+    if (
+        type_origin is MutableMapping or type_origin is CMutableMapping
+    ):  # MutableMapping, MutableMapping[K, V]
+        return _compile_dictlike_plan(
+            tp, CMutableMapping, options, plan_for_type, referrer
+        )
+
+    if (
+        type_origin is Union or type_origin is UnionType
+    ):  # Union[T1, T2, ...], Optional[T]
+        return _UnionPlan(
+            tp,
+            tuple(
+                [
+                    _compile_plan(T, options, plan_for_type, referrer)
+                    for T in get_args(tp)
+                ]
+            ),
+            options,
+        )
+
+    if type_origin is Literal:  # Literal[...]
+        return _LiteralPlan(tp, get_args(tp))
+
+    if type_origin is CCallable:
+        callable_args = get_args(tp)
+        if callable_args == ():
+            # Callable
+            return _CallablePlan(tp, None)
+        else:
+            assert len(callable_args) == 2
+            (param_types, return_type) = callable_args
+
+            if return_type is not Any:
+                # Callable[..., T]
+                raise _callable_return_type_not_supported_error(tp, options)
+
+            if param_types is Ellipsis:
+                # Callable[..., Any]
+                return _compile_plan(Callable, options)
+
+            assert isinstance(param_types, list)
+            for param_type in param_types:
+                if param_type is not Any:
+                    raise _callable_param_types_not_supported_error(
+                        tp, param_types, options
+                    )
+
+            # Callable[[Any * N], Any]
+            return _CallablePlan(tp, len(param_types))
+
+    if isinstance(type_origin, TypeAliasType):  # type: ignore[16]  # pyre
+        # NOTE: Alias values are compiled lazily because they may be recursive
+        return _shared_plan(
+            tp,
+            plan_for_type,
+            lambda: _LazyPlan(
+                tp,
+                lambda alias_plan: _compile_plan(
+                    _type_alias_value(tp), options, plan_for_type, alias_plan
+                ),
+            ),
+            referrer,
+        )
+
+    # NOTE: Must come before the generic _GenericAlias check
+    if _is_typed_dict(type_origin):  # T[X1, X2, ...] where T extends TypedDict
+        # Build substitution map from TypeVars to concrete types
+        type_params = getattr(type_origin, "__parameters__", ())
+        type_args = get_args(tp)
+        typevar_substitutions = dict(
+            zip(type_params, type_args)
+        )  # type: Dict[object, object]
+        return _shared_plan(
+            tp,
+            plan_for_type,
+            lambda: _TypedDictPlan(
+                tp, type_origin, options, typevar_substitutions, plan_for_type
+            ),
+            referrer,
+        )
+
+    if isinstance(tp, _GenericAlias):  # type: ignore[16]  # pyre
+        raise _generic_not_supported_error(type_origin, options)
+
+    if _is_typed_dict(tp):  # T extends TypedDict
+        return _shared_plan(
+            tp,
+            plan_for_type,
+            lambda: _TypedDictPlan(tp, tp, options, {}, plan_for_type),
+            referrer,
+        )
+
+    if _is_newtype(tp):
+        if options.strict:
+            raise _newtype_not_supported_error(tp, options)
+        else:
+            supertype = tp.__supertype__  # type: ignore[attr-defined]  # mypy
+            return _compile_plan(supertype, options, plan_for_type, referrer)
+
+    if isinstance(tp, TypeVar):
+        raise _typevar_not_supported_error(options)
+
+    if tp is Any:
+        return _AnyPlan(tp)
+
+    if tp is Never or tp is NoReturn:
+        return _NeverPlan(tp)
+
+    if isinstance(tp, TypeAliasType):  # type: ignore[16]  # pyre
+        # NOTE: Alias values are compiled lazily because they may be recursive
+        return _shared_plan(
+            tp,
+            plan_for_type,
+            lambda: _LazyPlan(
+                tp,
+                lambda alias_plan: _compile_type_alias_plan(
+                    tp, options, plan_for_type, alias_plan
+                ),
+            ),
+            referrer,
+        )
+
+    if isinstance(tp, ForwardRef):
+        raise UnresolvedForwardRefError()
+
+    return _IsInstancePlan(tp, tp)  # type: ignore[arg-type]  # mypy
+
+
+def _shared_plan(
+    tp: object,
+    plan_for_type: "Dict[object, _Plan]",
+    create_plan: "Callable[[], Union[_TypedDictPlan, _LazyPlan]]",
+    referrer: "Optional[_Plan]",
+) -> "_Plan":
+    """
+    Returns the plan already compiled for `tp` if there is one,
+    otherwise creates it and remembers it for `tp`.
+
+    Makes the plan a shared plan if the plans of more than one TypedDict or
+    type alias refer to it (see _SharedPlan).
+    """
+    try:
+        plan = plan_for_type.get(tp)
+    except TypeError:  # unhashable type form, such as with unhashable arguments
+        return create_plan()
+    if plan is None:
+        plan = plan_for_type[tp] = create_plan()
+    if referrer is not None and not plan._is_shared:
+        first_referrer = plan._referrer  # type: ignore[attr-defined]  # mypy
+        if first_referrer is None:
+            plan._referrer = referrer  # type: ignore[attr-defined]  # mypy
+        elif first_referrer is not referrer:
+            # NOTE: Changes the class of the plan rather than checking a flag
+            #       in _check(), so that plans which are not shared cost
+            #       no more to check than they did
+            if isinstance(plan, _TypedDictPlan):
+                plan.__class__ = _SharedTypedDictPlan
+            else:
+                plan.__class__ = _SharedLazyPlan
+    return plan
+
+
+def _compile_type_alias_plan(
+    tp: object,
+    options: _TrycastOptions,
+    plan_for_type: "Dict[object, _Plan]",
+    referrer: "_Plan",
+) -> "_Plan":
+    alias_plan = _compile_plan(_type_alias_value(tp), options, plan_for_type, referrer)
+    scalar_types = _json_scalar_types(tp)
+    if scalar_types is not None:
+        return _JsonPlan(tp, scalar_types, alias_plan)
+    return alias_plan
+
+
+def _compile_listlike_plan(
+    tp: object,
+    listlike_type: Type,
+    options: _TrycastOptions,
+    plan_for_type: "Dict[object, _Plan]",
+    referrer: "Optional[_Plan]",
+    *,
+    covariant_t: bool = False,
+) -> "_Plan":
+    T_ = get_args(tp)
+    if len(T_) == 0:
+        element_plan = None
+    else:
+        T = T_[0]  # List[T] or Tuple[T, ...]
+        if _is_simple_typevar(T, covariant=covariant_t):
+            element_plan = None
+        else:
+            element_plan = _compile_plan(T, options, plan_for_type, referrer)
+    return _ListlikePlan(tp, listlike_type, element_plan)
+
+
+def _compile_dictlike_plan(
+    tp: object,
+    dictlike_type: Type,
+    options: _TrycastOptions,
+    plan_for_type: "Dict[object, _Plan]",
+    referrer: "Optional[_Plan]",
+    *,
+    covariant_v: bool = False,
+) -> "_Plan":
+    K_V = get_args(tp)
+    if len(K_V) == 0:
+        return _DictlikePlan(tp, dictlike_type, None)
+    (K, V) = K_V
+    if _is_simple_typevar(K) and _is_simple_typevar(V, covariant=covariant_v):
+        return _DictlikePlan(tp, dictlike_type, None)
+    return _DictlikePlan(
+        tp,
+        dictlike_type,
+        (
+            _compile_plan(K, options, plan_for_type, referrer),
+            _compile_plan(V, options, plan_for_type, referrer),
+        ),
+    )
+
+
+# Number of values that a compiled check checks against shared plans before it
+# starts remembering the results, so that checking a value which shares nothing,
+# such as a tree parsed from JSON, costs no more than it did
+_PLAN_CHECKS_BEFORE_TRACKING = 10000
+
+_CHECKING = object()
+
+
+class _PlanMemo:
+    """
+    Remembers the result of checking each value against each shared plan
+    (see _SharedPlan) during a single check of a value,
+    so that a value referred to from many places is checked only once
+    against each plan.
+    """
+
+    __slots__ = ("_explain", "_untracked_count", "_results", "_values")
+
+    def __init__(self, explain: bool) -> None:
+        # Whether the check explains why a value is rejected
+        self._explain = explain
+        self._untracked_count = _PLAN_CHECKS_BEFORE_TRACKING
+        # For each (id(value), id(plan)) the result of the check,
+        # or _CHECKING while it is still running
+        self._results = {}  # type: Dict[Tuple[int, int], object]
+        # Each value in _results, kept alive so that its id() is not reused
+        # during the check, such as by another value which a lazy Sequence
+        # or Mapping creates each time one of its items is looked up
+        self._values = []  # type: List[object]
+
+    # NOTE: Generated functions remember results the same way.
+    #       See _SourceGenerator._memoized_function_lines().
+
+    def key_for(self, value: object, plan: "_Plan") -> Optional[Tuple[int, int]]:
+        """
+        Returns the key to remember the result of checking `value`
+        against `plan` with, or None if it should not be remembered.
+        """
+        if type(value) in _ATOMIC_TYPES:
+            return None
+        if self._untracked_count > 0:
+            self._untracked_count -= 1
+            return None
+        return (id(value), id(plan))
+
+    def recall(self, key: Tuple[int, int], value: object) -> object:
+        """
+        Returns the result remembered for `key`, or _MISSING if the caller
+        must check the value and then call remember().
+
+        Raises:
+        * _ValueContainsItselfError -- If the value is still being checked.
+        """
+        result = self._results.get(key, _MISSING)
+        if result is _MISSING:
+            self._results[key] = _CHECKING
+            self._values.append(value)
+        elif result is _CHECKING:
+            raise _ValueContainsItselfError()
+        return result
+
+    def remember(self, key: Tuple[int, int], e: "Optional[ValidationError]") -> None:
+        if e is None or not self._explain:
+            self._results[key] = e
+        else:
+            # NOTE: A ValidationError explaining why is not shared, because
+            #       its prefix is altered by the check that receives it
+            del self._results[key]
+
+
+class _Plan:
+    """
+    A node in the graph of checks that compile() resolves a type into.
+
+    A recursive reference to a TypedDict or type alias is an edge back to
+    the node already compiled for that type.
+    """
+
+    __slots__ = ("_tp",)
+
+    # Whether this plan is a _SharedPlan
+    _is_shared = False
+
+    def __init__(self, tp: object) -> None:
+        self._tp = tp
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        """
+        Returns None if `value` is in the shape of this plan's type,
+        or a ValidationError otherwise.
+
+        If `explain` is False then may return the shared _REJECTED error
+        rather than an error describing why `value` was rejected.
+        """
+        raise NotImplementedError()
+
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        """
+        Emits statements which return False if the value in variable `v`
+        is not in the shape of this plan's type.
+        """
+        expr = self._emit_expr(gen, v)
+        assert expr is not None
+        gen.line(indent, f"if not {expr}: return False")
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        """
+        Returns an expression which is true if the value in variable `v`
+        is in the shape of this plan's type, or None if there is no
+        such expression that avoids emitting statements.
+        """
+        return None
+
+
+class _AnyPlan(_Plan):
+    __slots__ = ()
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        return None
+
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        pass
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        return "True"
+
+
+def _accepts_everything(*plans: _Plan) -> bool:
+    """
+    Returns whether each of `plans` accepts every value, so that the
+    generated source which checks a value against it would be empty.
+    """
+    for plan in plans:
+        while isinstance(plan, _LazyPlan):
+            plan = plan._resolved_plan()
+        if not isinstance(plan, _AnyPlan):
+            return False
+    return True
+
+
+class _NeverPlan(_Plan):
+    __slots__ = ()
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        return ValidationError(self._tp, value) if explain else _REJECTED
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        return "False"
+
+
+class _IsInstancePlan(_Plan):
+    __slots__ = ("_classinfo",)
+
+    def __init__(self, tp: object, classinfo: Union[type, Tuple[type, ...]]) -> None:
+        super().__init__(tp)
+        self._classinfo = classinfo
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if isinstance(value, self._classinfo):
+            return None
+        else:
+            return ValidationError(self._tp, value) if explain else _REJECTED
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        if self._classinfo is type(None):
+            return f"{v} is None"
+        return f"isinstance({v}, {gen.classinfo(self._classinfo)})"
+
+
+class _ListlikePlan(_Plan):
+    __slots__ = ("_listlike_type", "_element_plan")
+
+    def __init__(
+        self, tp: object, listlike_type: Type, element_plan: Optional[_Plan]
+    ) -> None:
+        super().__init__(tp)
+        self._listlike_type = listlike_type
+        self._element_plan = element_plan  # None if elements need no check
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if _is_instance(value, self._listlike_type):
+            element_plan = self._element_plan
+            if (
+                element_plan is not None
+                and not _are_elements_known_to_be(value, element_plan._tp)
+                and not _are_elements_instances_of(value, element_plan._tp)
+            ):
+                for i, x in enumerate(value):  # type: ignore[arg-type, var-annotated, reportArgumentType]  # mypy, pyright
+                    e = element_plan._check(x, explain)
+                    if e is not None:
+                        if not explain:
+                            return e
+                        return self._element_error(value, i, e)
+            return None
+        elif self._listlike_type is CSequence and _is_ndarray_sequence(value):
+            return self._check_ndarray(value, explain)
+        else:
+            return ValidationError(self._tp, value) if explain else _REJECTED
+
+    def _check_ndarray(self, value: Any, explain: bool) -> "Optional[ValidationError]":
+        # Same as _checkcast_ndarray_sequence()
+        element_plan = self._element_plan
+        if element_plan is None or _are_ndarray_elements_known_to_be(
+            value, element_plan._tp
+        ):
+            return None
+        e = self._check(_ndarray_elements(value), explain)
+        if e is None or not explain:
+            return e
+        return ValidationError(self._tp, value, _causes=e._causes)
+
+    def _matches_ndarray(self, value: object) -> bool:
+        return _is_ndarray_sequence(value) and self._check_ndarray(value, False) is None
+
+    def _element_error(
+        self, value: object, i: int, e: "ValidationError"
+    ) -> "ValidationError":
+        return ValidationError(
+            self._tp,
+            value,
+            _causes=[e._with_prefix(_LazyStr(lambda: f"At index {i}"))],
+        )
+
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        element_plan = self._element_plan
+        if element_plan is None or _accepts_everything(element_plan):
+            super()._emit(gen, v, indent)
+        else:
+            if self._listlike_type is CSequence:
+                gen.line(indent, f"if not {self._isinstance_expr(gen, v)}:")
+                matches_ndarray = gen.constant(self._matches_ndarray)
+                gen.line(
+                    indent + _INDENT, f"if not {matches_ndarray}({v}): return False"
+                )
+                gen.line(indent, "else:")
+                indent += _INDENT
+            else:
+                gen.line(
+                    indent, f"if not {self._isinstance_expr(gen, v)}: return False"
+                )
+            if type(element_plan._tp) is type:
+                known = gen.constant(_are_elements_known_to_be)
+                instances = gen.constant(_are_elements_instances_of)
+                T = gen.constant(element_plan._tp)
+                gen.line(
+                    indent, f"if not {known}({v}, {T}) and not {instances}({v}, {T}):"
+                )
+                indent += _INDENT
+            x = gen.new_var()
+            gen.line(indent, f"for {x} in {v}:")
+            gen.emit(element_plan, x, indent + _INDENT)
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        element_plan = self._element_plan
+        if element_plan is None or _accepts_everything(element_plan):
+            if self._listlike_type is CSequence:
+                is_ndarray = gen.constant(_is_ndarray_sequence)
+                return f"({self._isinstance_expr(gen, v)} or {is_ndarray}({v}))"
+            return self._isinstance_expr(gen, v)
+        else:
+            return None
+
+    def _isinstance_expr(self, gen: "_SourceGenerator", v: str) -> str:
+        return gen.isinstance_expr(v, self._listlike_type)
+
+
+class _FixedTuplePlan(_Plan):
+    __slots__ = ("_element_plans",)
+
+    def __init__(self, tp: object, element_plans: Tuple[_Plan, ...]) -> None:
+        super().__init__(tp)
+        self._element_plans = element_plans
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if isinstance(value, tuple):
+            element_plans = self._element_plans
+            if len(value) != len(element_plans):
+                return ValidationError(self._tp, value) if explain else _REJECTED
+
+            for i, P, t in zip(range(len(element_plans)), element_plans, value):
+                e = P._check(t, explain)
+                if e is not None:
+                    if not explain:
+                        return e
+                    return ValidationError(
+                        self._tp,
+                        value,
+                        _causes=[e._with_prefix(_LazyStr(lambda: f"At index {i}"))],
+                    )
 
-    # Private builder method
-    def _with_prefix(
-        self: _SelfValidationError, prefix: "_LazyStr", /  # type: ignore[11]  # pyre  # noqa: W504
-    ) -> _SelfValidationError:
-        self._prefix = prefix
-        return self
+            return None
+        else:
+            return ValidationError(self._tp, value) if explain else _REJECTED
+
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        element_count = len(self._element_plans)
+        gen.line(
+            indent,
+            f"if not (isinstance({v}, tuple) and len({v}) == {element_count}): "
+            f"return False",
+        )
+        xs = [gen.new_var() for _ in range(element_count)]
+        gen.line(indent, f"({', '.join(xs)},) = {v}")
+        for P, x in zip(self._element_plans, xs):
+            gen.emit(P, x, indent)
 
-    # === __str__ ===
 
-    def __str__(self) -> str:
+class _DictlikePlan(_Plan):
+    __slots__ = ("_dictlike_type", "_key_value_plans")
+
+    def __init__(
+        self,
+        tp: object,
+        dictlike_type: Type,
+        key_value_plans: Optional[Tuple[_Plan, _Plan]],
+    ) -> None:
+        super().__init__(tp)
+        self._dictlike_type = dictlike_type
+        self._key_value_plans = key_value_plans  # None if items need no check
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if _is_instance(value, self._dictlike_type):
+            if self._key_value_plans is not None:
+                (key_plan, value_plan) = self._key_value_plans
+                if _are_items_instances_of(value, key_plan._tp, value_plan._tp):
+                    return None
+                for k, v in value.items():  # type: ignore[attr-defined, reportAttributeAccessIssue]  # mypy, pyright
+                    e = key_plan._check(k, explain)
+                    if e is not None:
+                        if not explain:
+                            return e
+                        return self._key_error(value, k, e)
+                    e = value_plan._check(v, explain)
+                    if e is not None:
+                        if not explain:
+                            return e
+                        return self._value_error(value, k, e)
+            return None
+        else:
+            return ValidationError(self._tp, value) if explain else _REJECTED
+
+    def _key_error(
+        self, value: object, k: object, e: "ValidationError"
+    ) -> "ValidationError":
+        return ValidationError(
+            self._tp,
+            value,
+            _causes=[e._with_prefix(_LazyStr(lambda: f"Key {k!r}"))],
+        )
+
+    def _value_error(
+        self, value: object, k: object, e: "ValidationError"
+    ) -> "ValidationError":
+        return ValidationError(
+            self._tp,
+            value,
+            _causes=[e._with_prefix(_LazyStr(lambda: f"At key {k!r}"))],
+        )
+
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        key_value_plans = self._key_value_plans
+        if key_value_plans is None or _accepts_everything(*key_value_plans):
+            super()._emit(gen, v, indent)
+        else:
+            (key_plan, value_plan) = key_value_plans
+            gen.line(indent, f"if not {self._isinstance_expr(gen, v)}: return False")
+            if type(key_plan._tp) is type and type(value_plan._tp) is type:
+                instances = gen.constant(_are_items_instances_of)
+                (K, V) = (gen.constant(key_plan._tp), gen.constant(value_plan._tp))
+                gen.line(indent, f"if not {instances}({v}, {K}, {V}):")
+                indent += _INDENT
+            (k, x) = (gen.new_var(), gen.new_var())
+            gen.line(indent, f"for {k}, {x} in {v}.items():")
+            gen.emit(key_plan, k, indent + _INDENT)
+            gen.emit(value_plan, x, indent + _INDENT)
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        key_value_plans = self._key_value_plans
+        if key_value_plans is None or _accepts_everything(*key_value_plans):
+            return self._isinstance_expr(gen, v)
+        else:
+            return None
+
+    def _isinstance_expr(self, gen: "_SourceGenerator", v: str) -> str:
+        return gen.isinstance_expr(v, self._dictlike_type)
+
+
+class _UnionPlan(_Plan):
+    __slots__ = (
+        "_member_plans",
+        "_literal_plan",
+        "_options",
+        "_tag_dispatch",
+        "_type_dispatch",
+    )
+
+    def __init__(
+        self,
+        tp: object,
+        member_plans: Tuple[_Plan, ...],
+        options: _TrycastOptions,
+    ) -> None:
+        super().__init__(tp)
+        self._member_plans = member_plans
+        # Checks the values of all Literal[...] members at once
+        self._literal_plan = (
+            _LiteralPlan(tp, tuple(_literals_of(tp)))
+            if any([isinstance(P, _LiteralPlan) for P in member_plans])
+            else None
+        )
+        self._options = options
+        self._tag_dispatch = _MISSING  # type: object
+        self._type_dispatch = _MISSING  # type: object
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        type_dispatch = self._resolved_type_dispatch()
+        if value is None and type_dispatch is not None and type_dispatch.accepts_none:
+            return None
+        if self._literal_plan is not None and self._literal_plan._matches(value):
+            return None
+        if type(value) is dict or isinstance(value, CMapping):
+            tag_dispatch = self._resolved_tag_dispatch()
+            if tag_dispatch is not None:
+                # Try the only tagged member that could match first
+                tag = value.get(tag_dispatch.key, _MISSING)
+                try:
+                    P = tag_dispatch.plan_for_tag.get((type(tag), tag))
+                except TypeError:  # unhashable tag value
+                    P = None
+                if P is not None and P._check(value, explain) is None:
+                    return None
+                if not explain:
+                    # No tagged member can match. Check only the untagged members.
+                    for P in tag_dispatch.untagged_plans:
+                        if P._check(value, explain) is None:
+                            return None
+                    return _REJECTED
+        # Otherwise check all members in order, to report all causes,
+        # skipping members that could never match the type of the value
+
+        if type_dispatch is None:
+            member_plans = self._member_plans
+            may_match = None  # type: Optional[Tuple[bool, ...]]
+        else:
+            (member_plans, may_match) = type_dispatch.entry_for(type(value))
+
+        if not explain:
+            for P in member_plans:
+                if P._check(value, explain) is None:
+                    return None
+            return _REJECTED
+
+        causes = []
+        for i, (T, P) in enumerate(zip(get_args(self._tp), self._member_plans)):
+            if may_match is not None and not may_match[i]:
+                causes.append(ValidationError(T, value))
+                continue
+            e = P._check(value, explain)
+            if e is not None:
+                causes.append(e)
+            else:
+                return None
+        return ValidationError(self._tp, value, _causes=causes)
+
+    def _resolved_type_dispatch(self) -> "Optional[_UnionTypeDispatch[_Plan]]":
+        type_dispatch = self._type_dispatch
+        if type_dispatch is _MISSING:
+            # NOTE: Resolved lazily because members' annotations may refer
+            #       to types that are not defined until after compile()
+            type_filters = _union_type_filters(self._tp, self._options.eval)
+            if type_filters is None:
+                type_dispatch = None
+            else:
+                type_dispatch = _UnionTypeDispatch(self._member_plans, type_filters)
+            self._type_dispatch = type_dispatch
+        return type_dispatch  # type: ignore[return-value]  # mypy
+
+    def _resolved_tag_dispatch(self) -> "Optional[_TagDispatch]":
+        tag_dispatch = self._tag_dispatch
+        if tag_dispatch is _MISSING:
+            # NOTE: Resolved lazily because members' annotations may refer
+            #       to types that are not defined until after compile()
+            discriminator = _union_discriminator(self._tp, self._options.eval)
+            if discriminator is None:
+                tag_dispatch = None
+            else:
+                plan_for_member = dict(zip(get_args(self._tp), self._member_plans))
+                tag_dispatch = _TagDispatch(
+                    discriminator.key,
+                    {
+                        tag: plan_for_member[M]
+                        for (tag, M) in discriminator.member_for_tag.items()
+                    },
+                    tuple([plan_for_member[M] for M in discriminator.untagged_members]),
+                )
+            self._tag_dispatch = tag_dispatch
+        return tag_dispatch  # type: ignore[return-value]  # mypy
+
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        tag_dispatch = self._resolved_tag_dispatch()
+        if tag_dispatch is not None and self._emit_tag_dispatch(
+            gen, v, indent, tag_dispatch
+        ):
+            return
+
+        # NOTE: Members may be checked in any order because the generated
+        #       source only decides *whether* a value matches
+        exprs = []
+        stmt_plans = []
+        for P in self._nonliteral_member_plans_and_literal_plan():
+            expr = P._emit_expr(gen, v)
+            if expr is not None:
+                exprs.append(expr)
+            else:
+                stmt_plans.append(P)
+        # Inline the last member that needs statements. Call the others.
+        exprs += [gen.call(P, v) for P in stmt_plans[:-1]]
+        if len(stmt_plans) == 0:
+            gen.line(indent, f"if not ({' or '.join(exprs)}): return False")
+        elif len(exprs) == 0:
+            gen.emit(stmt_plans[-1], v, indent)
+        else:
+            gen.line(indent, f"if not ({' or '.join(exprs)}):")
+            gen.emit(stmt_plans[-1], v, indent + _INDENT)
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        exprs = []
+        for P in self._nonliteral_member_plans_and_literal_plan():
+            expr = P._emit_expr(gen, v)
+            if expr is None:
+                return None
+            exprs.append(expr)
+        return f"({' or '.join(exprs)})"
+
+    def _nonliteral_member_plans_and_literal_plan(self) -> List[_Plan]:
+        plans = [P for P in self._member_plans if not isinstance(P, _LiteralPlan)]
+        if self._literal_plan is not None:
+            plans.insert(0, self._literal_plan)
+        return plans
+
+    @staticmethod
+    def _emit_tag_dispatch(
+        gen: "_SourceGenerator", v: str, indent: str, tag_dispatch: "_TagDispatch"
+    ) -> bool:
         """
-        Returns a human-readable explanation of this ValidationError.
+        Emits source which checks only the tagged member selected by
+        the value's tag, if the value matches no untagged member.
+        Emits nothing and returns False if an untagged member
+        cannot be checked with an expression.
+        """
+        untagged_exprs = []
+        for P in tag_dispatch.untagged_plans:
+            expr = P._emit_expr(gen, v)
+            if expr is None:
+                return False
+            untagged_exprs.append(expr)
+
+        if len(untagged_exprs) > 0:
+            gen.line(indent, f"if not ({' or '.join(untagged_exprs)}):")
+            indent += _INDENT
+        gen.line(indent, f"if not {gen.isinstance_expr(v, CMapping)}: return False")
+        (t, f) = (gen.new_var(), gen.new_var())
+        gen.line(indent, f"{t} = {v}.get({tag_dispatch.key!r}, _MISSING)")
+        gen.line(indent, "try:")
+        gen.line(
+            indent + _INDENT,
+            f"{f} = {gen.function_table(tag_dispatch.plan_for_tag)}"
+            f"[(type({t}), {t})]",
+        )
+        gen.line(indent, "except (KeyError, TypeError):")
+        gen.line(indent + _INDENT, "return False")
+        gen.line(indent, f"if not {gen.call_function(f, v)}: return False")
+        return True
 
-        The specific format of this explanation may change in the future.
+
+class _TagDispatch(NamedTuple):
+    key: str
+    plan_for_tag: Dict[Tuple[type, object], _Plan]
+    untagged_plans: Tuple[_Plan, ...]
+
+
+class _LiteralPlan(_Plan):
+    __slots__ = ("_literals", "_literal_keys")
+
+    def __init__(self, tp: object, literals: Tuple[object, ...]) -> None:
+        super().__init__(tp)
+        self._literals = literals
+        try:
+            self._literal_keys = frozenset(
+                [(type(literal), literal) for literal in literals]
+            )  # type: Optional[FrozenSet[Tuple[type, object]]]
+        except TypeError:  # unhashable literal
+            self._literal_keys = None
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if self._matches(value):
+            return None
+        return ValidationError(self._tp, value) if explain else _REJECTED
+
+    def _matches(self, value: object) -> bool:
+        if self._literal_keys is not None:
+            return _is_literal_value_by_key(self._literal_keys, value)
+        else:
+            return _is_literal_value_by_scan(self._literals, value)
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        if self._literal_keys is not None:
+            return (
+                f"{gen.constant(_is_literal_value_by_key)}"
+                f"({gen.constant(self._literal_keys)}, {v})"
+            )
+        else:
+            return (
+                f"{gen.constant(_is_literal_value_by_scan)}"
+                f"({gen.constant(self._literals)}, {v})"
+            )
+
+
+class _CallablePlan(_Plan):
+    __slots__ = ("_param_count",)
+
+    def __init__(self, tp: object, param_count: Optional[int]) -> None:
+        super().__init__(tp)
+        self._param_count = param_count  # None if any signature is acceptable
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if self._param_count is None:
+            if callable(value):
+                return None
+            else:
+                return ValidationError(self._tp, value) if explain else _REJECTED
+        else:
+            return _checkcast_callable_arity(
+                self._tp, value, self._param_count, explain=explain
+            )
+
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        if self._param_count is None:
+            return f"callable({v})"
+        else:
+            return (
+                f"{gen.constant(_checkcast_callable_arity)}("
+                f"{gen.constant(self._tp)}, {v}, {self._param_count}) is None"
+            )
+
+
+# Maximum number of distinct orders of keys for which a _TypedDictPlan
+# remembers which fields to check. Real traffic reuses a handful of orders.
+_MAX_FIELD_ORDERS_PER_PLAN = 64
+
+
+class _TypedDictPlan(_Plan):
+    __slots__ = (
+        "_typed_dict_class",
+        "_options",
+        "_typevar_substitutions",
+        "_plan_for_type",
+        "_referrer",
+        "_field_plans",
+        "_required_keys",
+        "_field_plans_for_keys",
+    )
+
+    def __init__(
+        self,
+        tp: object,
+        typed_dict_class: object,
+        options: _TrycastOptions,
+        typevar_substitutions: Dict[object, object],
+        plan_for_type: "Dict[object, _Plan]",
+    ) -> None:
+        super().__init__(tp)
+        self._typed_dict_class = typed_dict_class
+        self._options = options
+        self._typevar_substitutions = typevar_substitutions
+        # Shared with the rest of the graph, so that fields referring back
+        # to this TypedDict are checked by this same plan
+        self._plan_for_type = plan_for_type
+        # Plan of the first TypedDict or type alias found to refer to this plan
+        # (see _shared_plan())
+        self._referrer = None  # type: Optional[_Plan]
+        self._field_plans = None  # type: Optional[Dict[str, _Plan]]
+        # {typing, typing_extensions}.TypedDict
+        self._required_keys = (
+            typed_dict_class.__required_keys__  # type: ignore[attr-defined]  # mypy
+        )  # type: FrozenSet[str]
+        # The plans of the fields present in a dict with each order of keys,
+        # in that order
+        self._field_plans_for_keys = (
+            {}
+        )  # type: Dict[Tuple[object, ...], Tuple[Tuple[object, _Plan], ...]]
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if type(value) is dict:
+            if not explain and not (value.keys() >= self._required_keys):
+                # Reject before checking any field
+                return _REJECTED
+            for k, field_plan in self._field_plans_present_in(value):
+                e = field_plan._check(value[k], explain)
+                if e is not None:
+                    if not explain:
+                        return e
+                    return self._field_error(value, k, e)
+        elif isinstance(value, CMapping):
+            field_plans = self._resolved_field_plans()
+            for k, v in value.items():
+                P = field_plans.get(k)
+                if P is not None:
+                    e = P._check(v, explain)
+                    if e is not None:
+                        if not explain:
+                            return e
+                        return self._field_error(value, k, e)
+        else:
+            return ValidationError(self._tp, value) if explain else _REJECTED
+
+        return self._check_required_keys(value, explain)
+
+    def _field_plans_present_in(
+        self, value: Dict[object, object]
+    ) -> Tuple[Tuple[object, _Plan], ...]:
         """
-        parts = []  # type: List[str]
-        self._format_to(parts)
-        return "".join(parts)
+        Returns the key and plan of each field present in `value`,
+        in the order of the keys of `value`, skipping keys that are not fields.
+        """
+        keys = tuple(value)
+        field_plans_present = self._field_plans_for_keys.get(keys)
+        if field_plans_present is None:
+            field_plans = self._resolved_field_plans()
+            field_plans_present = tuple(
+                [
+                    (k, field_plans[k])  # type: ignore[index]  # mypy
+                    for k in keys
+                    if k in field_plans
+                ]
+            )
+            if len(self._field_plans_for_keys) >= _MAX_FIELD_ORDERS_PER_PLAN:
+                self._field_plans_for_keys.clear()
+            self._field_plans_for_keys[keys] = field_plans_present
+        return field_plans_present
+
+    def _field_error(
+        self, value: object, k: object, e: "ValidationError"
+    ) -> "ValidationError":
+        return ValidationError(
+            self._tp,
+            value,
+            _causes=[e._with_prefix(_LazyStr(lambda: f"At key {k!r}"))],
+        )
 
-    def _format_to(self, parts: List[str], indent: int = 0) -> None:
-        for i in range(indent):
-            parts.append("  ")
-        if self._prefix is not None:
-            parts.append(str(self._prefix))  # NOTE: May be a _LazyStr
-            parts.append(": ")
-        parts.append(super().__str__())
-        if len(self._causes) > 0:
-            for c in self._causes:  # type: ignore[16]  # pyre
-                parts.append("\n")
-                c._format_to(parts, indent=indent + 1)
+    def _check_required_keys(
+        self, value: Mapping, explain: bool
+    ) -> "Optional[ValidationError]":
+        if type(value) is dict and value.keys() >= self._required_keys:
+            return None
+        for k in self._required_keys:
+            if k not in value:
+                if not explain:
+                    return _REJECTED
+                return ValidationError(
+                    self._tp,
+                    value,
+                    _causes=[
+                        ValidationError._from_message(
+                            _LazyStr(lambda: f"Required key {k!r} is missing")
+                        )
+                    ],
+                )
+        return None
 
+    def _resolved_field_plans(self) -> Dict[str, _Plan]:
+        field_plans = self._field_plans
+        if field_plans is None:
+            resolved_annotations = _typeddict_annotations(
+                self._typed_dict_class, self._options.eval
+            )
+            field_plans = self._field_plans = {
+                k: _compile_plan(
+                    _substitute(V, self._typevar_substitutions),
+                    self._options,
+                    self._plan_for_type,
+                    self,
+                )
+                for (k, V) in resolved_annotations.items()
+            }
+        return field_plans
+
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        gen.line(indent, f"if not {gen.isinstance_expr(v, CMapping)}: return False")
+        required_keys = self._typed_dict_class.__required_keys__  # type: ignore[attr-defined]  # mypy
+        for k, P in self._resolved_field_plans().items():
+            if isinstance(P, _AnyPlan):
+                if k in required_keys:
+                    gen.line(indent, f"if {k!r} not in {v}: return False")
+                continue
+            x = gen.new_var()
+            gen.line(indent, f"{x} = {v}.get({k!r}, _MISSING)")
+            if k in required_keys:
+                gen.line(indent, f"if {x} is _MISSING: return False")
+                gen.emit(P, x, indent)
+            else:
+                gen.line(indent, f"if {x} is not _MISSING:")
+                gen.emit(P, x, indent + _INDENT)
 
-class _LazyStr(str):
-    def __init__(self, value_func: Callable[[], str], /) -> None:
-        self._value_func = value_func
-        self._value = None  # type: Optional[str]
 
-    def __str__(self) -> str:
-        if self._value is None:
-            self._value = self._value_func()
-        return self._value
+class _JsonPlan(_Plan):
+    __slots__ = ("_scalar_types", "_alias_plan")
 
+    def __init__(
+        self, tp: object, scalar_types: FrozenSet[type], alias_plan: _Plan
+    ) -> None:
+        super().__init__(tp)
+        self._scalar_types = scalar_types
+        # Checks the value of the alias, one Union at a time
+        self._alias_plan = alias_plan
 
-# ------------------------------------------------------------------------------
-# isassignable
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        if self._matches(value):
+            return None
+        if not explain:
+            return _REJECTED
+        # Explain why with the same errors as if not a JSON type alias
+        return self._alias_plan._check(value, explain)
+
+    def _matches(self, value: object) -> bool:
+        alias_plan = self._alias_plan
+        return _is_json_value(
+            value,
+            self._scalar_types,
+            lambda v: alias_plan._check(v, False) is None,
+        )
 
-# TODO: Once support for TypeForm is implemented in mypy,
-#       replace the   `(Type[T]) -> TypeGuard[T]` overload
-#       and the       `(object) -> bool` overload with
-#       the following `(TypeForm[T]) -> TypeGuard[T]` overload:
-#
-#       See: https://github.com/python/mypy/issues/9773
-# @overload
-# def isassignable(value: object, tp: TypeForm[_T]) -> TypeGuard[_T]: ...
+    def _emit_expr(self, gen: "_SourceGenerator", v: str) -> Optional[str]:
+        return f"{gen.constant(self._matches)}({v})"
 
 
-@overload
-def isassignable(
-    value: object, tp: str, /, *, eval: Literal[False]
-) -> NoReturn: ...  # pragma: no cover
+class _LazyPlan(_Plan):
+    __slots__ = ("_compile_func", "_plan", "_referrer")
 
+    def __init__(
+        self, tp: object, compile_func: "Callable[[_LazyPlan], _Plan]"
+    ) -> None:
+        super().__init__(tp)
+        self._compile_func = compile_func
+        self._plan = None  # type: Optional[_Plan]
+        # Same as _TypedDictPlan._referrer
+        self._referrer = None  # type: Optional[_Plan]
 
-@overload
-def isassignable(
-    value: object, tp: str, /, *, eval: bool = True
-) -> bool: ...  # pragma: no cover
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        return self._resolved_plan()._check(value, explain)
 
+    def _resolved_plan(self) -> _Plan:
+        plan = self._plan
+        if plan is None:
+            plan = self._plan = self._compile_func(self)
+        return plan
 
-@overload
-def isassignable(
-    value: object, tp: Type[_T], /, *, eval: bool = True
-) -> TypeGuard[_T]: ...  # pragma: no cover
+    def _emit(self, gen: "_SourceGenerator", v: str, indent: str) -> None:
+        gen.emit(self._resolved_plan(), v, indent)
 
 
-@overload
-def isassignable(
-    value: object, tp: object, /, *, eval: bool = True
-) -> bool: ...  # pragma: no cover
+# The _PlanMemo of the compiled check running in each thread,
+# once it has reached a shared plan
+_plan_memo_of_thread = threading.local()
 
 
-def isassignable(value, tp, /, *, eval=True):
+class _SharedPlan(_Plan):
+    """
+    A plan which the plans of more than one TypedDict or type alias refer to,
+    so which a value may be checked against many times or while it is
+    already being checked. Remembers the result of checking each value
+    in the _PlanMemo of the running check.
+
+    A TypedDict referred to only by itself, such as that of a tree, is not
+    shared, because its values are usually trees (such as those parsed from
+    JSON) which share nothing. A value which contains itself is still checked,
+    by _checkcast_iteratively() once the recursion limit is reached.
     """
-    Returns whether `value` is in the shape of `tp`
-    (as accepted by a Python typechecker conforming to PEP 484 "Type Hints").
 
-    This method logically performs an operation similar to:
+    __slots__ = ()
+
+    _is_shared = True
+
+    def _check(self, value: object, explain: bool) -> "Optional[ValidationError]":
+        memo = getattr(_plan_memo_of_thread, "memo", None)
+        if memo is None or memo._explain is not explain:
+            return self._check_with_new_memo(value, explain)
+        key = memo.key_for(value, self)
+        if key is None:
+            return super()._check(value, explain)
+        result = memo.recall(key, value)
+        if result is not _MISSING:
+            return result  # type: ignore[return-value]  # mypy
+        e = super()._check(value, explain)
+        memo.remember(key, e)
+        return e
+
+    def _check_with_new_memo(
+        self, value: object, explain: bool
+    ) -> "Optional[ValidationError]":
+        outer_memo = getattr(_plan_memo_of_thread, "memo", None)
+        _plan_memo_of_thread.memo = _PlanMemo(explain)
+        try:
+            return self._check(value, explain)
+        finally:
+            _plan_memo_of_thread.memo = outer_memo
 
-        return isinstance(value, tp)
 
-    except that it supports many more types than `isinstance`, including:
-        * List[T]
-        * Dict[K, V]
-        * Optional[T]
-        * Union[T1, T2, ...]
-        * Literal[...]
-        * T extends TypedDict
+class _SharedTypedDictPlan(_SharedPlan, _TypedDictPlan):
+    __slots__ = ()
 
-    See trycast.trycast(..., strict=True) for information about parameters,
-    raised exceptions, and other details.
+
+class _SharedLazyPlan(_SharedPlan, _LazyPlan):
+    __slots__ = ()
+
+
+_INDENT = "    "
+
+# Maximum nesting depth of blocks to emit in a single generated function.
+# Python refuses to compile functions with more than 20 nested loops.
+_MAX_EMITTED_INDENT = _INDENT * 16
+
+
+class _SourceGenerator:
     """
-    e = _checkcast_outer(
-        tp, value, _TrycastOptions(strict=True, eval=eval, funcname="isassignable")
-    )
-    result = e is None
-    if isinstance(tp, type):
-        return cast(
-            TypeGuard[_T],  # type: ignore[reportGeneralTypeIssues]  # pyright
-            result,
+    Generates Python source for functions which return whether a value
+    is in the shape of a plan's type. Used by compile(..., codegen=True).
+    """
+
+    def __init__(self, tp: object, memoize: bool = False) -> None:
+        """
+        Parameters:
+        * memoize -- Whether generated functions for shared plans remember
+          what they checked, and so whether every generated function takes
+          the _PlanMemo of the current check as a second argument.
+        """
+        self._tp = tp
+        self._memoize = memoize
+        self._namespace = {
+            "_MISSING": _MISSING,
+            "_ATOMIC_TYPES": _ATOMIC_TYPES,
+            "_CHECKING": _CHECKING,
+            "_PlanMemo": _PlanMemo,
+            "_ValueContainsItselfError": _ValueContainsItselfError,
+        }  # type: Dict[str, Any]
+        self._constant_names = {}  # type: Dict[int, str]
+        self._function_names = {}  # type: Dict[object, str]
+        self._function_sources = []  # type: List[str]
+        self._lines = []  # type: List[str]
+        self._inlining = []  # type: List[object]
+        self._plans = []  # type: List[_Plan]
+        self._function_tables = (
+            []
+        )  # type: List[Tuple[Dict[object, object], Dict[object, str]]]
+        self._var_count = 0
+
+    def generate(self, plan: _Plan) -> Tuple[Callable[[object], bool], str]:
+        """
+        Returns a function which returns whether a value is in the shape
+        of the specified plan's type, and the source code of that function.
+        """
+        func_name = self.function_for(plan)
+        if not self._memoize and any(P._is_shared for P in self._plans):
+            # Generate again, now that emitting has resolved every plan
+            # and so found every shared plan
+            return _SourceGenerator(self._tp, memoize=True).generate(plan)
+        source = "\n\n".join(self._function_sources) + "\n"
+        code = builtins.compile(
+            source, f"<trycast validator for {format_type_str(self._tp)}>", "exec"
         )
-    else:
-        return result
+        exec(code, self._namespace)
+        for table, func_name_for_key in self._function_tables:
+            for k, name in func_name_for_key.items():
+                table[k] = self._namespace[name]
+        return (self._namespace[func_name], source)
+
+    # === Emit ===
+
+    def emit(self, plan: _Plan, v: str, indent: str) -> None:
+        key = id(plan)
+        self._plans.append(plan)
+        if (
+            key in self._inlining
+            or len(indent) > len(_MAX_EMITTED_INDENT)
+            or (self._memoize and plan._is_shared)
+        ):
+            # Call a separate function rather than inlining infinitely
+            # (for recursive types) or too deeply, or rather than
+            # inlining a plan whose function remembers what it checked
+            self.line(indent, f"if not {self.call(plan, v)}: return False")
+        else:
+            self._inlining.append(key)
+            try:
+                plan._emit(self, v, indent)
+            finally:
+                self._inlining.pop()
+
+    def function_for(self, plan: _Plan) -> str:
+        """
+        Returns the name of a generated function which returns whether
+        its argument is in the shape of the specified plan's type.
+
+        If memoizing, the function takes an optional second argument,
+        the _PlanMemo of the current check, which it passes on to
+        the functions it calls.
+        """
+        key = id(plan)
+        func_name = self._function_names.get(key)
+        if func_name is None:
+            func_name = f"check_{len(self._function_names)}"
+            self._function_names[key] = func_name
+            self._plans.append(plan)
+
+            outer_lines = self._lines
+            self._lines = [
+                (
+                    f"def {func_name}(v, m=None):"
+                    if self._memoize
+                    else f"def {func_name}(v):"
+                )
+            ]
+            try:
+                self._inlining.append(key)
+                try:
+                    plan._emit(self, "v", _INDENT)
+                finally:
+                    self._inlining.pop()
+                self.line(_INDENT, "return True")
+                if self._memoize and plan._is_shared:
+                    self._lines[0] = f"def {func_name}_unmemoized(v, m):"
+                    self._function_sources.append("\n".join(self._lines))
+                    self._lines = self._memoized_function_lines(func_name, plan)
+                self._function_sources.append("\n".join(self._lines))
+            finally:
+                self._lines = outer_lines
+        return func_name
+
+    def _memoized_function_lines(self, func_name: str, plan: _Plan) -> List[str]:
+        # NOTE: Must remember results the same way as _PlanMemo
+        return [
+            f"def {func_name}(v, m=None):",
+            f"{_INDENT}if m is None:",
+            f"{_INDENT * 2}m = _PlanMemo(False)",
+            f"{_INDENT}if type(v) in _ATOMIC_TYPES:",
+            f"{_INDENT * 2}return {func_name}_unmemoized(v, m)",
+            f"{_INDENT}if m._untracked_count > 0:",
+            f"{_INDENT * 2}m._untracked_count -= 1",
+            f"{_INDENT * 2}return {func_name}_unmemoized(v, m)",
+            f"{_INDENT}results = m._results",
+            f"{_INDENT}k = (id(v), {id(plan)})",
+            f"{_INDENT}r = results.get(k)",
+            f"{_INDENT}if r is not None:",
+            f"{_INDENT * 2}if r is _CHECKING: raise _ValueContainsItselfError()",
+            f"{_INDENT * 2}return r",
+            f"{_INDENT}results[k] = _CHECKING",
+            f"{_INDENT}m._values.append(v)",
+            f"{_INDENT}r = results[k] = {func_name}_unmemoized(v, m)",
+            f"{_INDENT}return r",
+        ]
+
+    def call(self, plan: _Plan, v: str) -> str:
+        """
+        Returns an expression which calls the generated function for
+        the specified plan with the value in variable `v`.
+        """
+        return self.call_function(self.function_for(plan), v)
+
+    def call_function(self, func_name: str, v: str) -> str:
+        """
+        Returns an expression which calls the generated function with
+        the specified name with the value in variable `v`.
+        """
+        return f"{func_name}({v}, m)" if self._memoize else f"{func_name}({v})"
+
+    def function_table(self, plan_for_key: Dict[Any, _Plan]) -> str:
+        """
+        Returns an expression which refers to a dict mapping each of
+        the specified keys to the generated function for its plan.
+        """
+        table = {}  # type: Dict[object, object]  # filled by generate()
+        self._function_tables.append(
+            (table, {k: self.function_for(P) for (k, P) in plan_for_key.items()})
+        )
+        return self.constant(table)
+
+    def line(self, indent: str, line: str) -> None:
+        self._lines.append(indent + line)
+
+    def new_var(self) -> str:
+        self._var_count += 1
+        return f"v{self._var_count}"
+
+    def constant(self, value: object) -> str:
+        """Returns an expression which refers to the specified value."""
+        builtin_name = getattr(value, "__name__", None)
+        if (
+            isinstance(builtin_name, str)
+            and getattr(builtins, builtin_name, None) is value
+        ):
+            return builtin_name
+        name = self._constant_names.get(id(value))
+        if name is None:
+            name = f"_c{len(self._constant_names)}"
+            self._constant_names[id(value)] = name
+            self._namespace[name] = value
+        return name
+
+    def isinstance_expr(self, v: str, collection_type: type) -> str:
+        """
+        Returns an expression which is true if the value in variable `v`
+        is an instance of a collection type in _EXACT_INSTANCE_TYPES.
+        """
+        exact_types = _EXACT_INSTANCE_TYPES[collection_type]
+        isinstance_expr = f"isinstance({v}, {self.classinfo(collection_type)})"
+        if exact_types == {collection_type}:
+            return isinstance_expr
+        if len(exact_types) == 1:
+            (exact_type,) = exact_types
+            return f"(type({v}) is {self.constant(exact_type)} or {isinstance_expr})"
+        return f"(type({v}) in {self.constant(exact_types)} or {isinstance_expr})"
+
+    def classinfo(self, classinfo: Union[type, Tuple[type, ...]]) -> str:
+        """Returns an expression which refers to an isinstance() classinfo."""
+        if isinstance(classinfo, tuple):
+            return f"({', '.join([self.constant(c) for c in classinfo])})"
+        else:
+            return self.constant(classinfo)
+
+
+# ------------------------------------------------------------------------------
+# clear_caches
+
+
+def clear_caches() -> None:
+    """
+    Clears all internal caches of information that trycast derives from types,
+    such as the resolved annotations of TypedDicts and the results of
+    eval_type_str().
+
+    Call this function if a type that trycast has already seen is altered,
+    such as when a name used in a string forward reference is rebound
+    to a different type.
+
+    Validators previously created by compile() are not affected.
+    """
+    _resolved_annotations_cache.clear()
+    _specialized_typeddict_annotations.cache_clear()
+    _type_alias_value.cache_clear()
+    _union_discriminator.cache_clear()
+    _union_type_filters.cache_clear()
+    _union_type_dispatch.cache_clear()
+    _json_scalar_types.cache_clear()
+    _plan_for_worker.cache_clear()
+    eval_type_str.cache_clear()
 
 
 # ------------------------------------------------------------------------------